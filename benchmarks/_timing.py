@@ -0,0 +1,14 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+
+import time
+
+
+def best_of(f, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - tic)
+    return best
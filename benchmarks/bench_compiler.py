@@ -0,0 +1,53 @@
+"""
+Compare per-call overhead of the einsum interpreter and compiled kernels.
+
+Small operands make tree walking, loop sorting and ufunc lookups dominate, so
+this measures dispatch cost rather than arithmetic.
+
+Usage: python benchmarks/bench_compiler.py [--repeat N] [--calls N]
+"""
+
+import argparse
+
+import numpy as np
+
+from sparseanalyzer.einsum import EinsumCompiler, EinsumInterpreter, parse_einop
+
+from _timing import best_of
+
+cases = [
+    "C[i, j] += A[i, k] * B[k, j]",
+    "C[i, j] max= A[i, k] + B[k, j]",
+    "D[j, i] = A[i, j] * 2 + -A[i, j]",
+    "s[] += A[i, k] * A[i, k]",
+]
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=5)
+    argparser.add_argument("--calls", type=int, default=1000)
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bindings = {"A": rng.random((4, 4)), "B": rng.random((4, 4))}
+    print(f"{'expression':36}{'interpreted (us)':>18}{'compiled (us)':>16}")
+    for expr in cases:
+        tree = parse_einop(expr)
+        times = []
+        ctxs = [
+            EinsumInterpreter(bindings=dict(bindings)),
+            EinsumCompiler(bindings=dict(bindings)),
+        ]
+        for ctx in ctxs:
+
+            def run():
+                for _ in range(args.calls):
+                    ctx(tree)
+
+            times.append(best_of(run, args.repeat) / args.calls)
+        print(f"{expr:36}{times[0] * 1e6:18.1f}{times[1] * 1e6:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
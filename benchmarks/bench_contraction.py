@@ -0,0 +1,52 @@
+"""
+Compare BLAS/tensordot dispatch with the broadcasting einsum path.
+
+Runs `C[i, j] += A[i, k] * B[k, j]` (and a batched and a matvec variant) on
+square and skinny shapes with and without `EinsumInterpreter(dispatch=...)`.
+
+Usage: python benchmarks/bench_contraction.py [--repeat N]
+"""
+
+import argparse
+
+import numpy as np
+
+from sparseanalyzer.einsum import EinsumInterpreter, parse_einop
+
+from _timing import best_of
+
+cases = [
+    ("square", "C[i, j] += A[i, k] * B[k, j]", {"A": (128, 128), "B": (128, 128)}),
+    ("square", "C[i, j] += A[i, k] * B[k, j]", {"A": (256, 256), "B": (256, 256)}),
+    ("skinny", "C[i, j] += A[i, k] * B[k, j]", {"A": (2048, 8), "B": (8, 2048)}),
+    ("skinny", "C[i, j] += A[i, k] * B[k, j]", {"A": (8, 4096), "B": (4096, 8)}),
+    ("tall", "C[i, j] += A[i, k] * B[k, j]", {"A": (65536, 16), "B": (16, 16)}),
+    ("matvec", "y[i] += A[i, k] * x[k]", {"A": (2048, 2048), "x": (2048,)}),
+    (
+        "batched",
+        "C[b, i, j] += A[b, i, k] * B[b, k, j]",
+        {"A": (32, 64, 64), "B": (32, 64, 64)},
+    ),
+]
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'case':10}{'shapes':32}{'broadcast (ms)':>16}{'dispatch (ms)':>16}")
+    for name, expr, shapes in cases:
+        tree = parse_einop(expr)
+        bindings = {tns: rng.random(shape) for tns, shape in shapes.items()}
+        times = []
+        for dispatch in (False, True):
+            ctx = EinsumInterpreter(bindings=dict(bindings), dispatch=dispatch)
+            times.append(best_of(lambda: ctx(tree), args.repeat))
+        desc = " ".join(f"{tns}{list(shape)}" for tns, shape in shapes.items())
+        print(f"{name:10}{desc:32}{times[0] * 1e3:16.2f}{times[1] * 1e3:16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time the multilevel hypergraph partitioner and compare its cut with
+contiguous splits of the rows.
+
+The matrices are a 2D five-point stencil, whose rows are numbered along the
+grid so that contiguous splits are already good, and the same stencil with
+its rows and columns randomly permuted plus a few random long-range
+nonzeros, as in irregular meshes numbered without locality. The cut is the
+number of entries of `x` sent to compute `A @ x` with each `x[j]` on a
+processor computing with it.
+
+Usage: python benchmarks/bench_hypergraph.py [--repeat N] [--k K] [--nnz N ...]
+"""
+
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+from sparseanalyzer.distributed.balance import balanced_partition
+from sparseanalyzer.distributed.hypergraph import HypergraphPartitioner, column_net, spmv_volume
+
+from _timing import best_of
+
+
+def stencil(nnz):
+    side = int(np.sqrt(nnz / 5))
+    line = sp.diags([-1.0, 2.0, -1.0], [-1, 0, 1], shape=(side, side))
+    eye = sp.eye(side)
+    return (sp.kron(line, eye) + sp.kron(eye, line)).tocsr()
+
+
+def scrambled(A, rng, extra=0.01):
+    n = A.shape[0]
+    perm = rng.permutation(n)
+    A = A[perm][:, perm].tocoo()
+    m = int(extra * A.nnz)
+    rows = np.concatenate([A.row, rng.integers(0, n, m)])
+    cols = np.concatenate([A.col, rng.integers(0, n, m)])
+    return sp.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=A.shape).tocsr()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=1)
+    argparser.add_argument("--k", type=int, default=16)
+    argparser.add_argument("--nnz", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'matrix':12}{'nnz':>12}{'time (s)':>10}{'cut':>10}{'contig':>10}{'imbal':>8}")
+    for nnz in args.nnz:
+        grid = stencil(nnz)
+        for name, A in [("stencil", grid), ("scrambled", scrambled(grid, rng))]:
+            hg = column_net(A)
+            partitioner = HypergraphPartitioner(args.k)
+            result = {}
+
+            def run():
+                result["part"] = partitioner.partition(hg)
+
+            seconds = best_of(run, args.repeat)
+            part = result["part"]
+            contiguous = spmv_volume(A, balanced_partition(A, args.k).owners)
+            print(
+                f"{name:12}{A.nnz:12}{seconds:10.2f}{part.cut:10}{contiguous:10}"
+                f"{part.imbalance:8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Measure how ThreadedEinsumInterpreter scales from 1 to N worker threads.
+
+Runs einsums which are not dispatched to BLAS (a min-plus product and a
+masked reduction) so that all of the work goes through the tiled pointwise
+and reduction path.
+
+Usage: python benchmarks/bench_parallel.py [--max-workers N] [--n SIZE]
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from sparseanalyzer.einsum import parse_einop
+from sparseanalyzer.einsum.parallel import ThreadedEinsumInterpreter
+
+from _timing import best_of
+
+exprs = [
+    "C[i, j] min= A[i, k] + B[k, j]",
+    "C[i, j] += A[i, k] * (B[k, j] > 0.5)",
+]
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    argparser.add_argument("--n", type=int, default=400)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bindings = {"A": rng.random((args.n, args.n)), "B": rng.random((args.n, args.n))}
+    workers = sorted({2**p for p in range(args.max_workers.bit_length())} | {args.max_workers})
+    for expr in exprs:
+        tree = parse_einop(expr)
+        print(expr)
+        print(f"{'workers':>8}{'time (ms)':>12}{'speedup':>10}")
+        base = None
+        for num_workers in workers:
+            ctx = ThreadedEinsumInterpreter(dict(bindings), num_workers=num_workers)
+            t = best_of(lambda: ctx(tree), args.repeat)
+            base = base or t
+            print(f"{num_workers:8}{t * 1e3:12.2f}{base / t:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare the LALR einsum parser with an Earley parser over the same grammar.
+
+Reports the time to construct each parser (the LALR one both from scratch and
+from its on-disk table cache), the import time of `sparseanalyzer.einsum.parser`
+in a fresh interpreter, and parses/second on a small corpus of statements.
+
+Usage: python benchmarks/bench_parser.py [--repeat N]
+"""
+
+import argparse
+import subprocess
+import sys
+
+from lark import Lark
+
+from sparseanalyzer.einsum import parser
+
+from _timing import best_of
+
+corpus = [
+    "C[i, j] += A[i, k] * B[k, j]",
+    "E[i] min= A[i, k] + D[k, j] << 1",
+    "C[i, j] = A[i, j] + B[j, i]",
+    "y[i] += A[i, j] * x[j]",
+    "s[] += A[i, j] * B[i, j] * C[i, j]",
+    "y[i] max= sqrt(A[i, j] * A[i, j]) - 2.5",
+    "M[i, j] = not A[i, j] and B[i, j] or C[i, j]",
+    "T[i, j, k] += X[i, a] * Y[j, a] * Z[k, a]",
+]
+
+
+def parses_per_second(lark_parser, repeat):
+    n = 200
+
+    def run():
+        for _ in range(n):
+            for expr in corpus:
+                lark_parser.parse(expr)
+
+    return n * len(corpus) / best_of(run, repeat)
+
+
+def import_time(repeat):
+    cmd = [sys.executable, "-c", "import sparseanalyzer.einsum.parser"]
+
+    def run():
+        subprocess.run(cmd, check=True)
+
+    return best_of(run, repeat)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=5)
+    args = argparser.parse_args()
+
+    earley_build = best_of(lambda: Lark(parser.einop_grammar), args.repeat)
+    lalr_build = best_of(
+        lambda: Lark(parser.einop_grammar, parser="lalr"), args.repeat
+    )
+    lalr_load = best_of(
+        lambda: Lark(parser.einop_grammar, parser="lalr", cache=True), args.repeat
+    )
+    earley = Lark(parser.einop_grammar)
+
+    print(f"{'':24}{'earley':>12}{'lalr':>12}")
+    print(f"{'build (ms)':24}{earley_build * 1e3:12.2f}{lalr_build * 1e3:12.2f}")
+    print(f"{'load cached (ms)':24}{'-':>12}{lalr_load * 1e3:12.2f}")
+    print(
+        f"{'parses/second':24}{parses_per_second(earley, args.repeat):12.0f}"
+        f"{parses_per_second(parser.lark_parser, args.repeat):12.0f}"
+    )
+    print(f"import einsum.parser (ms): {import_time(args.repeat) * 1e3:.2f}")
+
+
+if __name__ == "__main__":
+    main()
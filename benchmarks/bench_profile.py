@@ -0,0 +1,63 @@
+"""
+Time per-processor load profiles of sparse matrix-vector products.
+
+The matrix has heavy-tailed row lengths and is built directly in CSR form so
+that 10^8 nonzeros fit in a few gigabytes. It is profiled under an even and
+a nonzero-balanced contiguous split, from CSR, where slice counts come
+from the row pointers, and from COO, where they are counted with
+`bincount` over the coordinates.
+
+Usage: python benchmarks/bench_profile.py [--repeat N] [--k K] [--nnz N] [--rows N]
+"""
+
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+from sparseanalyzer.distributed import balanced_partition, load_profile
+from sparseanalyzer.distributed.balance import even_split, nnz_weights
+from sparseanalyzer.einsum import parse_einop
+
+from _timing import best_of
+
+
+def heavy_tailed(nnz, rows, rng):
+    lengths = rng.lognormal(0, 1.5, rows)
+    lengths = np.floor(lengths * nnz / lengths.sum()).astype(np.int64)
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indices = rng.integers(0, rows, int(indptr[-1]), dtype=np.int32)
+    data = np.ones(len(indices), dtype=np.float32)
+    return sp.csr_matrix((data, indices, indptr), shape=(rows, rows))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=3)
+    argparser.add_argument("--k", type=int, default=64)
+    argparser.add_argument("--nnz", type=int, default=100_000_000)
+    argparser.add_argument("--rows", type=int, default=1_000_000)
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    A = heavy_tailed(args.nnz, args.rows, rng)
+    tree = parse_einop("y[i] += A[i,j] * x[j]")
+    even = even_split(nnz_weights(A), args.k)
+    balanced = balanced_partition(A, args.k)
+    print(f"nnz {A.nnz}, rows {A.shape[0]}, k {args.k}")
+    print(f"{'format':8}{'split':10}{'time (s)':>10}{'flop imbalance':>16}")
+    for fmt, M in [("csr", A), ("coo", A.tocoo())]:
+        for name, part in [("even", even), ("balanced", balanced)]:
+            result = {}
+
+            def run():
+                result["profile"] = load_profile(tree, {"A": M}, part)
+
+            seconds = best_of(run, args.repeat)
+            imbalance = result["profile"].imbalance()
+            print(f"{fmt:8}{name:10}{seconds:10.3f}{imbalance:16.3f}")
+    print(result["profile"].histogram())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare binary joins with the generic trie join on triangle queries.
+
+The graph has a few hub vertices, so the binary join of two of its edge
+relations is far larger than the triangles it ends up containing, while the
+trie join never materializes more than the triangles themselves.
+
+Usage: python benchmarks/bench_triejoin.py [--repeat N] [--n N] [--edges N]
+"""
+
+import argparse
+
+import numpy as np
+
+from sparseanalyzer.coordinates import join, relation
+from sparseanalyzer.setbuilder import Index
+from sparseanalyzer.setbuilder.triejoin import TrieJoin
+
+from _timing import best_of
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=3)
+    argparser.add_argument("--n", type=int, default=100_000)
+    argparser.add_argument("--edges", type=int, default=200_000)
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Zipf-distributed endpoints make a handful of vertices hubs.
+    coords = np.minimum(rng.zipf(1.5, (args.edges, 2)) - 1, args.n - 1)
+    coords = np.unique(coords, axis=0)
+    i, j, k = Index("i"), Index("j"), Index("k")
+    rels = [relation(coords, (i, j)), relation(coords, (j, k)), relation(coords, (i, k))]
+
+    def binary():
+        return len(join(join(rels[0], rels[1]), rels[2]))
+
+    def trie():
+        return TrieJoin(rels).count()
+
+    intermediate = len(join(rels[0], rels[1]))
+    print(f"edges {len(coords)}, triangles {trie()}, binary intermediate {intermediate}")
+    print(f"{'engine':12}{'time (ms)':>12}")
+    for name, f in [("binary", binary), ("trie", trie)]:
+        print(f"{name:12}{best_of(f, args.repeat) * 1e3:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
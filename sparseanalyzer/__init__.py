@@ -1,13 +1,50 @@
-from .visitors.CountOpsVisitor import CountOpsVisitor
-from .einsum import parse_einop
-from .visitors.ConcreteDistributionVisitor import RowDistributionVisitor
-from . import einsum
-from . import setbuilder
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import distributed, einsum, setbuilder
+    from .einsum import parse_einop
+    from .visitors.ConcreteDistributionVisitor import RowDistributionVisitor
+    from .visitors.CostPolynomials import cost_polynomials
+    from .visitors.CountOpsVisitor import CountOpsVisitor
+    from .visitors.SparseCountOpsVisitor import SparseCountOpsVisitor
+
+# Attributes are imported on first access (PEP 562), so that e.g. a worker
+# which only needs CountOpsVisitor never loads lark or numpy.
+_lazy_attrs = {
+    'CountOpsVisitor': ('.visitors.CountOpsVisitor', 'CountOpsVisitor'),
+    'cost_polynomials': ('.visitors.CostPolynomials', 'cost_polynomials'),
+    'parse_einop': ('.einsum', 'parse_einop'),
+    'RowDistributionVisitor': ('.visitors.ConcreteDistributionVisitor', 'RowDistributionVisitor'),
+    'SparseCountOpsVisitor': ('.visitors.SparseCountOpsVisitor', 'SparseCountOpsVisitor'),
+    'distributed': ('.distributed', None),
+    'einsum': ('.einsum', None),
+    'setbuilder': ('.setbuilder', None),
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_attrs:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _lazy_attrs[name]
+    val = importlib.import_module(module, __name__)
+    if attr is not None:
+        val = getattr(val, attr)
+    globals()[name] = val
+    return val
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attrs})
+
 
 __all__ = [
     'CountOpsVisitor',
+    'cost_polynomials',
     'parse_einop',
     'RowDistributionVisitor',
+    'SparseCountOpsVisitor',
+    'distributed',
     'einsum',
     'setbuilder',
-]
\ No newline at end of file
+]
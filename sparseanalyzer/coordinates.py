@@ -0,0 +1,218 @@
+from dataclasses import dataclass
+from math import prod
+from typing import Any
+
+import numpy as np
+
+
+def coordinates(tns) -> np.ndarray:
+    """
+    Return the coordinates of the stored entries of `tns` as an `(nnz, ndim)`
+    int64 array. `tns` may be a scipy sparse matrix or array, a pydata
+    `sparse` array, or a dense array (whose nonzeros are taken).
+    """
+    if hasattr(tns, "tocoo") and hasattr(tns, "row"):
+        return np.stack([tns.row, tns.col], axis=1).astype(np.int64)
+    if hasattr(tns, "tocoo") and hasattr(tns, "indptr"):
+        return coordinates(tns.tocoo())
+    if hasattr(tns, "coords") and hasattr(tns, "nnz"):
+        if not hasattr(tns, "data") or tns.coords.ndim != 2:
+            tns = tns.tocoo()
+        return np.asarray(tns.coords, dtype=np.int64).T.copy()
+    return np.argwhere(np.asarray(tns) != 0).astype(np.int64)
+
+
+def coordinate_blocks(tns, block_size: int):
+    """
+    Yield the coordinates of `tns`, as `coordinates` returns them, in
+    `(n, ndim)` blocks of at most `block_size` rows. The blocks are read
+    straight from the index buffers of COO, CSR and CSC operands and from
+    slices of dense ones, so only one block is held at a time.
+    """
+    if hasattr(tns, "tocoo") and hasattr(tns, "row"):
+        for start in range(0, tns.nnz, block_size):
+            stop = start + block_size
+            yield np.stack([tns.row[start:stop], tns.col[start:stop]], axis=1).astype(np.int64)
+        return
+    if hasattr(tns, "tocoo") and getattr(tns, "format", None) in ("csr", "csc"):
+        for start in range(0, tns.nnz, block_size):
+            pos = np.arange(start, min(start + block_size, tns.nnz))
+            major = np.searchsorted(tns.indptr, pos, side="right") - 1
+            minor = tns.indices[pos]
+            cols = (major, minor) if tns.format == "csr" else (minor, major)
+            yield np.stack(cols, axis=1).astype(np.int64)
+        return
+    if hasattr(tns, "coords") and hasattr(tns, "nnz"):
+        if not hasattr(tns, "data") or tns.coords.ndim != 2:
+            tns = tns.tocoo()
+        for start in range(0, tns.nnz, block_size):
+            yield np.asarray(tns.coords[:, start : start + block_size], dtype=np.int64).T
+        return
+    arr = np.asarray(tns)
+    if arr.ndim == 0:
+        yield coordinates(arr)
+        return
+    flat = arr.reshape(-1)
+    for start in range(0, flat.size, block_size):
+        hits = np.flatnonzero(flat[start : start + block_size]) + start
+        yield np.stack(np.unravel_index(hits, arr.shape), axis=1).astype(np.int64).reshape(len(hits), arr.ndim)
+
+
+@dataclass(frozen=True)
+class Relation:
+    """
+    Relation
+
+    A relation over index variables with a multiplicity per tuple, i.e. a
+    sparse table of counts.
+
+    Attributes:
+        idxs: The variable of each column, without repeats.
+        coords: The tuples, as an `(n, len(idxs))` int64 array.
+        weights: The multiplicity of each tuple, as an `(n,)` int64 array.
+    """
+
+    idxs: tuple[Any, ...]
+    coords: np.ndarray
+    weights: np.ndarray
+
+    def __len__(self):
+        return len(self.weights)
+
+    def count(self) -> int:
+        return int(self.weights.sum())
+
+
+def relation(coords: np.ndarray, idxs) -> Relation:
+    """
+    Return the relation of `coords` accessed at `idxs`, which may repeat an
+    index (e.g. the diagonal `A[i, i]`).
+    """
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, len(idxs))
+    cols = {}
+    mask = np.ones(len(coords), dtype=bool)
+    for n, idx in enumerate(idxs):
+        if idx in cols:
+            mask &= coords[:, cols[idx]] == coords[:, n]
+        else:
+            cols[idx] = n
+    coords = coords[mask][:, list(cols.values())]
+    return Relation(tuple(cols), coords, np.ones(len(coords), dtype=np.int64))
+
+
+def scalar(count: int = 1) -> Relation:
+    return Relation((), np.zeros((1, 0), dtype=np.int64), np.array([count], np.int64))
+
+
+def _pack(coords: np.ndarray):
+    # A single sortable key per row, and the shape the columns were packed
+    # in (None if they had to be ranked instead).
+    if coords.shape[1] == 0 or len(coords) == 0:
+        return np.zeros(len(coords), dtype=np.int64), None
+    dims = tuple(int(n) + 1 for n in coords.max(axis=0))
+    if coords.shape[1] == 1:
+        return coords[:, 0], dims
+    if prod(dims) < 2**62:
+        return np.ravel_multi_index(coords.T, dims), dims
+    return np.unique(coords, axis=0, return_inverse=True)[1].reshape(-1), None
+
+
+def _keys(coords: np.ndarray) -> np.ndarray:
+    return _pack(coords)[0]
+
+
+def unique_rows(coords: np.ndarray) -> np.ndarray:
+    """
+    Return the distinct rows of the `(n, k)` array `coords`, sorted
+    lexicographically.
+    """
+    if len(coords) == 0:
+        return coords
+    keys, _ = _pack(coords)
+    _, first = np.unique(keys, return_index=True)
+    return coords[first]
+
+
+def group(rel: Relation, idxs) -> Relation:
+    """
+    Project `rel` onto `idxs`, summing the weights of merged tuples.
+    """
+    idxs = tuple(idxs)
+    cols = [rel.idxs.index(idx) for idx in idxs]
+    coords = rel.coords[:, cols]
+    if len(rel) == 0:
+        return Relation(idxs, coords, rel.weights)
+    if not idxs:
+        return scalar(rel.count())
+    keys, dims = _pack(coords)
+    if dims is not None and prod(dims) <= 4 * len(keys) + 1024:
+        # Dense enough to bucket the keys without sorting.
+        weights = np.bincount(keys, rel.weights, minlength=prod(dims))
+        present = np.bincount(keys, minlength=prod(dims)) > 0
+        uniq = np.flatnonzero(present)
+        coords = np.stack(np.unravel_index(uniq, dims), axis=1).astype(np.int64)
+        return Relation(idxs, coords, weights[uniq].astype(np.int64))
+    uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    weights = np.bincount(inverse.reshape(-1), rel.weights, minlength=len(uniq))
+    return Relation(idxs, coords[first], weights.astype(np.int64))
+
+
+def join(a: Relation, b: Relation) -> Relation:
+    """
+    Return the natural join of `a` and `b`, multiplying weights.
+    """
+    shared = [idx for idx in a.idxs if idx in b.idxs]
+    a_cols = a.coords[:, [a.idxs.index(idx) for idx in shared]]
+    b_cols = b.coords[:, [b.idxs.index(idx) for idx in shared]]
+    # Key both sides together, so that their keys are comparable.
+    keys, dims = _pack(np.concatenate([a_cols, b_cols]))
+    a_keys, b_keys = keys[: len(a)], keys[len(a) :]
+    order = np.argsort(b_keys, kind="stable")
+    if dims is not None and prod(dims) <= 4 * len(keys) + 1024:
+        # Look up the run of each key in a table instead of searching.
+        runs = np.bincount(b_keys, minlength=prod(dims))
+        lo = (np.cumsum(runs) - runs)[a_keys]
+        counts = runs[a_keys]
+    else:
+        b_sorted = b_keys[order]
+        lo = np.searchsorted(b_sorted, a_keys, side="left")
+        counts = np.searchsorted(b_sorted, a_keys, side="right") - lo
+    a_rows = np.repeat(np.arange(len(a)), counts)
+    offsets = np.cumsum(counts) - counts
+    b_rows = order[lo[a_rows] + np.arange(len(a_rows)) - offsets[a_rows]]
+    extra = [n for n, idx in enumerate(b.idxs) if idx not in a.idxs]
+    coords = np.concatenate([a.coords[a_rows], b.coords[b_rows][:, extra]], axis=1)
+    idxs = (*a.idxs, *(b.idxs[n] for n in extra))
+    return Relation(idxs, coords, a.weights[a_rows] * b.weights[b_rows])
+
+
+def contract(relations, keep=()) -> Relation:
+    """
+    Return the join of `relations` projected onto `keep`, with the number
+    of joined tuples behind each projected tuple as its weight.
+
+    Variables outside `keep` are summed out one at a time, each after
+    joining only the relations which mention it, so the full join is never
+    materialized when it can be avoided (e.g. counting the multiplies of a
+    sparse matrix product only needs the nonzeros per shared index).
+    """
+    rels = list(relations) or [scalar()]
+    keep = tuple(keep)
+    while True:
+        elim = {idx for rel in rels for idx in rel.idxs if idx not in keep}
+        if not elim:
+            break
+
+        def cost(idx):
+            return prod(len(rel) for rel in rels if idx in rel.idxs)
+
+        idx = min(sorted(elim, key=str), key=cost)
+        rel, *others = [rel for rel in rels if idx in rel.idxs]
+        for other in others:
+            rel = join(rel, other)
+        rels = [r for r in rels if idx not in r.idxs]
+        rels.append(group(rel, [i for i in rel.idxs if i != idx]))
+    rel = rels[0]
+    for other in rels[1:]:
+        rel = join(rel, other)
+    return group(rel, [idx for idx in keep if idx in rel.idxs])
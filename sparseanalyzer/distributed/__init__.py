@@ -0,0 +1,69 @@
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .balance import Partition, balanced_partition, flop_balanced_partition
+    from .communication import CommunicationSets, communication_sets
+    from .executor import DistributedExecutor, DistributionReport
+    from .hypergraph import HypergraphPartition, HypergraphPartitioner, column_net, spmv_volume
+    from .profile import LoadProfile, load_profile
+    from .reorder import Reordering, reorder, split_volume
+    from .search import PartitionSearch, PartitionStrategy, StrategyScore
+
+# Attributes are imported from their submodules on first access (PEP 562).
+_lazy_attrs = {
+    "DistributedExecutor": ".executor",
+    "DistributionReport": ".executor",
+    "CommunicationSets": ".communication",
+    "communication_sets": ".communication",
+    "PartitionSearch": ".search",
+    "PartitionStrategy": ".search",
+    "StrategyScore": ".search",
+    "Partition": ".balance",
+    "balanced_partition": ".balance",
+    "flop_balanced_partition": ".balance",
+    "HypergraphPartition": ".hypergraph",
+    "HypergraphPartitioner": ".hypergraph",
+    "column_net": ".hypergraph",
+    "spmv_volume": ".hypergraph",
+    "Reordering": ".reorder",
+    "reorder": ".reorder",
+    "split_volume": ".reorder",
+    "LoadProfile": ".profile",
+    "load_profile": ".profile",
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_attrs:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    val = getattr(importlib.import_module(_lazy_attrs[name], __name__), name)
+    globals()[name] = val
+    return val
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attrs})
+
+
+__all__ = [
+    "DistributedExecutor",
+    "DistributionReport",
+    "CommunicationSets",
+    "communication_sets",
+    "PartitionSearch",
+    "PartitionStrategy",
+    "StrategyScore",
+    "Partition",
+    "balanced_partition",
+    "flop_balanced_partition",
+    "HypergraphPartition",
+    "HypergraphPartitioner",
+    "column_net",
+    "spmv_volume",
+    "Reordering",
+    "reorder",
+    "split_volume",
+    "LoadProfile",
+    "load_profile",
+]
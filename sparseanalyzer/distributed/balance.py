@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from math import prod
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..coordinates import contract, coordinates, relation
+from ..einsum import nodes as ein
+from ..symbolic import PostOrderDFS
+
+
+@dataclass(frozen=True)
+class Partition:
+    """
+    Partition
+
+    A split of one dimension into contiguous blocks, one per processor, and
+    the load of each block.
+
+    Attributes:
+        bounds: The `k + 1` offsets of the blocks, so that processor `p` owns
+            `[bounds[p], bounds[p + 1])`. These are the `splits` of
+            `RowDistributionVisitor`.
+        loads: The total weight of each block.
+    """
+
+    bounds: np.ndarray
+    loads: np.ndarray
+
+    @property
+    def k(self) -> int:
+        return len(self.loads)
+
+    @property
+    def owners(self) -> np.ndarray:
+        """
+        The processor owning each slice, as an assignment array for
+        `communication_sets`.
+        """
+        return np.repeat(np.arange(self.k), np.diff(self.bounds))
+
+    @property
+    def imbalance(self) -> float:
+        """
+        The largest load over the mean load, 1.0 when perfectly balanced.
+        """
+        mean = self.loads.mean()
+        return float(self.loads.max() / mean) if mean else 1.0
+
+    def owner(self, coords) -> np.ndarray:
+        return np.searchsorted(self.bounds, coords, side="right") - 1
+
+
+def split(weights, k) -> Partition:
+    """
+    Split slices with the given weights into `k` contiguous blocks of
+    near-equal total weight. Block `p` ends at the first slice where the
+    prefix sum of the weights reaches `(p + 1) / k` of the total.
+    """
+    weights = np.asarray(weights)
+    prefix = np.concatenate([[0], np.cumsum(weights)])
+    targets = prefix[-1] * np.arange(1, k) / k
+    inner = np.searchsorted(prefix, targets, side="left")
+    bounds = np.concatenate([[0], inner, [len(weights)]]).astype(np.int64)
+    return Partition(bounds, np.diff(prefix[bounds]))
+
+
+def even_split(weights, k) -> Partition:
+    """
+    Split slices with the given weights into `k` contiguous blocks of
+    near-equal width, as `RowDistributionVisitor` does by default.
+    """
+    weights = np.asarray(weights)
+    prefix = np.concatenate([[0], np.cumsum(weights)])
+    bounds = np.arange(k + 1, dtype=np.int64) * len(weights) // k
+    return Partition(bounds, np.diff(prefix[bounds]))
+
+
+def nnz_weights(tns, axis=0) -> np.ndarray:
+    """
+    Return the number of nonzeros of `tns` in each slice along `axis`.
+    """
+    if sp.issparse(tns) and (tns.format, axis) in (("csr", 0), ("csc", 1)):
+        return np.diff(tns.indptr).astype(np.int64)
+    if sp.issparse(tns) and tns.format == "coo":
+        return np.bincount((tns.row, tns.col)[axis], minlength=tns.shape[axis])
+    return np.bincount(coordinates(tns)[:, axis], minlength=tns.shape[axis])
+
+
+def flop_weights(tree: ein.Einsum, bindings, idx: ein.Index, dims=None) -> np.ndarray:
+    """
+    Return the estimated multiply-adds of the einsum `tree` at each value of
+    `idx`: the number of iterations where all its operands bound in
+    `bindings` are nonzero, with unbound operands taken as dense. Loops over
+    indices of unbound operands only are sized by the bound output, or else
+    by `dims`, a mapping of indices to sizes.
+    """
+    accesses = [
+        node for node in PostOrderDFS(tree.arg)
+        if isinstance(node, ein.Access) and node.tns.name in bindings
+    ]
+    dims = dict(dims or {})
+    if tree.tns.name in bindings:
+        dims.update(zip(tree.idxs, bindings[tree.tns.name].shape, strict=True))
+    for node in accesses:
+        dims.update(zip(node.idxs, bindings[node.tns.name].shape, strict=True))
+    covered = {i for acc in accesses for i in acc.idxs}
+    if idx not in covered:
+        raise ValueError(f"No bound operand of {tree} is indexed by {idx}")
+    loops = {i for node in PostOrderDFS(tree.arg) if isinstance(node, ein.Access) for i in node.idxs}
+    missing = [i for i in loops - covered if i not in dims]
+    if missing:
+        raise ValueError(f"Unknown size of indices {missing} of {tree}")
+    free = prod(dims[i] for i in loops - covered)
+    if len({(acc.tns.name, acc.idxs) for acc in accesses}) == 1 and len(set(accesses[0].idxs)) == len(accesses[0].idxs):
+        # A single operand does one multiply-add per nonzero.
+        acc = accesses[0]
+        return nnz_weights(bindings[acc.tns.name], acc.idxs.index(idx)) * free
+    rels = [relation(coordinates(bindings[acc.tns.name]), acc.idxs) for acc in accesses]
+    rel = contract(rels, keep=(idx,))
+    weights = np.zeros(dims[idx], dtype=np.int64)
+    weights[rel.coords[:, 0]] = rel.weights
+    return weights * free
+
+
+def balanced_partition(tns, k, axis=0) -> Partition:
+    """
+    Split `tns` into `k` contiguous blocks along `axis` with near-equal
+    numbers of nonzeros.
+    """
+    return split(nnz_weights(tns, axis), k)
+
+
+def flop_balanced_partition(tree: ein.Einsum, bindings, k, idx=None) -> Partition:
+    """
+    Split the loop index `idx` of `tree` (by default the first index of its
+    first access) into `k` contiguous blocks with near-equal estimated
+    multiply-adds.
+    """
+    if idx is None:
+        idx = next(n for n in PostOrderDFS(tree.arg) if isinstance(n, ein.Access)).idxs[0]
+    return split(flop_weights(tree, bindings, idx), k)
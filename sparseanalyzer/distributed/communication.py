@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..coordinates import coordinates, unique_rows
+
+
+@dataclass
+class CommunicationSets:
+    """
+    CommunicationSets
+
+    The entries of a sparse tensor which each processor must receive to do
+    its work, that is `need \\ has` in the terms of the setbuilder partition
+    model.
+
+    Attributes:
+        k: The number of processors.
+        coords: For each processor, the coordinates it receives, as a sorted
+            `(n, ndim)` int64 array.
+        volume: `volume[q, p]` is the number of entries sent from `q` to `p`.
+    """
+
+    k: int
+    coords: list[np.ndarray]
+    volume: np.ndarray
+
+    @property
+    def received(self) -> np.ndarray:
+        return self.volume.sum(axis=0)
+
+    @property
+    def sent(self) -> np.ndarray:
+        return self.volume.sum(axis=1)
+
+    @property
+    def total(self) -> int:
+        return int(self.volume.sum())
+
+    def report(self):
+        print("Communication report:")
+        print("Total comms: ", self.total)
+        for p in range(self.k):
+            print(f"{p}: received {self.received[p]}, sent {self.sent[p]}")
+
+
+def communication_sets(
+    tns, data, work, data_axis=0, work_axis=0, k=None, workers=None
+) -> CommunicationSets:
+    """
+    Return the exact entries of `tns` each processor receives.
+
+    `data` is the data partition Π, assigning each slice of `tns` along
+    `data_axis` to the processor which stores it, and `work` is the work
+    partition Φ, assigning each slice along `work_axis` to the processor
+    which computes with it. A processor needs the nonzeros in its work
+    slices and has those in its data slices.
+
+    The nonzeros are grouped by the processor needing them in one sort, and
+    each processor then subtracts what it has from what it needs with
+    vectorized masks, with processors handled in parallel by `workers`
+    threads.
+    """
+    coords = coordinates(tns)
+    data = np.asarray(data, dtype=np.int64)
+    work = np.asarray(work, dtype=np.int64)
+    if k is None:
+        k = int(max(data.max(initial=-1), work.max(initial=-1))) + 1
+    holder = data[coords[:, data_axis]]
+    needer = work[coords[:, work_axis]]
+    order = np.argsort(needer, kind="stable")
+    bounds = np.searchsorted(needer[order], np.arange(k + 1))
+
+    def receive(p):
+        rows = order[bounds[p] : bounds[p + 1]]
+        rows = rows[holder[rows] != p]
+        recv = unique_rows(coords[rows])
+        return recv, np.bincount(data[recv[:, data_axis]], minlength=k)
+
+    with ThreadPoolExecutor(workers) as pool:
+        parts = list(pool.map(receive, range(k)))
+    volume = np.zeros((k, k), dtype=np.int64)
+    for p, (_, sent) in enumerate(parts):
+        volume[:, p] = sent
+    return CommunicationSets(k, [recv for recv, _ in parts], volume)
@@ -0,0 +1,231 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+
+from ..einsum import nodes as ein
+from ..einsum.interpreter import EinsumInterpreter, accumulate_ops, reduction_ops
+from ..einsum.scheduler import get_dims
+from ..symbolic import Namespace, PostOrderDFS, PostWalk
+from ..visitors.ConcreteDistributionVisitor import RowDistributionVisitor
+
+
+def row_bounds(n: int, k: int) -> list[tuple[int, int]]:
+    """
+    Split `n` rows into `k` contiguous half-open ranges of near-equal size.
+    """
+    return [(p * n // k, (p + 1) * n // k) for p in range(k)]
+
+
+@dataclass(frozen=True)
+class TensorSpec:
+    """
+    TensorSpec
+
+    How one access of a tensor is laid out across worker processes.
+
+    Attributes:
+        segments: The shared memory segment holding each processor's rows.
+        shape: The shape of the whole tensor.
+        dtype: The dtype of the tensor.
+        axis: The position of the work index in the access, or None.
+    """
+
+    segments: tuple[str, ...]
+    shape: tuple[int, ...]
+    dtype: Any
+    axis: int | None
+
+
+@dataclass
+class DistributionReport:
+    """
+    DistributionReport
+
+    Measured versus predicted communication of a distributed einsum.
+
+    Attributes:
+        k: The number of processors.
+        fetched: The number of elements each processor read from its peers.
+        wall_times: The wall-clock seconds each processor spent.
+        predicted_comms: The total predicted by `RowDistributionVisitor`, or
+            None if it could not model the split.
+        result: The value of the einsum.
+    """
+
+    k: int
+    fetched: list[int]
+    wall_times: list[float]
+    predicted_comms: int | None
+    result: Any
+
+    @property
+    def measured_comms(self) -> int:
+        return sum(self.fetched)
+
+    def report(self):
+        print("Distributed execution report:")
+        print("Measured comms: ", self.measured_comms)
+        print("Predicted comms: ", self.predicted_comms)
+        for p in range(self.k):
+            print(f"{p}: fetched {self.fetched[p]}, {self.wall_times[p]:.4f}s")
+
+
+def _run_worker(p, tree, tensors, work_range):
+    tic = time.perf_counter()
+    lo, hi = work_range
+    fetched = 0
+    bindings = {}
+    attached = []
+    for name, spec in tensors.items():
+        if not spec.shape:
+            # Scalars are replicated on every processor.
+            shm = shared_memory.SharedMemory(name=spec.segments[0])
+            attached.append(shm)
+            bindings[name] = np.array(np.ndarray((), spec.dtype, buffer=shm.buf))
+            continue
+        region = [slice(None)] * len(spec.shape)
+        rows = (0, spec.shape[0])
+        if spec.axis == 0:
+            rows = (lo, hi)
+        elif spec.axis is not None:
+            region[spec.axis] = slice(lo, hi)
+        parts = []
+        bounds = row_bounds(spec.shape[0], len(spec.segments))
+        for owner, ((blo, bhi), seg) in enumerate(
+            zip(bounds, spec.segments, strict=True)
+        ):
+            r0, r1 = max(blo, rows[0]), min(bhi, rows[1])
+            if r0 >= r1:
+                continue
+            shm = shared_memory.SharedMemory(name=seg)
+            attached.append(shm)
+            shape = (bhi - blo, *spec.shape[1:])
+            block = np.ndarray(shape, spec.dtype, buffer=shm.buf)
+            part = np.array(block[(slice(r0 - blo, r1 - blo), *region[1:])])
+            if owner != p:
+                fetched += part.size
+            parts.append(part)
+        if parts:
+            bindings[name] = np.concatenate(parts)
+        else:
+            shape = (rows[1] - rows[0], *spec.shape[1:])
+            bindings[name] = np.empty(shape, spec.dtype)
+    ctx = EinsumInterpreter(bindings=bindings)
+    (out,) = ctx(tree)
+    res = ctx.bindings[out]
+    for shm in attached:
+        shm.close()
+    return res, fetched, time.perf_counter() - tic
+
+
+class DistributedExecutor:
+    """
+    DistributedExecutor
+
+    Runs an einsum on `k` local worker processes to validate the
+    communication predicted by `RowDistributionVisitor`.
+
+    Like the visitor, each tensor is split into contiguous blocks of its
+    first dimension, one per processor, held in shared memory, and scalars
+    are replicated on every processor. Work follows
+    the owner-computes rule: each processor evaluates the iterations whose
+    split index lies in the rows it owns of the leftmost operand, reading
+    remote rows from its peers' segments as needed. Every element read from
+    a peer is counted. Each access of a tensor is fetched on its own.
+
+    Attributes:
+        k: The number of worker processes.
+    """
+
+    def __init__(self, k):
+        self.k = k
+
+    def __call__(self, tree: ein.Einsum, bindings) -> DistributionReport:
+        k = self.k
+        env = get_dims(tree, bindings)
+        try:
+            visitor = RowDistributionVisitor(env, k)
+            visitor.visit(tree)
+            predicted = visitor.total_comms
+        except NotImplementedError:
+            predicted = None
+
+        # Each processor works on its rows of the leftmost operand.
+        first = next(n for n in PostOrderDFS(tree.arg) if isinstance(n, ein.Access) and n.idxs)
+        work_idx = first.idxs[0]
+
+        # Give each access a name of its own, so it is fetched separately.
+        spc = Namespace()
+        accesses = []
+
+        def rename(node):
+            if isinstance(node, ein.Access):
+                name = spc.freshen(node.tns.name)
+                accesses.append((name, node))
+                return ein.Access(ein.Alias(name), node.idxs)
+            return None
+
+        local_tree = PostWalk(rename)(tree)
+
+        segments = {}
+        try:
+            for name in {acc.tns.name for _, acc in accesses}:
+                arr = np.asarray(bindings[name])
+                segs = []
+                if arr.ndim:
+                    blocks = [arr[lo:hi] for lo, hi in row_bounds(arr.shape[0], k)]
+                else:
+                    blocks = [arr]
+                for block in blocks:
+                    shm = shared_memory.SharedMemory(
+                        create=True, size=max(block.nbytes, 1)
+                    )
+                    np.ndarray(block.shape, arr.dtype, buffer=shm.buf)[...] = block
+                    segs.append(shm)
+                segments[name] = (arr, segs)
+            tensors = {}
+            for name, acc in accesses:
+                arr, segs = segments[acc.tns.name]
+                axis = acc.idxs.index(work_idx) if work_idx in acc.idxs else None
+                tensors[name] = TensorSpec(
+                    tuple(shm.name for shm in segs), arr.shape, arr.dtype, axis
+                )
+            bounds = row_bounds(env[work_idx], k)
+            # Processors without rows have nothing to do, and reductions
+            # such as `max` have no value over their empty range.
+            active = [p for p, (lo, hi) in enumerate(bounds) if lo < hi] or [0]
+            with ProcessPoolExecutor(len(active)) as pool:
+                futures = {
+                    p: pool.submit(_run_worker, p, local_tree, tensors, bounds[p])
+                    for p in active
+                }
+                results = [
+                    futures[p].result() if p in futures else (None, 0, 0.0)
+                    for p in range(k)
+                ]
+        finally:
+            for _, segs in segments.values():
+                for shm in segs:
+                    shm.close()
+                    shm.unlink()
+
+        parts = [res for res, _, _ in results if res is not None]
+        if work_idx in tree.idxs:
+            result = np.concatenate(parts, axis=tree.idxs.index(work_idx))
+        else:
+            # The work index was reduced, so combine the partial reductions.
+            acc = getattr(np, accumulate_ops[reduction_ops[tree.op.val]])
+            result = parts[0]
+            for part in parts[1:]:
+                result = acc(result, part)
+        return DistributionReport(
+            k,
+            [fetched for _, fetched, _ in results],
+            [wall for _, _, wall in results],
+            predicted,
+            result,
+        )
@@ -0,0 +1,499 @@
+from dataclasses import dataclass
+from functools import cached_property
+from math import ceil, log2
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..coordinates import _keys, coordinates
+from ..einsum import nodes as ein
+from ..symbolic import PostOrderDFS
+from .balance import flop_weights
+
+
+@dataclass(frozen=True)
+class Hypergraph:
+    """
+    Hypergraph
+
+    A hypergraph whose vertices are the slices of a tensor assigned to
+    processors and whose nets are the sets of slices sharing some value that
+    must be communicated. Partitioning the vertices to minimize the
+    connectivity-1 cut minimizes that communication.
+
+    Attributes:
+        pins: A `(nets, vertices)` CSR matrix, one where a net contains a
+            vertex.
+        weights: The int64 weight of each vertex, i.e. its work.
+        costs: The int64 cost of each net, i.e. its size on the wire.
+    """
+
+    pins: sp.csr_matrix
+    weights: np.ndarray
+    costs: np.ndarray
+
+    @property
+    def nverts(self) -> int:
+        return self.pins.shape[1]
+
+    @property
+    def nnets(self) -> int:
+        return self.pins.shape[0]
+
+    @cached_property
+    def sizes(self) -> np.ndarray:
+        return np.diff(self.pins.indptr)
+
+    @cached_property
+    def incidence(self) -> sp.csr_matrix:
+        """
+        The `(vertices, nets)` transpose of `pins`.
+        """
+        return self.pins.T.tocsr()
+
+    @classmethod
+    def build(cls, nets, verts, shape, weights, costs=None) -> "Hypergraph":
+        """
+        Return the hypergraph with a pin for each pair of `nets` and `verts`,
+        which may repeat. Nets of fewer than two pins are dropped, as they
+        can never be cut, and nets with the same pins are merged into one
+        with their total cost, as coarsening makes many of them.
+        """
+        pins = sp.csr_matrix((np.ones(len(nets), np.int64), (nets, verts)), shape=shape)
+        pins.sum_duplicates()
+        pins.data[:] = 1
+        if costs is None:
+            costs = np.ones(shape[0], dtype=np.int64)
+        sizes = np.diff(pins.indptr)
+        keep = np.flatnonzero(sizes >= 2)
+        # Nets are compared by the wrapping sum of a random 64-bit label of
+        # each of their pins.
+        labels = np.random.default_rng(0).integers(0, 2**63, shape[1], dtype=np.uint64)
+        sums = np.add.reduceat(labels[pins.indices], pins.indptr[keep]) if len(keep) else keep
+        _, first, inverse = np.unique(sums, return_index=True, return_inverse=True)
+        costs = np.bincount(inverse.reshape(-1), costs[keep], minlength=len(first))
+        pins = pins[keep[first]]
+        return cls(pins, np.asarray(weights, dtype=np.int64), costs.astype(np.int64))
+
+    def _coo(self):
+        return np.repeat(np.arange(self.nnets), self.sizes), self.pins.indices
+
+    def subgraph(self, verts) -> "Hypergraph":
+        """
+        Return the hypergraph induced by `verts`, keeping the pins of each
+        net among them.
+        """
+        nets, pins = self._coo()
+        rename = np.full(self.nverts, -1, dtype=np.int64)
+        rename[verts] = np.arange(len(verts))
+        keep = rename[pins] >= 0
+        return Hypergraph.build(
+            nets[keep], rename[pins[keep]], (self.nnets, len(verts)), self.weights[verts], self.costs
+        )
+
+    def contract(self, cmap, n) -> "Hypergraph":
+        """
+        Return the hypergraph with each vertex `v` merged into vertex
+        `cmap[v]` of `n`.
+        """
+        nets, pins = self._coo()
+        weights = np.bincount(cmap, self.weights, minlength=n).astype(np.int64)
+        return Hypergraph.build(nets, cmap[pins], (self.nnets, n), weights, self.costs)
+
+    def connectivity(self, owners) -> np.ndarray:
+        """
+        Return the number of distinct parts among the pins of each net.
+        """
+        nets, pins = self._coo()
+        k = int(owners.max(initial=0)) + 1
+        spans = np.unique(nets * k + owners[pins])
+        return np.bincount(spans // k, minlength=self.nnets)
+
+    def cut(self, owners) -> int:
+        """
+        Return the connectivity-1 cut of the partition `owners`, the sum over
+        nets of their cost times the number of extra parts they span.
+        """
+        lam = self.connectivity(owners)
+        return int(self.costs @ np.maximum(lam - 1, 0))
+
+
+@dataclass(frozen=True)
+class HypergraphPartition:
+    """
+    HypergraphPartition
+
+    An assignment of the vertices of a hypergraph to processors. Unlike a
+    `Partition` its parts need not be contiguous.
+
+    Attributes:
+        owners: The processor of each vertex, as an assignment array for
+            `communication_sets` and `spmv_volume`.
+        loads: The total vertex weight of each processor.
+        cut: The connectivity-1 cut of the assignment.
+    """
+
+    owners: np.ndarray
+    loads: np.ndarray
+    cut: int
+
+    @property
+    def k(self) -> int:
+        return len(self.loads)
+
+    @property
+    def imbalance(self) -> float:
+        """
+        The largest load over the mean load, 1.0 when perfectly balanced.
+        """
+        mean = self.loads.mean()
+        return float(self.loads.max() / mean) if mean else 1.0
+
+    def owner(self, coords) -> np.ndarray:
+        return self.owners[coords]
+
+
+def column_net(tns, weights=None) -> Hypergraph:
+    """
+    Return the column-net hypergraph of the matrix `tns`: a vertex for each
+    row, weighted by its nonzeros unless `weights` are given, and a net for
+    each column holding the rows with a nonzero in it. The cut of a row
+    partition is then the number of entries of `x` sent to compute `A @ x`.
+    """
+    coords = coordinates(tns)
+    if weights is None:
+        weights = np.bincount(coords[:, 0], minlength=tns.shape[0])
+    return Hypergraph.build(coords[:, 1], coords[:, 0], (tns.shape[1], tns.shape[0]), weights)
+
+
+def einsum_hypergraph(tree: ein.Einsum, bindings, idx=None) -> Hypergraph:
+    """
+    Return the hypergraph of splitting the loop index `idx` of `tree` (by
+    default the first index of its first access). Each value of `idx` is a
+    vertex, weighted by its estimated multiply-adds. Each bound operand
+    indexed by `idx` contributes a net for each value of its other indices,
+    holding the values of `idx` whose slices have a nonzero there, so that
+    for `y[i] += A[i, j] * x[j]` the nets are the columns of `A`.
+    """
+    if idx is None:
+        idx = next(n for n in PostOrderDFS(tree.arg) if isinstance(n, ein.Access)).idxs[0]
+    weights = flop_weights(tree, bindings, idx)
+    nets, verts = [], []
+    offset = 0
+    for node in PostOrderDFS(tree.arg):
+        if not (isinstance(node, ein.Access) and node.tns.name in bindings and idx in node.idxs):
+            continue
+        coords = coordinates(bindings[node.tns.name])
+        axis = node.idxs.index(idx)
+        others = [n for n, i in enumerate(node.idxs) if i != idx]
+        _, net = np.unique(_keys(coords[:, others]), return_inverse=True)
+        nets.append(net.reshape(-1) + offset)
+        verts.append(coords[:, axis])
+        offset += int(net.max(initial=-1)) + 1
+    if not nets:
+        raise ValueError(f"No bound operand of {tree} is indexed by {idx}")
+    return Hypergraph.build(
+        np.concatenate(nets), np.concatenate(verts), (offset, len(weights)), weights
+    )
+
+
+def spmv_volume(tns, owners, x_owners=None) -> int:
+    """
+    Return the number of entries of `x` sent to compute `A @ x` when row `i`
+    of `A` is computed by processor `owners[i]` and `x[j]` is stored on
+    `x_owners[j]`. By default each `x[j]` is stored on one of the processors
+    needing it, so that the volume is the cut of the column-net hypergraph.
+    """
+    coords = coordinates(tns)
+    owners = np.asarray(owners, dtype=np.int64)
+    k = int(owners.max(initial=0)) + 1
+    needs = np.unique(coords[:, 1] * k + owners[coords[:, 0]])
+    cols, procs = needs // k, needs % k
+    if x_owners is None:
+        return len(needs) - len(np.unique(cols))
+    return int(np.count_nonzero(np.asarray(x_owners)[cols] != procs))
+
+
+def _side_counts(hg, side):
+    # The pins of each net on side 1 and on side 0.
+    ones = hg.pins @ side.astype(np.int64)
+    return hg.sizes - ones, ones
+
+
+def _bisection_cut(hg, side) -> int:
+    zeros, ones = _side_counts(hg, side)
+    return int(hg.costs[(zeros > 0) & (ones > 0)].sum())
+
+
+def _gains(hg, side) -> np.ndarray:
+    # The decrease in cut of moving each vertex to the other side alone: it
+    # uncuts the nets where it is the last pin on its side, and cuts the nets
+    # with no pin on the other side.
+    zeros, ones = _side_counts(hg, side)
+    from_zero = hg.incidence @ (hg.costs * ((zeros == 1).astype(np.int64) - (ones == 0)))
+    from_one = hg.incidence @ (hg.costs * ((ones == 1).astype(np.int64) - (zeros == 0)))
+    return np.where(side, from_one, from_zero)
+
+
+def _loads(hg, side):
+    total = int(hg.weights.sum())
+    one = int(hg.weights[side].sum())
+    return np.array([total - one, one])
+
+
+def _overload(loads, caps) -> int:
+    return int(np.maximum(loads - caps, 0).sum())
+
+
+class HypergraphPartitioner:
+    """
+    HypergraphPartitioner
+
+    A multilevel partitioner of hypergraphs into `k` parts, by recursive
+    bisection with net splitting, minimizing the connectivity-1 cut subject
+    to each part's weight staying within `1 + epsilon` of the mean.
+
+    Each bisection coarsens the hypergraph by matching vertices which share
+    small nets, until at most `coarse_size` vertices remain or matching
+    stalls, bisects the coarsest hypergraph by greedy growing from several
+    random seeds, and projects the bisection back level by level, refining
+    it on the way. Levels of at most `fm_limit` vertices are refined with
+    Fiduccia–Mattheyses passes, which move one vertex at a time and roll
+    back to the best cut seen. Finer levels move every positive-gain vertex
+    of one side at once, whose gains only add up, so that the cut never
+    grows; this keeps the work per level to a few sparse products.
+
+    Attributes:
+        k: The number of parts.
+        epsilon: The allowed imbalance of the part weights.
+        coarse_size: The number of vertices at which to stop coarsening.
+        fm_limit: The most vertices of a level refined with FM passes.
+        passes: The most FM passes per level.
+        tries: The number of initial bisections to refine and pick from.
+        seed: The seed of the random matchings and initial bisections.
+    """
+
+    def __init__(self, k, epsilon=0.03, coarse_size=128, fm_limit=512, passes=2, tries=4, seed=0):
+        self.k = k
+        self.epsilon = epsilon
+        self.coarse_size = coarse_size
+        self.fm_limit = fm_limit
+        self.passes = passes
+        self.tries = tries
+        self.seed = seed
+
+    def __call__(self, tree: ein.Einsum, bindings, idx=None) -> HypergraphPartition:
+        """
+        Partition the values of the loop index `idx` of `tree` (by default
+        the first index of its first access) by the hypergraph of the sparse
+        operands bound in `bindings`.
+        """
+        if not isinstance(tree, ein.Einsum):
+            raise ValueError(f"Expected an einsum, got {type(tree).__name__}")
+        return self.partition(einsum_hypergraph(tree, bindings, idx))
+
+    def partition(self, hg: Hypergraph) -> HypergraphPartition:
+        """
+        Partition the vertices of `hg`.
+        """
+        rng = np.random.default_rng(self.seed)
+        # Each part goes through ceil(log2(k)) bisections, whose imbalances
+        # compound.
+        depth = max(1, ceil(log2(self.k))) if self.k > 1 else 1
+        epsilon = (1 + self.epsilon) ** (1 / depth) - 1
+        owners = np.zeros(hg.nverts, dtype=np.int64)
+        self._partition(hg, self.k, 0, np.arange(hg.nverts), owners, epsilon, rng)
+        loads = np.bincount(owners, hg.weights, minlength=self.k).astype(np.int64)
+        return HypergraphPartition(owners, loads, hg.cut(owners))
+
+    def _partition(self, hg, k, offset, verts, owners, epsilon, rng):
+        if k == 1 or hg.nverts == 0:
+            owners[verts] = offset
+            return
+        k0 = k // 2
+        side = self.bisect(hg, k0 / k, epsilon, rng)
+        for s, parts, start in ((False, k0, offset), (True, k - k0, offset + k0)):
+            sel = np.flatnonzero(side == s)
+            self._partition(hg.subgraph(sel), parts, start, verts[sel], owners, epsilon, rng)
+
+    def bisect(self, hg: Hypergraph, frac, epsilon, rng) -> np.ndarray:
+        """
+        Return a bisection of `hg` as a boolean array, true on side 1, with
+        `frac` of the weight targeted on side 0.
+        """
+        total = int(hg.weights.sum())
+        target = np.array([frac, 1 - frac]) * total
+        caps = np.floor(target * (1 + epsilon)).astype(np.int64)
+        # A coarse vertex heavier than the slack could make balance
+        # unreachable.
+        max_weight = max(int(hg.weights.max(initial=0)), int(epsilon * target.min()))
+        levels = []
+        while hg.nverts > self.coarse_size:
+            cmap, n = self.match(hg, max_weight, rng)
+            if n > 0.9 * hg.nverts:
+                break
+            levels.append((hg, cmap))
+            hg = hg.contract(cmap, n)
+        side = self.initial(hg, target, caps, rng)
+        for fine, cmap in reversed(levels):
+            side = self.refine(fine, side[cmap], caps)
+        return side
+
+    def match(self, hg: Hypergraph, max_weight, rng, rounds=4, max_net=256):
+        """
+        Return a map of the vertices of `hg` to the vertices of a coarser
+        hypergraph, and its number of vertices.
+
+        In each round, consecutive unmatched pins of each net are paired,
+        starting from a random parity, and rated by the net's cost per pin.
+        Each vertex proposes the partner of highest total rating, with ties
+        broken at random, and mutual proposals are matched. Nets of more
+        than `max_net` pins connect their pins too weakly to be worth the
+        pairs.
+        """
+        n = hg.nverts
+        mate = np.full(n, -1, dtype=np.int64)
+        verts = np.arange(n)
+        all_nets, all_pins = hg._coo()
+        small = hg.sizes[all_nets] <= max_net
+        all_nets, all_pins = all_nets[small], all_pins[small]
+        for _ in range(rounds):
+            free = mate[all_pins] < 0
+            nets, pins = all_nets[free], all_pins[free]
+            counts = np.bincount(nets, minlength=hg.nnets)
+            pos = np.arange(len(nets)) - np.repeat(np.cumsum(counts) - counts, counts)
+            pos += rng.integers(0, 2, hg.nnets)[nets]
+            left = np.flatnonzero((pos % 2 == 0) & (np.roll(nets, -1) == nets))
+            left = left[left + 1 < len(nets)]
+            a, b = pins[left], pins[left + 1]
+            fits = hg.weights[a] + hg.weights[b] <= max_weight
+            a, b, left = a[fits], b[fits], left[fits]
+            if len(a) == 0:
+                break
+            rating = hg.costs[nets[left]] / (counts[nets[left]] - 1)
+            rating = np.concatenate([rating, rating]) * (1 + rng.random(2 * len(a)) / 1024)
+            strength = sp.csr_matrix(
+                (rating, (np.concatenate([a, b]), np.concatenate([b, a]))), shape=(n, n)
+            )
+            strength.sum_duplicates()
+            rows = np.flatnonzero(np.diff(strength.indptr))
+            starts = strength.indptr[rows]
+            best = np.maximum.reduceat(strength.data, starts)
+            hit = strength.data == np.repeat(best, np.diff(strength.indptr)[rows])
+            first = np.minimum.reduceat(np.where(hit, np.arange(len(hit)), len(hit)), starts)
+            proposal = np.full(n, -1, dtype=np.int64)
+            proposal[rows] = strength.indices[first]
+            mutual = (proposal >= 0) & (proposal[np.maximum(proposal, 0)] == verts)
+            mate[mutual] = proposal[mutual]
+        leader = np.where(mate >= 0, np.minimum(verts, mate), verts)
+        cmap = np.cumsum(leader == verts) - 1
+        return cmap[leader], int(cmap[-1]) + 1 if n else 0
+
+    def initial(self, hg: Hypergraph, target, caps, rng) -> np.ndarray:
+        """
+        Return the best of `tries` bisections of `hg`, each grown from a
+        random vertex by moving the vertex of highest gain to side 0 until it
+        reaches its target weight, and refined with FM.
+        """
+        best, best_key = None, None
+        for _ in range(self.tries):
+            side = np.ones(hg.nverts, dtype=bool)
+            load = 0
+            if hg.nverts:
+                v = rng.integers(hg.nverts)
+                while load < target[0]:
+                    side[v] = False
+                    load += hg.weights[v]
+                    if not side.any():
+                        break
+                    gains = _gains(hg, side) + rng.random(hg.nverts) / 2
+                    v = np.argmax(np.where(side, gains, -np.inf))
+            side = self.fm(hg, side, caps)
+            key = (_overload(_loads(hg, side), caps), _bisection_cut(hg, side))
+            if best_key is None or key < best_key:
+                best, best_key = side, key
+        return best
+
+    def refine(self, hg: Hypergraph, side, caps) -> np.ndarray:
+        """
+        Return `side` refined and rebalanced within `caps`.
+        """
+        side = self.rebalance(hg, side, caps)
+        if hg.nverts <= self.fm_limit:
+            return self.fm(hg, side, caps)
+        while True:
+            moved = False
+            for src in (False, True):
+                dst = int(not src)
+                gains = _gains(hg, side)
+                cand = np.flatnonzero((side == src) & (gains > 0))
+                cand = cand[np.argsort(-gains[cand], kind="stable")]
+                room = caps[dst] - _loads(hg, side)[dst]
+                cand = cand[np.cumsum(hg.weights[cand]) <= room]
+                if len(cand):
+                    side[cand] = not src
+                    moved = True
+            if not moved:
+                return side
+
+    def rebalance(self, hg: Hypergraph, side, caps) -> np.ndarray:
+        """
+        Return `side` with the vertices of least loss moved off an overloaded
+        side, as far as the other side has room.
+        """
+        side = side.copy()
+        loads = _loads(hg, side)
+        for src in (False, True):
+            over = loads[int(src)] - caps[int(src)]
+            if over <= 0:
+                continue
+            gains = _gains(hg, side)
+            cand = np.flatnonzero(side == src)
+            cand = cand[np.argsort(-gains[cand], kind="stable")]
+            moved = np.cumsum(hg.weights[cand])
+            room = caps[int(not src)] - loads[int(not src)]
+            cand = cand[(moved - hg.weights[cand] < over) & (moved <= room)]
+            side[cand] = not src
+            loads = _loads(hg, side)
+        return side
+
+    def fm(self, hg: Hypergraph, side, caps, patience=64) -> np.ndarray:
+        """
+        Return `side` after Fiduccia–Mattheyses passes. Each pass moves the
+        unlocked vertex of highest gain whose move fits, locks it, and
+        finally keeps the prefix of moves reaching the least overload and
+        then the least cut, stopping early after `patience` moves without
+        improvement.
+        """
+        side = side.copy()
+        w = hg.weights
+        for _ in range(self.passes):
+            cur = side.copy()
+            locked = np.zeros(hg.nverts, dtype=bool)
+            loads = _loads(hg, cur)
+            cut = _bisection_cut(hg, cur)
+            best_key, best_len = (_overload(loads, caps), cut), 0
+            moves = []
+            while len(moves) - best_len < patience:
+                gains = _gains(hg, cur)
+                fits = np.where(cur, loads[0] + w <= caps[0], loads[1] + w <= caps[1])
+                # Moves off an overloaded side are allowed, to restore balance.
+                fits |= np.where(cur, loads[1] > caps[1], loads[0] > caps[0])
+                cand = ~locked & fits
+                if not cand.any():
+                    break
+                v = int(np.argmax(np.where(cand, gains, np.iinfo(np.int64).min)))
+                cut -= int(gains[v])
+                s = int(cur[v])
+                loads[s] -= w[v]
+                loads[1 - s] += w[v]
+                cur[v] = not cur[v]
+                locked[v] = True
+                moves.append(v)
+                key = (_overload(loads, caps), cut)
+                if key < best_key:
+                    best_key, best_len = key, len(moves)
+            if best_len == 0:
+                break
+            side[moves[:best_len]] ^= True
+        return side
@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from math import prod
+
+import numpy as np
+
+from ..coordinates import Relation, contract, coordinates, relation
+from ..einsum import nodes as ein
+from ..symbolic import PostOrderDFS, gensym
+from .balance import flop_weights, nnz_weights
+
+
+@dataclass
+class LoadProfile:
+    """
+    LoadProfile
+
+    The work of each processor under a partition of the iterations of an
+    einsum.
+
+    Attributes:
+        k: The number of processors.
+        nnz: The number of stored entries of the bound operands each
+            processor touches.
+        flops: The number of multiply-adds each processor does.
+        writes: The number of output entries each processor writes.
+    """
+
+    k: int
+    nnz: np.ndarray
+    flops: np.ndarray
+    writes: np.ndarray
+
+    def imbalance(self, metric="flops") -> float:
+        """
+        The largest over the mean of `metric` ("nnz", "flops" or "writes"),
+        1.0 when perfectly balanced.
+        """
+        loads = getattr(self, metric)
+        mean = loads.mean()
+        return float(loads.max() / mean) if mean else 1.0
+
+    def histogram(self, metric="flops", width=40) -> str:
+        """
+        Return a bar per processor of `metric`, scaled to the largest.
+        """
+        loads = getattr(self, metric)
+        top = loads.max(initial=0)
+        digits = len(str(self.k - 1))
+        lines = []
+        for p, load in enumerate(loads):
+            bar = "#" * (int(round(width * load / top)) if top else 0)
+            lines.append(f"{p:>{digits}} |{bar:<{width}} {load}")
+        return "\n".join(lines)
+
+    def report(self):
+        print("Load report:")
+        for metric in ("nnz", "flops", "writes"):
+            loads = getattr(self, metric)
+            print(
+                f"{metric}: max {loads.max()}, mean {loads.mean():.1f}, "
+                f"imbalance {self.imbalance(metric):.3f}"
+            )
+        print("Multiply-adds per processor:")
+        print(self.histogram())
+
+
+def load_profile(tree: ein.Einsum, bindings, partition, idx=None, k=None, dims=None) -> LoadProfile:
+    """
+    Return the load of each processor when the loop index `idx` of `tree`
+    (by default the first index of its first access) is split by
+    `partition`, an assignment array of its values to processors or any
+    partition with `owners`, such as a `Partition` or `HypergraphPartition`.
+
+    Operands bound in `bindings` are sparse; as in `flop_weights`, unbound
+    operands are dense, and indices only they or the output span are sized
+    by the bound output or by `dims`. A processor touches the nonzeros in its slices of
+    the operands indexed by `idx`, and the nonzeros of other operands at
+    the values of their shared indices those slices reach. It writes the
+    distinct output entries of its iterations, so a split reduction writes
+    partial results on every processor reaching them.
+
+    Per-slice counts are summed onto processors with `bincount`, and a
+    single CSR or CSC operand is never expanded to coordinates, so that
+    profiles of matrices with 10^8 nonzeros take seconds.
+    """
+    if idx is None:
+        idx = next(n for n in PostOrderDFS(tree.arg) if isinstance(n, ein.Access)).idxs[0]
+    owners = np.asarray(getattr(partition, "owners", partition), dtype=np.int64)
+    if k is None:
+        k = getattr(partition, "k", None) or int(owners.max(initial=-1)) + 1
+    accesses = list(dict.fromkeys(
+        (node.tns.name, node.idxs)
+        for node in PostOrderDFS(tree.arg)
+        if isinstance(node, ein.Access) and node.tns.name in bindings
+    ))
+    flops = np.bincount(owners, flop_weights(tree, bindings, idx, dims), minlength=k).astype(np.int64)
+
+    # A processor index to join the owners with the coordinates of operands.
+    proc = ein.Index(gensym("proc"))
+    owned = relation(np.stack([np.arange(len(owners)), owners], axis=1), (idx, proc))
+    rels = {}
+
+    def rel(name, idxs):
+        if (name, idxs) not in rels:
+            rels[name, idxs] = relation(coordinates(bindings[name]), idxs)
+        return rels[name, idxs]
+
+    linked = [(name, idxs) for name, idxs in accesses if idx in idxs]
+    nnz = np.zeros(k, dtype=np.int64)
+    for name, idxs in accesses:
+        tns = bindings[name]
+        if idx in idxs and len(set(idxs)) == len(idxs):
+            nnz += np.bincount(owners, nnz_weights(tns, idxs.index(idx)), minlength=k).astype(np.int64)
+            continue
+        shared = [i for i in dict.fromkeys(idxs) if any(i in other for _, other in linked)]
+        if not shared:
+            nnz += int(nnz_weights(tns).sum())
+            continue
+        reach = contract([*(rel(*acc) for acc in linked), owned], keep=(proc, *shared))
+        reach = Relation(reach.idxs, reach.coords, np.ones(len(reach), dtype=np.int64))
+        hit = contract([reach, rel(name, idxs)], keep=(proc,))
+        nnz[hit.coords[:, 0]] += hit.weights
+
+    dims = dict(dims or {})
+    for name, idxs in [*accesses, (tree.tns.name, tree.idxs)]:
+        if name in bindings:
+            dims.update(zip(idxs, bindings[name].shape, strict=True))
+    covered = {i for _, idxs in accesses for i in idxs}
+    kept = [i for i in tree.idxs if i in covered]
+    missing = [i for i in tree.idxs if i not in covered and i not in dims]
+    if missing:
+        raise ValueError(f"Unknown size of output indices {missing} of {tree}")
+    free = prod(dims[i] for i in tree.idxs if i not in covered)
+    name, idxs = accesses[0]
+    single = len(accesses) == 1 and idx in idxs and len(set(idxs)) == len(idxs)
+    if single and set(kept) <= {idx}:
+        # Each nonempty slice of a single operand writes its own outputs, or
+        # the whole output when `idx` is reduced.
+        nonempty = np.bincount(owners, nnz_weights(bindings[name], idxs.index(idx)) > 0, minlength=k)
+        writes = nonempty if kept else nonempty > 0
+    else:
+        out = contract([*(rel(*acc) for acc in accesses), owned], keep=(proc, *kept))
+        writes = np.bincount(out.coords[:, 0], minlength=k)
+    return LoadProfile(k, nnz, flops, writes.astype(np.int64) * free)
@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+from ..coordinates import coordinates
+from ..einsum import nodes as ein
+from ..symbolic import PostOrderDFS
+from .balance import flop_balanced_partition
+from .hypergraph import einsum_hypergraph
+
+
+def permute(tns, perms):
+    """
+    Return `tns` with each axis reordered by its entry of `perms`, so that
+    slice `n` of the result is slice `perms[axis][n]` of `tns`. An entry of
+    None leaves its axis in place. `tns` may be a scipy sparse matrix or
+    array, a pydata `sparse` array, or a dense array, and keeps its type.
+    """
+    perms = [
+        np.arange(n) if perm is None else np.asarray(perm)
+        for perm, n in zip(perms, tns.shape, strict=True)
+    ]
+    if sp.issparse(tns):
+        return tns.tocsr()[perms[0]][:, perms[1]].asformat(tns.format)
+    if hasattr(tns, "coords") and hasattr(tns, "nnz"):
+        coo = tns.asformat("coo")
+        coords = np.stack([np.argsort(perm)[c] for perm, c in zip(perms, coo.coords, strict=True)])
+        return type(coo)(coords, coo.data, shape=coo.shape).asformat(tns.format)
+    return np.asarray(tns)[np.ix_(*perms)]
+
+
+def _pattern(coords, shape):
+    return sp.csr_matrix((np.ones(len(coords), np.int8), (coords[:, 0], coords[:, 1])), shape=shape)
+
+
+def rcm_permutation(coords, shape) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return reverse Cuthill–McKee permutations of the rows and columns of the
+    matrix with nonzeros at `coords`, which gather the nonzeros near the
+    diagonal. A square matrix is permuted symmetrically, by the ordering of
+    the graph of its symmetrized pattern, so its rows and columns keep
+    matching; otherwise the rows and columns are ordered together as the
+    vertices of its bipartite graph.
+    """
+    m, n = shape
+    pattern = _pattern(coords, shape)
+    if m == n:
+        perm = reverse_cuthill_mckee((pattern + pattern.T).tocsr(), symmetric_mode=True)
+        perm = perm.astype(np.int64)
+        return perm, perm
+    graph = sp.bmat([[None, pattern], [pattern.T, None]]).tocsr()
+    perm = reverse_cuthill_mckee(graph, symmetric_mode=True).astype(np.int64)
+    return perm[perm < m], perm[perm >= m] - m
+
+
+def gray_permutation(coords, shape, blocks=64) -> tuple[np.ndarray, None]:
+    """
+    Return a permutation of the rows of the matrix with nonzeros at
+    `coords` which sorts them in Gray code order of the bitmask of the
+    `blocks` column blocks they touch. Rows touching similar blocks become
+    neighbours, and consecutive rows differ in few blocks, while the columns
+    stay in place. The bitmasks are 64-bit, so `blocks` is at most 64.
+    """
+    if not 1 <= blocks <= 64:
+        raise ValueError(f"Expected between 1 and 64 column blocks, got {blocks}")
+    m, n = shape
+    block = coords[:, 1] * blocks // max(n, 1)
+    pairs = np.unique(coords[:, 0] * blocks + block)
+    # The first column block is the most significant bit.
+    bits = np.left_shift(np.uint64(1), (blocks - 1 - pairs % blocks).astype(np.uint64))
+    mask = np.zeros(m, dtype=np.uint64)
+    np.add.at(mask, pairs // blocks, bits)
+    # The rank of a Gray code is the prefix XOR of its bits.
+    rank = mask.copy()
+    shift = 1
+    while shift < 64:
+        rank ^= rank >> np.uint64(shift)
+        shift *= 2
+    return np.argsort(rank, kind="stable").astype(np.int64), None
+
+
+def permute_bindings(tree: ein.Einsum, bindings, perms) -> dict:
+    """
+    Return `bindings` with every tensor accessed by `tree` permuted along
+    the indices with an entry in `perms`.
+    """
+    bindings = dict(bindings)
+    accesses = [(tree.tns.name, tree.idxs)] + [
+        (node.tns.name, node.idxs) for node in PostOrderDFS(tree.arg) if isinstance(node, ein.Access)
+    ]
+    for name, idxs in dict(accesses).items():
+        if name in bindings and any(idx in perms for idx in idxs):
+            bindings[name] = permute(bindings[name], [perms.get(idx) for idx in idxs])
+    return bindings
+
+
+_methods = {"rcm": rcm_permutation, "gray": gray_permutation}
+
+
+def split_volume(tree: ein.Einsum, bindings, k, idx=None) -> int:
+    """
+    Return the predicted communication of splitting the loop index `idx` of
+    `tree` (by default the first index of its first access) into `k`
+    contiguous blocks of near-equal multiply-adds: the cut of its hypergraph
+    under that split.
+    """
+    if idx is None:
+        idx = next(n for n in PostOrderDFS(tree.arg) if isinstance(n, ein.Access)).idxs[0]
+    owners = flop_balanced_partition(tree, bindings, k, idx).owners
+    return einsum_hypergraph(tree, bindings, idx).cut(owners)
+
+
+@dataclass(frozen=True)
+class Reordering:
+    """
+    Reordering
+
+    A permutation of the values of loop indices of an einsum, and the
+    predicted communication of splitting it into contiguous blocks before
+    and after.
+
+    Attributes:
+        method: The reordering, "rcm" or "gray".
+        perms: For each reordered index, the permutation taking its new
+            values to its old ones: value `n` after is `perms[idx][n]` before.
+        before: The `split_volume` before reordering.
+        after: The `split_volume` after reordering.
+    """
+
+    method: str
+    perms: dict
+    before: int
+    after: int
+
+    @property
+    def pays_off(self) -> bool:
+        return self.after < self.before
+
+    def permute(self, tree: ein.Einsum, bindings) -> dict:
+        """
+        Return `bindings` with every tensor accessed by `tree` permuted along
+        its reordered indices.
+        """
+        return permute_bindings(tree, bindings, self.perms)
+
+    def rewrite(self, owners, idx) -> np.ndarray:
+        """
+        Return the assignment `owners` of the old values of `idx` as an
+        assignment of its new values.
+        """
+        owners = np.asarray(owners)
+        return owners[self.perms[idx]] if idx in self.perms else owners
+
+    def restore(self, owners, idx) -> np.ndarray:
+        """
+        Return the assignment `owners` of the new values of `idx` as an
+        assignment of its old values.
+        """
+        owners = np.asarray(owners)
+        if idx not in self.perms:
+            return owners
+        restored = np.empty_like(owners)
+        restored[self.perms[idx]] = owners
+        return restored
+
+    def report(self):
+        print(f"Reordering report ({self.method}):")
+        print("Predicted comms before: ", self.before)
+        print("Predicted comms after: ", self.after)
+        print("Pays off: ", self.pays_off)
+
+
+def reorder(tree: ein.Einsum, bindings, k, method="rcm", idx=None) -> Reordering:
+    """
+    Reorder the loop index `idx` of `tree` (by default the first index of
+    its first access) and the other index of the first bound matrix accessed
+    along it, by the permutations of that matrix given by `method`, and
+    predict the communication of splitting `idx` into `k` contiguous blocks
+    before and after.
+    """
+    if method not in _methods:
+        raise ValueError(f"Unknown reordering {method!r}, expected one of {sorted(_methods)}")
+    if idx is None:
+        idx = next(n for n in PostOrderDFS(tree.arg) if isinstance(n, ein.Access)).idxs[0]
+    access = next(
+        (
+            node for node in PostOrderDFS(tree.arg)
+            if isinstance(node, ein.Access) and node.tns.name in bindings
+            and len(node.idxs) == 2 and idx in node.idxs and len(set(node.idxs)) == 2
+        ),
+        None,
+    )
+    if access is None:
+        raise ValueError(f"No bound matrix of {tree} is indexed by {idx}")
+    tns = bindings[access.tns.name]
+    axis = access.idxs.index(idx)
+    other = access.idxs[1 - axis]
+    coords = coordinates(tns)[:, [axis, 1 - axis]]
+    rows, cols = _methods[method](coords, (tns.shape[axis], tns.shape[1 - axis]))
+    perms = {idx: rows}
+    if cols is not None:
+        perms[other] = cols
+    before = split_volume(tree, bindings, k, idx)
+    after = split_volume(tree, permute_bindings(tree, bindings, perms), k, idx)
+    return Reordering(method, perms, before, after)
@@ -0,0 +1,241 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import combinations, product
+from math import prod
+
+import numpy as np
+
+from ..einsum import nodes as ein
+from ..symbolic import PostOrderDFS
+
+
+@dataclass(frozen=True)
+class Layout:
+    """
+    Layout
+
+    How a tensor is stored across processors.
+
+    Attributes:
+        kind: "row", "column", "block" or "replicate".
+        parts: The number of blocks along each dimension of the tensor, whose
+            product is the number of processors, or None if every processor
+            holds a full copy.
+    """
+
+    kind: str
+    parts: tuple[int, ...] | None
+
+
+@dataclass(frozen=True)
+class PartitionStrategy:
+    """
+    PartitionStrategy
+
+    A distribution of an einsum: how its iterations are divided, and how
+    each of its tensors is stored.
+
+    Attributes:
+        work: The number of blocks of each split loop index, whose product
+            is the number of processors.
+        layouts: The layout of each tensor, by name.
+    """
+
+    work: tuple[tuple[ein.Index, int], ...]
+    layouts: tuple[tuple[str, Layout], ...]
+
+    def __str__(self):
+        work = ", ".join(f"{idx.name}/{n}" for idx, n in self.work)
+        layouts = ", ".join(f"{name}: {layout.kind}" for name, layout in self.layouts)
+        return f"work [{work}]; {layouts}"
+
+
+@dataclass(frozen=True)
+class StrategyScore:
+    """
+    StrategyScore
+
+    The cost of a `PartitionStrategy`.
+
+    Attributes:
+        strategy: The strategy scored.
+        comms: The total number of values received by all processors.
+        memory: The most values resident on any one processor, counting the
+            blocks it stores and the values it receives.
+    """
+
+    strategy: PartitionStrategy
+    comms: int
+    memory: int
+
+
+def factorizations(k: int) -> list[tuple[int, int]]:
+    """
+    Return the ways to write `k` as a product of two factors above 1.
+    """
+    return [(a, k // a) for a in range(2, k) if k % a == 0]
+
+
+def tensor_layouts(ndim: int, k: int, replicate: bool) -> list[Layout]:
+    """
+    Return the candidate layouts of a tensor of `ndim` dimensions.
+    """
+    if ndim == 0:
+        return [Layout("replicate", None)]
+    layouts = [Layout("row", (k, *[1] * (ndim - 1)))]
+    if ndim >= 2:
+        layouts.append(Layout("column", (1, k, *[1] * (ndim - 2))))
+        for a, b in factorizations(k):
+            layouts.append(Layout("block", (a, b, *[1] * (ndim - 2))))
+    if replicate:
+        layouts.append(Layout("replicate", None))
+    return layouts
+
+
+def work_splits(loops, k: int) -> list[tuple[tuple[ein.Index, int], ...]]:
+    """
+    Return the candidate splits of the loop indices `loops` into `k` blocks,
+    along one index or on a two-dimensional grid of two.
+    """
+    splits = [((idx, k),) for idx in loops]
+    for a, b in combinations(loops, 2):
+        for pa, pb in factorizations(k):
+            splits.append(((a, pa), (b, pb)))
+    return splits
+
+
+def _blocks(n, parts, coord):
+    # The half-open block `coord` of `parts` near-equal blocks of `n`.
+    return coord * n // parts, (coord + 1) * n // parts
+
+
+def score(accesses, env, k, strategy: PartitionStrategy) -> StrategyScore:
+    """
+    Score `strategy` for the accesses of an einsum, as pairs of tensor names
+    and indices.
+
+    Processors are laid out on the grid of the work split and on the grid of
+    each layout in row-major order. Each access of a tensor (and its output)
+    needs the box of the tensor which the processor's iterations touch, and
+    receives what it does not store itself: for the output, that is the
+    partial results which its owner must combine.
+    """
+    procs = np.arange(k)
+    work = dict(strategy.work)
+    work_grid = dict(zip(work, np.unravel_index(procs, tuple(work.values())), strict=True))
+    layouts = dict(strategy.layouts)
+    stored = {}
+    received = np.zeros(k, dtype=np.int64)
+    for name, idxs in accesses:
+        layout = layouts[name]
+        sizes = [env[idx] for idx in idxs]
+        if layout.parts is None:
+            own = [(np.zeros(k, np.int64), np.full(k, n)) for n in sizes]
+        else:
+            grid = np.unravel_index(procs, layout.parts)
+            own = [_blocks(n, parts, c) for n, parts, c in zip(sizes, layout.parts, grid, strict=True)]
+        stored[name] = prod(hi - lo for lo, hi in own)
+        need = np.ones(k, dtype=np.int64)
+        overlap = np.ones(k, dtype=np.int64)
+        for idx, n, (lo, hi) in zip(idxs, sizes, own, strict=True):
+            nlo, nhi = (0, n) if idx not in work else _blocks(n, work[idx], work_grid[idx])
+            need *= nhi - nlo
+            overlap *= np.maximum(0, np.minimum(hi, nhi) - np.maximum(lo, nlo))
+        received += need - overlap
+    memory = sum(stored.values()) + received
+    return StrategyScore(strategy, int(received.sum()), int(np.max(memory)))
+
+
+def _score_chunk(accesses, env, k, strategies):
+    return [score(accesses, env, k, strategy) for strategy in strategies]
+
+
+def pareto_frontier(scores) -> list[StrategyScore]:
+    """
+    Return the scores no other score beats in both communication and
+    memory, by increasing communication.
+    """
+    frontier = []
+    for s in sorted(scores, key=lambda s: (s.comms, s.memory, str(s.strategy))):
+        if not frontier or s.memory < frontier[-1].memory:
+            frontier.append(s)
+    return frontier
+
+
+class PartitionSearch:
+    """
+    PartitionSearch
+
+    Searches the distributions of an einsum over `k` processors. Candidate
+    strategies split the iterations along one loop index or on a 2D grid of
+    two, and store each tensor by rows, by columns, in 2D blocks or, for
+    operands smaller than the largest, replicated on every processor. Every
+    combination is scored with the communication model of `score` in a
+    process pool.
+
+    Attributes:
+        k: The number of processors.
+        workers: The number of worker processes, or None for one per CPU.
+        chunk_size: The number of strategies scored per task.
+    """
+
+    def __init__(self, k, workers=None, chunk_size=256):
+        self.k = k
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def accesses(self, tree: ein.Einsum):
+        accs = [
+            (node.tns.name, node.idxs)
+            for node in PostOrderDFS(tree.arg)
+            if isinstance(node, ein.Access)
+        ]
+        return [*accs, (tree.tns.name, tree.idxs)]
+
+    def strategies(self, tree: ein.Einsum, env) -> list[PartitionStrategy]:
+        """
+        Return every candidate strategy for `tree`.
+        """
+        accesses = self.accesses(tree)
+        ndims = dict((name, len(idxs)) for name, idxs in accesses)
+        sizes = {name: prod(env[idx] for idx in idxs) for name, idxs in accesses}
+        largest = max(sizes.values())
+        names = sorted(ndims)
+        choices = [
+            tensor_layouts(
+                ndims[name],
+                self.k,
+                name != tree.tns.name and sizes[name] < largest,
+            )
+            for name in names
+        ]
+        loops = sorted({idx for _, idxs in accesses for idx in idxs}, key=lambda idx: idx.name)
+        return [
+            PartitionStrategy(work, tuple(zip(names, layouts, strict=True)))
+            for work in work_splits(loops, self.k)
+            for layouts in product(*choices)
+        ]
+
+    def __call__(self, tree: ein.Einsum, env) -> list[StrategyScore]:
+        """
+        Return the Pareto frontier of total communication against memory per
+        processor of the distributions of `tree`, where `env` maps indices to
+        their size.
+        """
+        if not isinstance(tree, ein.Einsum):
+            raise ValueError(f"Expected an einsum, got {type(tree).__name__}")
+        accesses = self.accesses(tree)
+        strategies = self.strategies(tree, env)
+        chunks = [
+            strategies[n : n + self.chunk_size]
+            for n in range(0, len(strategies), self.chunk_size)
+        ]
+        scores = []
+        with ProcessPoolExecutor(self.workers) as pool:
+            futures = [
+                pool.submit(_score_chunk, accesses, env, self.k, chunk)
+                for chunk in chunks
+            ]
+            for future in futures:
+                scores.extend(future.result())
+        return pareto_frontier(scores)
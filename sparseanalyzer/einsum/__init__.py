@@ -1,17 +1,64 @@
-from .interpreter import EinsumInterpreter
-from .nodes import (
-    Access,
-    Alias,
-    Call,
-    Einsum,
-    EinsumExpr,
-    EinsumNode,
-    Index,
-    Literal,
-    Plan,
-    Produces,
-)
-from .parser import parse_einop, parse_einsum
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .compiler import EinsumCompiler
+    from .interpreter import EinsumInterpreter
+    from .nodes import (
+        Access,
+        Alias,
+        Call,
+        Einsum,
+        EinsumExpr,
+        EinsumNode,
+        Index,
+        Literal,
+        Plan,
+        Produces,
+    )
+    from .memory import PlannedEinsumInterpreter
+    from .outofcore import OutOfCoreEinsumInterpreter
+    from .parallel import ThreadedEinsumInterpreter
+    from .parser import parse_einop, parse_einsum
+    from .scheduler import EinsumScheduler
+    from .sparse_interpreter import SparseEinsumInterpreter
+
+# Attributes are imported from their submodules on first access (PEP 562), so
+# building or visiting trees does not load numpy or build the lark parser.
+_lazy_attrs = {
+    "Access": ".nodes",
+    "Alias": ".nodes",
+    "Call": ".nodes",
+    "Einsum": ".nodes",
+    "EinsumExpr": ".nodes",
+    "EinsumNode": ".nodes",
+    "Index": ".nodes",
+    "Literal": ".nodes",
+    "Plan": ".nodes",
+    "Produces": ".nodes",
+    "EinsumCompiler": ".compiler",
+    "EinsumInterpreter": ".interpreter",
+    "SparseEinsumInterpreter": ".sparse_interpreter",
+    "OutOfCoreEinsumInterpreter": ".outofcore",
+    "PlannedEinsumInterpreter": ".memory",
+    "ThreadedEinsumInterpreter": ".parallel",
+    "EinsumScheduler": ".scheduler",
+    "parse_einop": ".parser",
+    "parse_einsum": ".parser",
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_attrs:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    val = getattr(importlib.import_module(_lazy_attrs[name], __name__), name)
+    globals()[name] = val
+    return val
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attrs})
+
 
 __all__ = [
     "Access",
@@ -23,11 +70,14 @@ __all__ = [
     "EinsumInterpreter",
     "EinsumNode",
     "EinsumScheduler",
-    "EinsumScheduler",
     "Index",
     "Literal",
+    "OutOfCoreEinsumInterpreter",
     "Plan",
+    "PlannedEinsumInterpreter",
     "Produces",
+    "SparseEinsumInterpreter",
+    "ThreadedEinsumInterpreter",
     "parse_einop",
     "parse_einsum",
 ]
@@ -0,0 +1,197 @@
+import keyword
+from dataclasses import dataclass, field
+from functools import lru_cache
+from textwrap import indent
+from typing import Any
+
+import numpy as np
+
+from ..operators import overwrite
+from ..symbolic import Context, PostOrderDFS
+from . import nodes as ein
+from .interpreter import nary_ops, reduction_ops, unary_ops
+from .lowering import lower_contraction
+
+
+class EinsumCompilerContext(Context):
+    """
+    EinsumCompilerContext
+
+    Generates the body of a Python kernel for an einsum program. Statements
+    are collected in the preamble, expressions are returned as source strings,
+    and every object the kernel refers to (ufuncs, constants, lowered
+    contractions) is recorded in `globals` under a fresh name.
+
+    Attributes:
+        xp: The array namespace the kernel executes with.
+        dispatch: Whether to lower recognized contractions to BLAS.
+        globals: Mapping of names in the generated source to objects.
+        tensors: Mapping of tensor names to the local variables holding them.
+        loops: The loop order of the einsum being generated, if any.
+    """
+
+    def __init__(
+        self, xp=None, dispatch=True, namespace=None, preamble=None, epilogue=None
+    ):
+        super().__init__(namespace, preamble, epilogue)
+        if xp is None:
+            xp = np
+        self.xp = xp
+        self.dispatch = dispatch
+        self.globals = {"xp": xp}
+        self.tensors = {}
+        self.loops = None
+        for name in ("xp", "bindings", *keyword.kwlist):
+            self.freshen(name)
+
+    def emit(self):
+        return "\n".join([*self.preamble, *self.epilogue])
+
+    def constant(self, val, tag):
+        """
+        Bind `val` to a fresh global named after `tag` and return the name.
+        """
+        name = self.freshen(tag)
+        self.globals[name] = val
+        return name
+
+    def __call__(self, node):
+        xp = self.xp
+        match node:
+            case ein.Literal(val):
+                return self.constant(val, "c")
+            case ein.Alias(name):
+                if name not in self.tensors:
+                    var = self.freshen(name if name.isidentifier() else "t")
+                    self.exec(f"{var} = bindings[{name!r}]")
+                    self.tensors[name] = var
+                return self.tensors[name]
+            case ein.Call(ein.Literal(func), args):
+                ops = unary_ops if len(args) == 1 else nary_ops
+                func = self.constant(getattr(xp, ops[func]), ops[func])
+                return f"{func}({', '.join(self(arg) for arg in args)})"
+            case ein.Access(tns, idxs):
+                assert len(idxs) == len(set(idxs))
+                assert self.loops is not None
+                perm = [idxs.index(idx) for idx in self.loops if idx in idxs]
+                val = self(tns)
+                if perm != sorted(perm):
+                    val = f"xp.permute_dims({val}, {tuple(perm)})"
+                axes = [i for i in range(len(self.loops)) if self.loops[i] not in idxs]
+                if axes:
+                    val = f"xp.expand_dims({val}, {tuple(axes)})"
+                return val
+            case ein.Plan(bodies):
+                res = "None"
+                for body in bodies:
+                    res = self(body)
+                return res
+            case ein.Produces(args):
+                return f"({''.join(f'{self(arg)}, ' for arg in args)})"
+            case ein.Einsum(ein.Literal(op), ein.Alias(tns), idxs, arg):
+                contraction = lower_contraction(node) if self.dispatch else None
+                if contraction is not None:
+                    func = self.constant(contraction, "contraction")
+                    lhs = self(ein.Alias(contraction.lhs))
+                    rhs = self(ein.Alias(contraction.rhs))
+                    val = f"{func}(xp, {lhs}, {rhs})"
+                else:
+                    loops = arg.get_idxs()
+                    assert set(idxs).issubset(loops)
+                    self.loops = sorted(loops, key=lambda x: x.name)
+                    val = self(arg)
+                    if op != overwrite:
+                        axis = tuple(
+                            i for i, idx in enumerate(self.loops) if idx not in idxs
+                        )
+                        func = self.constant(
+                            getattr(xp, reduction_ops[op]), reduction_ops[op]
+                        )
+                        val = f"{func}({val}, axis={axis})"
+                    else:
+                        assert set(idxs) == set(self.loops)
+                    dropped = [idx for idx in self.loops if idx in idxs]
+                    perm = [dropped.index(idx) for idx in idxs]
+                    if perm != sorted(perm):
+                        val = f"xp.permute_dims({val}, {tuple(perm)})"
+                    self.loops = None
+                var = self.freshen(tns if tns.isidentifier() else "t")
+                self.exec(f"{var} = {val}")
+                self.exec(f"bindings[{tns!r}] = {var}")
+                self.tensors[tns] = var
+                return f"({tns!r},)"
+            case _:
+                raise ValueError(f"Cannot compile einsum node: {node}")
+
+
+@dataclass(frozen=True)
+class EinsumKernel:
+    """
+    EinsumKernel
+
+    A compiled einsum program.
+
+    Attributes:
+        source: The generated Python source.
+        func: The compiled function, taking the bindings to read and update.
+    """
+
+    source: str
+    func: Any = field(repr=False, compare=False)
+
+    def __call__(self, bindings):
+        return self.func(bindings)
+
+
+def compile_kernel(node: ein.EinsumNode, xp=np, dispatch=True) -> EinsumKernel:
+    """
+    Generate, compile and cache a kernel which executes `node` with `xp`.
+    """
+    # Literals such as `1`, `1.0` and `True` compare equal but promote
+    # differently, so kernels are cached by the types of literals too.
+    types = tuple(type(n.val) for n in PostOrderDFS(node) if isinstance(n, ein.Literal))
+    return _compile_kernel(node, types, xp, dispatch)
+
+
+@lru_cache(maxsize=1024)
+def _compile_kernel(node: ein.EinsumNode, types, xp, dispatch) -> EinsumKernel:
+    ctx = EinsumCompilerContext(xp, dispatch)
+    res = ctx(node)
+    name = ctx.freshen("kernel")
+    body = indent("\n".join([ctx.emit(), f"return {res}"]), "    ")
+    source = f"def {name}(bindings):\n{body}\n"
+    scope = dict(ctx.globals)
+    exec(compile(source, f"<einsum {name}>", "exec"), scope)
+    return EinsumKernel(source, scope[name])
+
+
+class EinsumCompiler:
+    """
+    EinsumCompiler
+
+    Executes einsum programs like `EinsumInterpreter`, but first compiles
+    each program into a specialized Python function. Loop orders,
+    permutations, ufunc lookups and contraction lowering are all resolved
+    once at compile time, and kernels are cached by node, so repeated
+    executions of the same tree only pay for the array operations.
+
+    Attributes:
+        xp: The array namespace to execute with, numpy by default.
+        bindings: Mapping of tensor names to arrays.
+        dispatch: Whether to lower recognized contractions to BLAS.
+    """
+
+    def __init__(self, xp=None, bindings=None, dispatch=True):
+        if bindings is None:
+            bindings = {}
+        if xp is None:
+            xp = np
+        self.xp = xp
+        self.bindings = bindings
+        self.dispatch = dispatch
+
+    def compile(self, node: ein.EinsumNode) -> EinsumKernel:
+        return compile_kernel(node, self.xp, self.dispatch)
+
+    def __call__(self, node):
+        return self.compile(node)(self.bindings)
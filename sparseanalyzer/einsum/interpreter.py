@@ -1,9 +1,13 @@
 import operator
+from itertools import product
+from math import prod
 
 import numpy as np
 
 from ..operators import overwrite, promote_max, promote_min
 from . import nodes as ein
+from ..symbolic import PostOrderDFS
+from .lowering import lower_contraction
 
 nary_ops = {
     operator.add: "add",
@@ -66,16 +70,70 @@ reduction_ops = {
     np.logical_or: "any",
 }
 
+# The binary operator which combines partial results of each reduction.
+accumulate_ops = {
+    "sum": "add",
+    "prod": "multiply",
+    "all": "logical_and",
+    "any": "logical_or",
+    "min": "minimum",
+    "max": "maximum",
+}
+
 
 class EinsumInterpreter:
-    def __init__(self, xp=None, bindings=None, loops=None):
+    """
+    EinsumInterpreter
+
+    Executes einsum programs with the array namespace `xp`.
+
+    Binary contractions such as matrix multiplies are dispatched to `matmul`
+    or `tensordot` when `dispatch` is set (see `lowering.py`); every other
+    einsum broadcasts its argument over all of its loops before reducing.
+    When `memory_budget` is set and that broadcast would exceed it, the
+    reduction instead streams over slices of the reduced indices,
+    accumulating each partial result into the output.
+
+    Attributes:
+        xp: The array namespace to execute with, numpy by default.
+        bindings: Mapping of tensor names to arrays.
+        loops: The loop order of the einsum being evaluated, if any.
+        dispatch: Whether to lower recognized contractions to BLAS.
+        memory_budget: The number of bytes a broadcast argument may occupy,
+            or None for no limit.
+        slices: Mapping of loop indices to the slice of them to evaluate.
+    """
+
+    def __init__(
+        self,
+        xp=None,
+        bindings=None,
+        loops=None,
+        dispatch=True,
+        memory_budget=None,
+        slices=None,
+    ):
         if bindings is None:
             bindings = {}
         if xp is None:
             xp = np
+        if slices is None:
+            slices = {}
         self.bindings = bindings
         self.xp = xp
         self.loops = loops
+        self.dispatch = dispatch
+        self.memory_budget = memory_budget
+        self.slices = slices
+
+    def scope(self, loops, slices=None):
+        """
+        Return an interpreter over `loops` (restricted to `slices`) which
+        shares these bindings.
+        """
+        return EinsumInterpreter(
+            self.xp, self.bindings, loops, self.dispatch, self.memory_budget, slices
+        )
 
     def __call__(self, node):
         xp = self.xp
@@ -97,6 +155,8 @@ class EinsumInterpreter:
                 assert self.loops is not None
                 perm = [idxs.index(idx) for idx in self.loops if idx in idxs]
                 tns = self(tns)
+                if self.slices:
+                    tns = tns[tuple(self.slices.get(idx, slice(None)) for idx in idxs)]
                 tns = xp.permute_dims(tns, perm)
                 return xp.expand_dims(
                     tns,
@@ -111,22 +171,105 @@ class EinsumInterpreter:
                 return tuple(self(arg) for arg in args)
             case ein.Einsum(op, ein.Alias(tns), idxs, arg):
                 # This is the main entry point for einsum execution
+                contraction = lower_contraction(node) if self.dispatch else None
+                if contraction is not None:
+                    lhs = self(ein.Alias(contraction.lhs))
+                    rhs = self(ein.Alias(contraction.rhs))
+                    self.bindings[tns] = contraction(xp, lhs, rhs)
+                    return (tns,)
                 loops = arg.get_idxs()
                 assert set(idxs).issubset(loops)
                 loops = sorted(loops, key=lambda x: x.name)
-                ctx = EinsumInterpreter(self.xp, self.bindings, loops)
-                arg = ctx(arg)
-                axis = tuple(i for i in range(len(loops)) if loops[i] not in idxs)
                 op = self(op)
-                if op != overwrite:
-                    op = getattr(xp, reduction_ops[op])
-                    val = op(arg, axis=axis)
-                else:
-                    assert set(idxs) == set(loops)
-                    val = arg
-                dropped = [idx for idx in loops if idx in idxs]
-                axis = [dropped.index(idx) for idx in idxs]
-                self.bindings[tns] = xp.permute_dims(val, axis)
+                self.bindings[tns] = self.evaluate(op, idxs, arg, loops)
                 return (tns,)
             case _:
                 raise ValueError(f"Unknown einsum type: {type(node)}")
+
+    def evaluate(self, op, idxs, arg, loops, slices=None):
+        """
+        Return the value of the einsum `op`, `idxs`, `arg` over `loops`
+        (restricted to `slices`), in the order of `idxs`.
+        """
+        if op != overwrite and self.memory_budget is not None:
+            return self.stream(op, idxs, arg, loops, slices)
+        return self.reduce(op, idxs, arg, loops, slices)
+
+    def loop_dims(self, arg, slices=None):
+        """
+        Return the extent of each loop index of `arg`, restricted to `slices`.
+        """
+        dims = {}
+        for node in PostOrderDFS(arg):
+            if isinstance(node, ein.Access):
+                tns = self(node.tns)
+                dims.update(zip(node.idxs, tns.shape, strict=True))
+        for idx, slc in (slices or {}).items():
+            dims[idx] = len(range(dims[idx])[slc])
+        return dims
+
+    def reduce(self, op, idxs, arg, loops, slices=None):
+        """
+        Evaluate `arg` over `loops` (restricted to `slices`), reduce it with
+        `op` onto `idxs` and return the result in the order of `idxs`.
+        """
+        xp = self.xp
+        ctx = self.scope(loops, slices)
+        arg = ctx(arg)
+        axis = tuple(i for i in range(len(loops)) if loops[i] not in idxs)
+        if op != overwrite:
+            val = self.reduction(reduction_ops[op], arg, axis)
+        else:
+            assert set(idxs) == set(loops)
+            val = arg
+        dropped = [idx for idx in loops if idx in idxs]
+        axis = [dropped.index(idx) for idx in idxs]
+        return xp.permute_dims(val, axis)
+
+    def reduction(self, name, arg, axis):
+        """
+        Apply the reduction `name` (e.g. "sum") to `axis` of the array `arg`.
+        """
+        return getattr(self.xp, name)(arg, axis=axis)
+
+    def stream(self, op, idxs, arg, loops, slices=None):
+        """
+        Reduce `arg` onto `idxs` in blocks of the reduced indices small enough
+        that each broadcast block fits in `memory_budget` bytes.
+        """
+        xp = self.xp
+        if slices is None:
+            slices = {}
+        dims = self.loop_dims(arg, slices)
+        tnss = [
+            self(node.tns) for node in PostOrderDFS(arg) if isinstance(node, ein.Access)
+        ]
+        itemsize = xp.result_type(*tnss).itemsize if tnss else 8
+        volume = prod(dims[idx] for idx in loops) * itemsize
+        reduced = sorted(
+            (idx for idx in loops if idx not in idxs), key=lambda idx: -dims[idx]
+        )
+        blocks = {}
+        for idx in reduced:
+            if volume <= self.memory_budget:
+                break
+            block = max(1, dims[idx] * self.memory_budget // volume)
+            volume = volume // dims[idx] * block
+            blocks[idx] = block
+        if not blocks:
+            return self.reduce(op, idxs, arg, loops, slices)
+        acc = getattr(xp, accumulate_ops[reduction_ops[op]])
+        val = None
+        for starts in product(*(range(0, dims[idx], n) for idx, n in blocks.items())):
+            block_slices = {
+                idx: slice(start, start + n)
+                for (idx, n), start in zip(blocks.items(), starts, strict=True)
+            }
+            part = self.reduce(op, idxs, arg, loops, {**slices, **block_slices})
+            if val is None:
+                val = part
+            elif isinstance(val, np.ndarray):
+                acc(val, part, out=val)
+            else:
+                val = acc(val, part)
+        return val
@@ -0,0 +1,151 @@
+import operator
+from dataclasses import dataclass
+from functools import lru_cache
+from math import prod
+
+import numpy as np
+
+from ..operators import overwrite
+from . import nodes as ein
+
+
+@dataclass(frozen=True)
+class Contraction:
+    """
+    Contraction
+
+    A binary einsum `out[idxs] += lhs[...] * rhs[...]` which can be executed
+    with `matmul` or `tensordot` instead of broadcasting over every loop.
+
+    Attributes:
+        kind: One of "matmul", "batched_matmul", "matvec", "outer" or
+            "tensordot".
+        lhs: The name of the left tensor.
+        rhs: The name of the right tensor.
+        lhs_idxs: The indices of the left access.
+        rhs_idxs: The indices of the right access.
+        batch: Indices shared by both operands and the output.
+        contracted: Indices shared by both operands and summed away.
+        lhs_free: Indices of the output only found in the left operand.
+        rhs_free: Indices of the output only found in the right operand.
+        idxs: The indices of the output.
+    """
+
+    kind: str
+    lhs: str
+    rhs: str
+    lhs_idxs: tuple[ein.Index, ...]
+    rhs_idxs: tuple[ein.Index, ...]
+    batch: tuple[ein.Index, ...]
+    contracted: tuple[ein.Index, ...]
+    lhs_free: tuple[ein.Index, ...]
+    rhs_free: tuple[ein.Index, ...]
+    idxs: tuple[ein.Index, ...]
+
+    def __call__(self, xp, lhs, rhs):
+        """
+        Contract `lhs` and `rhs`, returning the result in output order.
+        """
+        # `matmul` and `tensordot` accumulate in the operand dtype, while the
+        # broadcast path sums products with `sum`, which promotes booleans and
+        # small integers. Cast to the dtype `sum` would return.
+        dtype = np.sum(np.zeros(0, dtype=np.result_type(lhs.dtype, rhs.dtype))).dtype
+        if lhs.dtype != dtype:
+            lhs = lhs.astype(dtype)
+        if rhs.dtype != dtype:
+            rhs = rhs.astype(dtype)
+        lhs = self.presum(xp, lhs, self.lhs_idxs, self.lhs_free)
+        rhs = self.presum(xp, rhs, self.rhs_idxs, self.rhs_free)
+        lhs_idxs = [idx for idx in self.lhs_idxs if idx in self.kept(self.lhs_free)]
+        rhs_idxs = [idx for idx in self.rhs_idxs if idx in self.kept(self.rhs_free)]
+        if not self.batch:
+            axes = (
+                [lhs_idxs.index(idx) for idx in self.contracted],
+                [rhs_idxs.index(idx) for idx in self.contracted],
+            )
+            res = xp.tensordot(lhs, rhs, axes=axes)
+            res_idxs = [
+                *(idx for idx in lhs_idxs if idx not in self.contracted),
+                *(idx for idx in rhs_idxs if idx not in self.contracted),
+            ]
+        else:
+            lhs_order = [*self.batch, *self.lhs_free, *self.contracted]
+            rhs_order = [*self.batch, *self.contracted, *self.rhs_free]
+            lhs = xp.permute_dims(lhs, [lhs_idxs.index(idx) for idx in lhs_order])
+            rhs = xp.permute_dims(rhs, [rhs_idxs.index(idx) for idx in rhs_order])
+            batch_shape = lhs.shape[: len(self.batch)]
+            lhs_shape = lhs.shape[len(self.batch) : len(self.batch) + len(self.lhs_free)]
+            rhs_shape = rhs.shape[len(self.batch) + len(self.contracted) :]
+            k = prod(lhs.shape[len(self.batch) + len(self.lhs_free) :])
+            lhs = xp.reshape(lhs, (prod(batch_shape), prod(lhs_shape), k))
+            rhs = xp.reshape(rhs, (prod(batch_shape), k, prod(rhs_shape)))
+            res = xp.reshape(
+                xp.matmul(lhs, rhs), (*batch_shape, *lhs_shape, *rhs_shape)
+            )
+            res_idxs = [*self.batch, *self.lhs_free, *self.rhs_free]
+        return xp.permute_dims(res, [res_idxs.index(idx) for idx in self.idxs])
+
+    def kept(self, free):
+        return {*self.batch, *self.contracted, *free}
+
+    def presum(self, xp, tns, idxs, free):
+        # Indices found in only one operand and not in the output are summed
+        # before contracting.
+        kept = self.kept(free)
+        axis = tuple(n for n, idx in enumerate(idxs) if idx not in kept)
+        if axis:
+            tns = xp.sum(tns, axis=axis)
+        return tns
+
+
+@lru_cache(maxsize=1024)
+def lower_contraction(node: ein.Einsum) -> Contraction | None:
+    """
+    Recognize `node` as a binary contraction, returning None if it is not one.
+    """
+    match node:
+        case ein.Einsum(
+            ein.Literal(op),
+            ein.Alias(_),
+            idxs,
+            ein.Call(
+                ein.Literal(operator.mul),
+                (
+                    ein.Access(ein.Alias(lhs), lhs_idxs),
+                    ein.Access(ein.Alias(rhs), rhs_idxs),
+                ),
+            ),
+        ) if op in (operator.add, overwrite):
+            pass
+        case _:
+            return None
+    for acc_idxs in (idxs, lhs_idxs, rhs_idxs):
+        if len(set(acc_idxs)) != len(acc_idxs):
+            return None
+        if not all(isinstance(idx, ein.Index) for idx in acc_idxs):
+            return None
+    out = set(idxs)
+    batch = tuple(idx for idx in lhs_idxs if idx in rhs_idxs and idx in out)
+    contracted = tuple(idx for idx in lhs_idxs if idx in rhs_idxs and idx not in out)
+    lhs_free = tuple(idx for idx in lhs_idxs if idx not in rhs_idxs and idx in out)
+    rhs_free = tuple(idx for idx in rhs_idxs if idx not in lhs_idxs and idx in out)
+    if not out.issubset({*lhs_idxs, *rhs_idxs}):
+        return None
+    if op == overwrite and not out.issuperset({*lhs_idxs, *rhs_idxs}):
+        return None
+    if not contracted and not (lhs_free and rhs_free):
+        # Elementwise products are already optimal when broadcast.
+        return None
+    if batch:
+        kind = "batched_matmul"
+    elif not contracted:
+        kind = "outer"
+    elif bool(lhs_free) != bool(rhs_free):
+        kind = "matvec"
+    elif len(lhs_free) == len(rhs_free) == len(contracted) == 1:
+        kind = "matmul"
+    else:
+        kind = "tensordot"
+    return Contraction(
+        kind, lhs, rhs, lhs_idxs, rhs_idxs, batch, contracted, lhs_free, rhs_free, idxs
+    )
@@ -0,0 +1,256 @@
+from dataclasses import dataclass
+from math import prod
+
+import numpy as np
+
+from ..operators import overwrite
+from ..symbolic import ControlFlowGraph, PostOrderDFS, liveness
+from . import nodes as ein
+from .interpreter import EinsumInterpreter
+from .lowering import lower_contraction
+from .scheduler import get_dims
+
+
+def uses(stmt: ein.EinsumNode) -> set[str]:
+    """
+    Return the names of the tensors read by `stmt`.
+    """
+    match stmt:
+        case ein.Einsum(_, _, _, arg):
+            node = arg
+        case _:
+            node = stmt
+    return {alias.name for alias in PostOrderDFS(node) if isinstance(alias, ein.Alias)}
+
+
+def defs(stmt: ein.EinsumNode) -> set[str]:
+    """
+    Return the names of the tensors written by `stmt`.
+    """
+    match stmt:
+        case ein.Einsum(_, ein.Alias(name), _, _):
+            return {name}
+        case _:
+            return set()
+
+
+@dataclass(frozen=True)
+class MemoryPlan:
+    """
+    MemoryPlan
+
+    When to release the temporaries of a `Plan`, and which released buffers
+    each body writes into.
+
+    Attributes:
+        frees: For each body, the temporaries whose last reader it is.
+        reuses: For each body, the temporary whose buffer it reduces into,
+            or None to allocate a new one.
+    """
+
+    frees: tuple[tuple[str, ...], ...]
+    reuses: tuple[str | None, ...]
+
+
+@dataclass(frozen=True)
+class MemoryUsage:
+    """
+    MemoryUsage
+
+    The resident bytes of the temporaries of an executed `Plan`.
+
+    Attributes:
+        peak_bytes: The peak with the memory plan applied.
+        unplanned_bytes: The peak if every temporary stayed alive until the
+            plan finished.
+    """
+
+    peak_bytes: int
+    unplanned_bytes: int
+
+
+class MemoryPlanner:
+    """
+    MemoryPlanner
+
+    Plans the lifetime of the temporaries of a `Plan` with a liveness
+    analysis over its `ControlFlowGraph`. A temporary is released after its
+    last reader, and the buffer of a released reduction is handed to the
+    next reduction with the same number of elements, which writes into it
+    with `out=`.
+
+    Only outputs of reductions are reused: overwrites may be views of their
+    arguments, and dispatched contractions allocate their own results.
+
+    Attributes:
+        env: Mapping of indices to their size, used to match buffers.
+        dispatch: Whether the executing interpreter dispatches contractions.
+        keep: Names of temporaries which must survive the plan.
+    """
+
+    def __init__(self, env, dispatch=True, keep=()):
+        self.env = env
+        self.dispatch = dispatch
+        self.keep = set(keep)
+
+    def cfg(self, bodies, keep) -> ControlFlowGraph:
+        """
+        Return the control flow graph of `bodies`, whose exit reads `keep`.
+        """
+        cfg = ControlFlowGraph()
+        block = cfg.new_block()
+        for body in bodies:
+            block.add_statement(body)
+        cfg.exit_block.add_statement(ein.Produces(tuple(map(ein.Alias, keep))))
+        cfg.entry_block.add_successor(block)
+        block.add_successor(cfg.exit_block)
+        return cfg
+
+    def reduces(self, body) -> bool:
+        # Whether `body` produces a fresh buffer through `reduction`.
+        match body:
+            case ein.Einsum(ein.Literal(op), ein.Alias(_), _, _):
+                if op == overwrite:
+                    return False
+                return not self.dispatch or lower_contraction(body) is None
+        return False
+
+    def size(self, body) -> int | None:
+        if not all(idx in self.env for idx in body.idxs):
+            return None
+        return prod(self.env[idx] for idx in body.idxs)
+
+    def __call__(self, plan: ein.Plan) -> MemoryPlan:
+        bodies = plan.bodies
+        keep = set(self.keep)
+        if bodies and isinstance(bodies[-1], ein.Einsum):
+            keep |= defs(bodies[-1])
+        cfg = self.cfg(bodies, sorted(keep))
+        _, live_out = liveness(cfg, uses, defs)
+        (block,) = cfg.entry_block.successors
+
+        # Walk the block backwards for the variables live after each body.
+        live = set(live_out[block.id])
+        live_after = []
+        for body in reversed(bodies):
+            live_after.append(set(live))
+            live -= defs(body)
+            live |= uses(body)
+        live_after.reverse()
+
+        # The outputs of reductions may donate their buffer once released,
+        # unless an overwrite (which could alias them) reads them.
+        donors = set()
+        defined = {}
+        frees = []
+        released = []
+        for n, body in enumerate(bodies):
+            for name in uses(body) & set(defined):
+                if isinstance(body, ein.Einsum) and body.op.val == overwrite:
+                    donors.discard(defined[name])
+            for name in defs(body):
+                defined[name] = n
+                if self.reduces(body):
+                    donors.add(n)
+            dead = sorted(name for name in defined if name not in live_after[n])
+            frees.append(tuple(dead))
+            released.append([(defined.pop(name), name) for name in dead])
+
+        # Hand each released buffer to the first later reduction of its size.
+        reuses = [None] * len(bodies)
+        pool = []
+        for n, body in enumerate(bodies):
+            size = self.size(body) if self.reduces(body) else None
+            for donor in pool:
+                if size is not None and self.size(bodies[donor[0]]) == size:
+                    reuses[n] = donor[1]
+                    pool.remove(donor)
+                    break
+            pool.extend(donor for donor in released[n] if donor[0] in donors)
+        return MemoryPlan(tuple(frees), tuple(reuses))
+
+
+class PlannedEinsumInterpreter(EinsumInterpreter):
+    """
+    PlannedEinsumInterpreter
+
+    Executes each `Plan` under a `MemoryPlanner`, releasing temporaries from
+    `bindings` after their last reader and reducing into the buffers of
+    released temporaries where the size and dtype match.
+
+    Attributes:
+        keep: Names of temporaries which must survive each plan.
+        usage: The `MemoryUsage` of the last plan executed.
+    """
+
+    def __init__(
+        self,
+        bindings=None,
+        keep=(),
+        xp=None,
+        loops=None,
+        dispatch=True,
+        memory_budget=None,
+        slices=None,
+    ):
+        super().__init__(xp, bindings, loops, dispatch, memory_budget, slices)
+        self.keep = keep
+        self.usage = None
+        self.out = None
+
+    def scope(self, loops, slices=None):
+        return EinsumInterpreter(
+            self.xp, self.bindings, loops, self.dispatch, self.memory_budget, slices
+        )
+
+    def __call__(self, node):
+        if not isinstance(node, ein.Plan):
+            return super().__call__(node)
+        env = get_dims(node, self.bindings)
+        plan = MemoryPlanner(env, self.dispatch, self.keep)(node)
+        held = {}
+        live = {}
+        peak = unplanned = 0
+        res = None
+        for n, body in enumerate(node.bodies):
+            name = plan.reuses[n]
+            self.out = held.pop(name, None) if name is not None else None
+            res = self(body)
+            self.out = None
+            for name in defs(body):
+                live[name] = nbytes(self.bindings[name])
+                unplanned += live[name]
+            resident = sum(live.values()) + sum(map(nbytes, held.values()))
+            peak = max(peak, resident)
+            for name in plan.frees[n]:
+                buf = base(self.bindings.pop(name))
+                del live[name]
+                if buf is not None and name in plan.reuses:
+                    held[name] = buf
+        self.usage = MemoryUsage(peak, unplanned)
+        return res
+
+    def reduction(self, name, arg, axis):
+        out, self.out = self.out, None
+        if out is not None and isinstance(arg, np.ndarray):
+            shape = tuple(n for i, n in enumerate(arg.shape) if i not in axis)
+            dtype = getattr(self.xp, name)(self.xp.ones(1, dtype=arg.dtype)).dtype
+            if out.size == prod(shape) and out.dtype == dtype:
+                return getattr(self.xp, name)(arg, axis=axis, out=out.reshape(shape))
+        return super().reduction(name, arg, axis)
+
+
+def nbytes(tns) -> int:
+    return getattr(tns, "nbytes", 0)
+
+
+def base(tns):
+    # The contiguous buffer which `tns` views in full, if there is one.
+    if not isinstance(tns, np.ndarray):
+        return None
+    buf = tns if tns.base is None else tns.base
+    if not isinstance(buf, np.ndarray) or buf.size != tns.size:
+        return None
+    if not buf.flags.c_contiguous:
+        return None
+    return buf
@@ -0,0 +1,222 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from math import prod
+
+import numpy as np
+
+from ..symbolic import Namespace, PostWalk
+from . import nodes as ein
+from .interpreter import EinsumInterpreter, accumulate_ops, reduction_ops
+
+
+class OutOfCoreEinsumInterpreter(EinsumInterpreter):
+    """
+    OutOfCoreEinsumInterpreter
+
+    Executes einsums whose operands live on disk. Bindings may be
+    `np.memmap`s or paths to `.npy` files, which are opened memory-mapped.
+
+    Each einsum is streamed over one of its indices, the one which appears
+    in the most operand bytes (preferring output indices). Blocks of the
+    operands along that index are read into memory on a background thread
+    while the previous block is computed, so at most two blocks are resident
+    at a time. Operands without the streamed index are read once. Each block
+    is evaluated in memory and written into a memory-mapped `.npy` output,
+    or accumulated if the streamed index is reduced.
+
+    Outputs are written to `{name}.npy` in `out_dir`, through a fresh file
+    which replaces it once complete, or by default to files in a temporary
+    directory owned by the interpreter, which is removed by `close` (or on
+    leaving a `with` block, or when the interpreter is collected). Copy any
+    outputs to keep before then.
+
+    Attributes:
+        out_dir: The directory to write outputs to, or None for a temporary
+            directory.
+        block_size: The number of entries of the streamed index per block,
+            or None to fit two blocks in `memory_budget`.
+    """
+
+    def __init__(
+        self,
+        bindings=None,
+        out_dir=None,
+        block_size=None,
+        xp=None,
+        loops=None,
+        dispatch=True,
+        memory_budget=1 << 27,
+        slices=None,
+    ):
+        super().__init__(xp, bindings, loops, dispatch, memory_budget, slices)
+        self.out_dir = out_dir
+        self.block_size = block_size
+        self.tmp_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Remove the temporary directory of outputs, if one was made.
+        """
+        if self.tmp_dir is not None:
+            self.tmp_dir.cleanup()
+            self.tmp_dir = None
+
+    def __call__(self, node):
+        match node:
+            case ein.Alias(name):
+                tns = self.bindings[name]
+                if isinstance(tns, (str, os.PathLike)):
+                    tns = np.load(tns, mmap_mode="r")
+                    self.bindings[name] = tns
+                return tns
+            case ein.Einsum(op, ein.Alias(tns), idxs, arg):
+                self.bindings[tns] = self.run(op.val, tns, idxs, arg)
+                return (tns,)
+            case _:
+                return super().__call__(node)
+
+    def path(self, name):
+        """
+        Return a fresh file to write the output `name` to.
+        """
+        if self.out_dir is not None:
+            directory = self.out_dir
+        else:
+            if self.tmp_dir is None:
+                self.tmp_dir = tempfile.TemporaryDirectory(
+                    prefix="einsum_", ignore_cleanup_errors=True
+                )
+            directory = self.tmp_dir.name
+        # A fresh file each time, as the previous value may still be read.
+        fd, path = tempfile.mkstemp(prefix=f"{name}_", suffix=".npy", dir=directory)
+        os.close(fd)
+        return path
+
+    def finish(self, name, out):
+        """
+        Flush the completed output `name`, and move it over `{name}.npy` in
+        `out_dir` if there is one.
+        """
+        out.flush()
+        if self.out_dir is None:
+            return out
+        path = os.path.join(self.out_dir, f"{name}.npy")
+        os.replace(out.filename, path)
+        return np.load(path, mmap_mode="r+")
+
+    def stream_index(self, idxs, accesses, dims):
+        """
+        Return the index to stream over, or None if there are no loops.
+        """
+        loops = sorted({idx for _, acc in accesses for idx in acc.idxs}, key=str)
+        if not loops:
+            return None
+
+        def score(idx):
+            streamed = sum(tns.nbytes for tns, acc in accesses if idx in acc.idxs)
+            return (streamed, idx in idxs, dims[idx])
+
+        return max(loops, key=score)
+
+    def run(self, op, tns, idxs, arg):
+        # Give each access a name of its own, so that it is blocked separately.
+        spc = Namespace()
+        accesses = {}
+
+        def rename(node):
+            if isinstance(node, ein.Access):
+                name = spc.freshen(node.tns.name)
+                accesses[name] = (self(node.tns), node)
+                return ein.Access(ein.Alias(name), node.idxs)
+            return None
+
+        arg = PostWalk(rename)(arg)
+        local = ein.Einsum(ein.Literal(op), ein.Alias(tns), idxs, arg)
+        dims = {}
+        for val, acc in accesses.values():
+            dims.update(zip(acc.idxs, val.shape, strict=True))
+        idx = self.stream_index(idxs, list(accesses.values()), dims)
+        invariant = {
+            name: np.asarray(val)
+            for name, (val, acc) in accesses.items()
+            if idx is None or idx not in acc.idxs
+        }
+        if idx is None:
+            return self.write(tns, np.asarray(self.evaluate_block(local, invariant)))
+        if dims[idx] == 0:
+            # There are no blocks to stream, so evaluate the empty operands.
+            empty = {name: np.asarray(val) for name, (val, _) in accesses.items()}
+            return self.write(tns, np.asarray(self.evaluate_block(local, empty)))
+
+        shape = tuple(dims[i] for i in idxs)
+        if self.block_size is not None:
+            block = self.block_size
+        else:
+            itemsize = max(val.itemsize for val, _ in accesses.values())
+            row = sum(
+                val.nbytes // dims[idx]
+                for val, acc in accesses.values()
+                if idx in acc.idxs
+            )
+            if idx in idxs:
+                row += prod(shape) // dims[idx] * itemsize
+            free = self.memory_budget - sum(val.nbytes for val in invariant.values())
+            block = max(1, free // (2 * row))
+
+        def load(start):
+            slc = slice(start, start + block)
+            blocks = dict(invariant)
+            for name, (val, acc) in accesses.items():
+                if idx in acc.idxs:
+                    region = tuple(slc if i == idx else slice(None) for i in acc.idxs)
+                    blocks[name] = np.array(val[region])
+            return blocks
+
+        starts = range(0, dims[idx], block)
+        out = None
+        with ThreadPoolExecutor(1) as pool:
+            future = pool.submit(load, starts[0])
+            for n, start in enumerate(starts):
+                blocks = future.result()
+                if n + 1 < len(starts):
+                    future = pool.submit(load, starts[n + 1])
+                val = self.evaluate_block(local, blocks)
+                if idx not in idxs:
+                    acc = getattr(np, accumulate_ops[reduction_ops[op]])
+                    out = val if out is None else acc(out, val)
+                    continue
+                if out is None:
+                    out = np.lib.format.open_memmap(
+                        self.path(tns), mode="w+", dtype=val.dtype, shape=shape
+                    )
+                region = tuple(
+                    slice(start, start + block) if i == idx else slice(None)
+                    for i in idxs
+                )
+                out[region] = val
+        if idx not in idxs:
+            return self.write(tns, np.asarray(out))
+        return self.finish(tns, out)
+
+    def evaluate_block(self, node, bindings):
+        """
+        Evaluate the einsum `node` over in-memory `bindings`.
+        """
+        budget = self.memory_budget
+        ctx = EinsumInterpreter(self.xp, bindings, None, self.dispatch, budget)
+        ctx(node)
+        return bindings[node.tns.name]
+
+    def write(self, name, val):
+        out = np.lib.format.open_memmap(
+            self.path(name), mode="w+", dtype=val.dtype, shape=val.shape
+        )
+        out[...] = val
+        return self.finish(name, out)
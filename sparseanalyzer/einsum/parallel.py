@@ -0,0 +1,89 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+from .interpreter import EinsumInterpreter
+
+
+class ThreadedEinsumInterpreter(EinsumInterpreter):
+    """
+    ThreadedEinsumInterpreter
+
+    Executes each einsum on a pool of threads. The output index space is
+    split into tiles, and each worker evaluates the pointwise expression and
+    reduction of its tile and writes the result into a disjoint slice of a
+    preallocated output. NumPy releases the GIL inside ufuncs and
+    reductions, so the tiles run in parallel.
+
+    Recognized contractions are still dispatched to BLAS, which has its own
+    threading, and full reductions (einsums without output indices) run on
+    the calling thread.
+
+    Attributes:
+        num_workers: The number of threads, `os.cpu_count()` by default.
+        tile_shape: The extent of each tile, either as a tuple aligned with
+            the output indices of each einsum or as a mapping from indices to
+            extents. Indices left out (or None) are not split. By default the
+            first output index is split into `4 * num_workers` tiles.
+    """
+
+    def __init__(
+        self,
+        bindings=None,
+        num_workers=None,
+        tile_shape=None,
+        xp=None,
+        loops=None,
+        dispatch=True,
+        memory_budget=None,
+        slices=None,
+    ):
+        super().__init__(xp, bindings, loops, dispatch, memory_budget, slices)
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        self.num_workers = num_workers
+        self.tile_shape = tile_shape
+
+    def tiles(self, idxs, dims):
+        """
+        Return the tiles of the output space of `idxs` as slice mappings.
+        """
+        if isinstance(self.tile_shape, dict):
+            shape = [self.tile_shape.get(idx) for idx in idxs]
+        elif self.tile_shape is not None:
+            shape = list(self.tile_shape)
+        else:
+            shape = [None] * len(idxs)
+            if idxs:
+                shape[0] = max(-(-dims[idxs[0]] // (4 * self.num_workers)), 1)
+        ranges = []
+        for idx, n in zip(idxs, shape, strict=True):
+            if n is None:
+                ranges.append([slice(None)])
+            else:
+                ranges.append(
+                    [slice(start, start + n) for start in range(0, dims[idx], n)]
+                )
+        return [dict(zip(idxs, tile, strict=True)) for tile in product(*ranges)]
+
+    def evaluate(self, op, idxs, arg, loops, slices=None):
+        if slices or not idxs or self.num_workers <= 1:
+            return super().evaluate(op, idxs, arg, loops, slices)
+        dims = self.loop_dims(arg)
+        tiles = self.tiles(idxs, dims)
+        if len(tiles) <= 1:
+            return super().evaluate(op, idxs, arg, loops, slices)
+
+        def run(tile):
+            return EinsumInterpreter.evaluate(self, op, idxs, arg, loops, tile)
+
+        first = run(tiles[0])
+        out = self.xp.empty(tuple(dims[idx] for idx in idxs), dtype=first.dtype)
+
+        def write(tile, val):
+            out[tuple(tile[idx] for idx in idxs)] = val
+
+        write(tiles[0], first)
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            list(pool.map(lambda tile: write(tile, run(tile)), tiles[1:]))
+        return out
@@ -1,4 +1,7 @@
 import operator
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from typing import Any
 
 import numpy as np
@@ -134,14 +137,17 @@ reduction_ops = {
 }
 
 
-lark_parser = Lark("""
+einop_grammar = """
     %import common.CNAME
-    %import common.SIGNED_INT
-    %import common.SIGNED_FLOAT
+    %import common.INT
+    %import common.FLOAT
     %ignore " "           // Disregard spaces in text
 
     start: increment | assign
-    increment: access (OP | FUNC_NAME) "=" expr
+    // Any operator or function name may precede "=", as in `+=` or `min=`.
+    increment: access (PLUS | MINUS | MUL | OR | AND | PIPE | AMPERSAND | CARET
+                       | LSHIFT | RSHIFT | FLOORDIV | DIV | MOD | POW | GT | LT
+                       | GE | LE | EQ | NE | NAME) "=" expr
     assign: access "=" expr
 
     // Python operator precedence (lowest to highest)
@@ -183,23 +189,115 @@ lark_parser = Lark("""
     POW: "**"
     TILDE: "~"
 
-    OP: "+" | "-" | "*" | "or" | "and" | "|" | "&" | "^" | "<<" | ">>"
-          | "//" | "/" | "%" | "**" | ">" | "<" | ">=" | "<=" | "==" | "!="
-
-    access: TNS "[" (IDX ",")* IDX? "]"
-    call_func: (FUNC_NAME "(" (expr ",")* expr?  ")")
+    // Tensors, indices and functions share one terminal; the token after the
+    // name ("[" or "(") decides which rule applies.
+    access: NAME "[" (NAME ",")* NAME? "]"
+    call_func: (NAME "(" (expr ",")* expr?  ")")
     literal: bool_literal | complex_literal | float_literal | int_literal
-    bool_literal: BOOL
-    int_literal: SIGNED_INT
-    float_literal: SIGNED_FLOAT
+    bool_literal: TRUE | FALSE
+    int_literal: INT
+    float_literal: FLOAT
     complex_literal: COMPLEX
 
-    BOOL: "True" | "False"
-    COMPLEX: (SIGNED_FLOAT | SIGNED_INT) ("j" | "J")
-    IDX: CNAME
-    TNS: CNAME
-    FUNC_NAME: CNAME
-""")
+    // Literals are unsigned, a leading sign parses as a unary operator.
+    TRUE: "True"
+    FALSE: "False"
+    COMPLEX: (FLOAT | INT) ("j" | "J")
+    NAME: CNAME
+"""
+
+# LALR(1) tables are cached on disk (in the temp directory, keyed on the
+# grammar and the lark version) so later processes load them instead of
+# rebuilding.
+lark_parser = Lark(einop_grammar, parser="lalr", cache=True)
+
+
+class ParseCache:
+    """
+    ParseCache
+
+    A bounded, thread-safe LRU cache from source keys to parsed einsum nodes.
+    The `ein.*` nodes are frozen dataclasses, so cached results are shared
+    between callers rather than copied.
+
+    Attributes:
+        maxsize: The maximum number of entries to keep, or None for no bound.
+        hits: The number of lookups answered from the cache.
+        misses: The number of lookups that had to parse.
+    """
+
+    def __init__(self, maxsize: int | None = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, thunk: Callable[[], Any]) -> Any:
+        """
+        Return the entry for `key`, calling `thunk()` to compute it on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        val = thunk()
+        with self._lock:
+            self._entries[key] = val
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return val
+
+    def resize(self, maxsize: int | None):
+        """
+        Change the bound on the cache, evicting the least recently used entries.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            if maxsize is not None:
+                while len(self._entries) > maxsize:
+                    self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every entry and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict[str, int | None]:
+        """
+        Return the hit/miss statistics and the current and maximum size.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+einop_cache = ParseCache()
+einsum_cache = ParseCache()
+
+
+def _normalize_source(expr: str) -> str:
+    # The grammar ignores spaces, so runs of them never change the parse.
+    return " ".join(tok for tok in expr.split(" ") if tok)
 
 
 def _parse_einop_expr(t: Tree) -> ein.EinsumExpr:
@@ -282,6 +380,17 @@ def _parse_einop_expr(t: Tree) -> ein.EinsumExpr:
 
 
 def parse_einop(expr: str) -> ein.EinsumNode:
+    """
+    Parse an einsum statement such as `C[i, j] += A[i, k] * B[k, j]`.
+
+    Results are memoized in `einop_cache`, keyed on the source with runs of
+    spaces collapsed.
+    """
+    expr = _normalize_source(expr)
+    return einop_cache.get(expr, lambda: _parse_einop(expr))
+
+
+def _parse_einop(expr: str) -> ein.EinsumNode:
     tree = lark_parser.parse(expr)
     match tree:
         case Tree(
@@ -314,14 +423,51 @@ def parse_einop(expr: str) -> ein.EinsumNode:
             )
 
 
+def _ndim(tns) -> int:
+    if hasattr(tns, "ndim"):
+        return tns.ndim
+    return 0
+
+
 def parse_einsum(*args_) -> tuple[ein.EinsumNode, dict[str, Any]]:
+    """
+    Parse numpy-style einsum arguments into an `ein.Einsum` and its bindings.
+
+    Results are memoized in `einsum_cache`, keyed on the subscripts and the
+    number of dimensions of each operand, so the operands are never hashed.
+    """
     args = list(args_)
     if len(args) < 2:
         raise ValueError("Expected at least a subscript string and one operand.")
-    bc = "none"
     if isinstance(args[0], str):
-        subscripts = args[0]
+        subscripts: Any = args[0]
         operands = args[1:]
+        output = None
+    else:
+        # Alternative syntax: einsum(operand0, subscript0, operand1, subscript1, ...)
+        # Check if the last element is the output subscript
+        if len(args) % 2 == 1:
+            operands = args[0:-2:2]
+            output = tuple(args[-1])
+        else:
+            operands = args[0::2]
+            output = None
+        subscripts = tuple(tuple(sub) for sub in args[1::2])
+    ndims = tuple(_ndim(tns) for tns in operands)
+    node, names = einsum_cache.get(
+        (subscripts, output, ndims),
+        lambda: _parse_einsum(subscripts, output, ndims),
+    )
+    return node, {names[i]: operands[i] for i in range(len(operands))}
+
+
+def _parse_einsum(
+    subscripts: str | tuple[tuple, ...],
+    output: tuple | None,
+    ndims: tuple[int, ...],
+) -> tuple[ein.Einsum, tuple[str, ...]]:
+    bc = "none"
+    if isinstance(subscripts, str):
         if subscripts.count("->") > 1:
             raise ValueError("Subscripts can only contain one '->' symbol.")
         if subscripts.count("->") == 1:
@@ -351,16 +497,10 @@ def parse_einsum(*args_) -> tuple[ein.EinsumNode, dict[str, Any]]:
         input_idxs = [list(sub) for sub in input_subs]
         output_idxs = None if output_sub is None else list(output_sub)
     else:
-        # Alternative syntax: einsum(operand0, subscript0, operand1, subscript1, ...)
-        # Check if the last element is the output subscript
-        if len(args) % 2 == 1:
-            operands = args[0:-2:2]
-            input_idxs = args[1::2]
-            output_idxs = list(args[-1])
-            output_idxs = [f"j_{j}" for j in output_idxs]
+        input_idxs = list(subscripts)
+        if output is not None:
+            output_idxs = [f"j_{j}" for j in output]
         else:
-            operands = args[0::2]
-            input_idxs = args[1::2]
             output_idxs = None
         input_idxs = [[f"j_{j}" for j in idx] for idx in input_idxs]
         if any(Ellipsis in idx for idx in input_idxs):
@@ -390,20 +530,15 @@ def parse_einsum(*args_) -> tuple[ein.EinsumNode, dict[str, Any]]:
                 output_idx_set.add(idx)
         output_idxs = sorted(output_idx_set)
 
-    def ndim(tns):
-        if hasattr(tns, "ndim"):
-            return tns.ndim
-        return 0
-
     if bc == "prefix":
         max_ell_len = max(
-            ndim(op) - len(sub) for op, sub in zip(operands, input_idxs, strict=False)
+            nd - len(sub) for nd, sub in zip(ndims, input_idxs, strict=False)
         )
-        for i in range(len(operands)):
+        for i in range(len(ndims)):
             ell_idxs = [
                 f"i_{j}"
                 for j in range(
-                    max_ell_len - (ndim(operands[i]) - len(input_idxs[i])), max_ell_len
+                    max_ell_len - (ndims[i] - len(input_idxs[i])), max_ell_len
                 )
             ]
             input_idxs[i] = ell_idxs + input_idxs[i]
@@ -411,16 +546,16 @@ def parse_einsum(*args_) -> tuple[ein.EinsumNode, dict[str, Any]]:
         output_idxs = [f"i_{j}" for j in range(max_ell_len)] + output_idxs
     elif bc == "suffix":
         max_ell_len = max(
-            ndim(op) - len(sub) for op, sub in zip(operands, input_idxs, strict=False)
+            nd - len(sub) for nd, sub in zip(ndims, input_idxs, strict=False)
         )
-        for i in range(len(operands)):
-            ell_idxs = [f"k_{j}" for j in range(ndim(operands[i]) - len(input_idxs[i]))]
+        for i in range(len(ndims)):
+            ell_idxs = [f"k_{j}" for j in range(ndims[i] - len(input_idxs[i]))]
             input_idxs[i] = input_idxs[i] + ell_idxs
         output_idxs = output_idxs + [f"k_{j}" for j in range(max_ell_len)]
 
     all_idxs = set().union(*input_idxs)
 
-    if len(input_idxs) != len(operands):
+    if len(input_idxs) != len(ndims):
         raise ValueError("Number of input subscripts must match number of operands.")
     assert set(output_idxs).issubset(all_idxs), (
         "Output indices must be a subset of input indices."
@@ -434,9 +569,9 @@ def parse_einsum(*args_) -> tuple[ein.EinsumNode, dict[str, Any]]:
         op = ein.Literal(operator.add)
     out_tns = ein.Alias(spc.freshen("B"))
     idxs = tuple(ein.Index(j) for j in output_idxs)
-    in_tnss = [ein.Alias(spc.freshen("A")) for _ in operands]
+    in_tnss = [ein.Alias(spc.freshen("A")) for _ in ndims]
     arg = ein.Access(in_tnss[0], tuple(ein.Index(i) for i in input_idxs[0]))
-    for i in range(1, len(operands)):
+    for i in range(1, len(ndims)):
         arg = ein.Call(
             ein.Literal(operator.mul),
             (arg, ein.Access(in_tnss[i], tuple(ein.Index(j) for j in input_idxs[i]))),
@@ -448,5 +583,5 @@ def parse_einsum(*args_) -> tuple[ein.EinsumNode, dict[str, Any]]:
             idxs,
             arg,
         ),
-        {in_tnss[i].name: operands[i] for i in range(len(operands))},
+        tuple(tns.name for tns in in_tnss),
     )
@@ -0,0 +1,248 @@
+import operator
+from dataclasses import dataclass
+from itertools import combinations
+from math import prod
+
+import numpy as np
+
+from ..operators import overwrite, promote_max, promote_min
+from ..symbolic import Namespace, PostOrderDFS
+from . import nodes as ein
+
+# Reductions, and the pointwise operator which distributes over them.
+semirings = {
+    operator.add: operator.mul,
+    operator.or_: operator.and_,
+    np.logical_or: np.logical_and,
+    promote_min: operator.add,
+    promote_max: operator.add,
+    overwrite: operator.mul,
+}
+
+
+def get_dims(node: ein.EinsumNode, bindings: dict) -> dict[ein.Index, int]:
+    """
+    Return the size of every index accessed in `node`, read off the shapes
+    of the tensors in `bindings`.
+    """
+    dims = {}
+    for access in PostOrderDFS(node):
+        match access:
+            case ein.Access(ein.Alias(name), idxs) if name in bindings:
+                for idx, n in zip(idxs, bindings[name].shape, strict=True):
+                    dims[idx] = n
+    return dims
+
+
+@dataclass(frozen=True)
+class ContractionStep:
+    """
+    ContractionStep
+
+    One pairwise contraction in a `ContractionPath`.
+
+    Attributes:
+        lhs: The positions of the factors already combined on the left.
+        rhs: The positions of the factors already combined on the right.
+        idxs: The indices kept by the contraction.
+        flops: The size of the loop space of the contraction.
+    """
+
+    lhs: frozenset[int]
+    rhs: frozenset[int]
+    idxs: tuple[ein.Index, ...]
+    flops: int
+
+
+@dataclass(frozen=True)
+class ContractionPath:
+    """
+    ContractionPath
+
+    An order in which to contract the factors of an einsum pairwise.
+
+    Attributes:
+        steps: The contractions, in execution order.
+        flops: The estimated number of pointwise operations of the path.
+        peak_size: The number of elements in the largest intermediate.
+        naive_flops: The estimated operations of the unplanned einsum.
+    """
+
+    steps: tuple[ContractionStep, ...]
+    flops: int
+    peak_size: int
+    naive_flops: int
+
+
+class EinsumScheduler:
+    """
+    EinsumScheduler
+
+    Rewrites einsums whose argument is a product of several factors, e.g.
+    `D[i, l] += A[i, j] * B[j, k] * C[k, l]`, into a `Plan` of pairwise
+    contractions through temporaries. Any reduction which has a
+    distributive pointwise operator in `semirings` is supported, so
+    min-plus products are reordered just like sums of products.
+
+    The contraction order is chosen from the dimension sizes in `env`
+    either greedily, or exactly by dynamic programming over subsets of
+    factors (exponential in the number of factors).
+
+    Attributes:
+        env: Mapping of indices to their size.
+        strategy: Either "greedy" or "optimal".
+    """
+
+    def __init__(self, env, strategy="greedy"):
+        if strategy not in ("greedy", "optimal"):
+            raise ValueError(f"Unknown contraction strategy: {strategy}")
+        self.env = env
+        self.strategy = strategy
+
+    def __call__(self, node: ein.EinsumNode) -> ein.EinsumNode:
+        spc = Namespace()
+        for alias in PostOrderDFS(node):
+            if isinstance(alias, ein.Alias):
+                spc.freshen(alias.name)
+        return self.schedule(node, spc)
+
+    def schedule(self, node, spc):
+        match node:
+            case ein.Plan(bodies, returnValues):
+                new_bodies = []
+                for body in bodies:
+                    body = self.schedule(body, spc)
+                    if isinstance(body, ein.Plan):
+                        new_bodies.extend(body.bodies)
+                    else:
+                        new_bodies.append(body)
+                return ein.Plan(tuple(new_bodies), returnValues)
+            case ein.Einsum(op, tns, idxs, _):
+                factors = self.factors(node)
+                if factors is None or len(factors) <= 2:
+                    return node
+                path = self.path(node)
+                terms = {frozenset([n]): factor for n, factor in enumerate(factors)}
+                bodies = []
+                for step in path.steps[:-1]:
+                    tmp = ein.Alias(spc.freshen("T"))
+                    bodies.append(
+                        self.contract(op, tmp, step, terms[step.lhs], terms[step.rhs])
+                    )
+                    terms[step.lhs | step.rhs] = ein.Access(tmp, step.idxs)
+                step = path.steps[-1]
+                lhs, rhs = terms[step.lhs], terms[step.rhs]
+                mul = ein.Literal(semirings[op.val])
+                bodies.append(ein.Einsum(op, tns, idxs, ein.Call(mul, (lhs, rhs))))
+                return ein.Plan(tuple(bodies))
+            case _:
+                return node
+
+    def contract(self, op, tmp, step, lhs, rhs):
+        mul = ein.Literal(semirings[op.val])
+        arg = ein.Call(mul, (lhs, rhs))
+        if set(step.idxs) == arg.get_idxs():
+            op = ein.Literal(overwrite)
+        return ein.Einsum(op, tmp, step.idxs, arg)
+
+    def factors(self, node: ein.Einsum) -> list[ein.EinsumExpr] | None:
+        """
+        Return the operands of the distributive product in `node`, or None if
+        the reduction of `node` cannot be reordered.
+        """
+        if node.op.val not in semirings:
+            return None
+        mul = semirings[node.op.val]
+        factors = []
+
+        def flatten(arg):
+            match arg:
+                case ein.Call(ein.Literal(f), args) if f == mul:
+                    for a in args:
+                        flatten(a)
+                case _:
+                    factors.append(arg)
+
+        flatten(node.arg)
+        return factors
+
+    def path(self, node: ein.Einsum) -> ContractionPath:
+        """
+        Return the contraction path chosen for `node`.
+        """
+        factors = self.factors(node)
+        if factors is None:
+            raise ValueError(f"Cannot reorder the reduction in {node}")
+        loops = [factor.get_idxs() for factor in factors]
+        output = set(node.idxs)
+        naive_flops = prod(self.env[idx] for idx in node.arg.get_idxs()) * max(
+            len(factors) - 1, 1
+        )
+        if self.strategy == "greedy":
+            steps = self.greedy(loops, output)
+        else:
+            steps = self.optimal(loops, output)
+        flops = sum(step.flops for step in steps)
+        peak_size = max(
+            (self.size(step.idxs) for step in steps[:-1]), default=0
+        )
+        return ContractionPath(tuple(steps), flops, peak_size, naive_flops)
+
+    def size(self, idxs) -> int:
+        return prod(self.env[idx] for idx in idxs)
+
+    def keep(self, idxs, rest, output) -> tuple[ein.Index, ...]:
+        kept = idxs & (rest | output)
+        return tuple(sorted(kept, key=lambda idx: idx.name))
+
+    def greedy(self, loops, output) -> list[ContractionStep]:
+        # Repeatedly contract the pair which shrinks the working set the most,
+        # breaking ties by the cost of the contraction.
+        terms = {frozenset([n]): idxs for n, idxs in enumerate(loops)}
+        steps = []
+        while len(terms) > 1:
+            best = None
+            for lhs, rhs in combinations(terms, 2):
+                rest = set().union(
+                    *(idxs for key, idxs in terms.items() if key not in (lhs, rhs))
+                )
+                idxs = self.keep(terms[lhs] | terms[rhs], rest, output)
+                flops = self.size(terms[lhs] | terms[rhs])
+                growth = (
+                    self.size(idxs) - self.size(terms[lhs]) - self.size(terms[rhs])
+                )
+                if best is None or (growth, flops) < best[0]:
+                    best = ((growth, flops), ContractionStep(lhs, rhs, idxs, flops))
+            step = best[1]
+            del terms[step.lhs], terms[step.rhs]
+            terms[step.lhs | step.rhs] = set(step.idxs)
+            steps.append(step)
+        return steps
+
+    def optimal(self, loops, output) -> list[ContractionStep]:
+        # Dynamic programming over subsets of factors, minimizing total flops.
+        n = len(loops)
+        everything = frozenset(range(n))
+        best: dict[frozenset[int], tuple[int, list[ContractionStep], set]] = {}
+        for i in range(n):
+            best[frozenset([i])] = (0, [], loops[i])
+        for m in range(2, n + 1):
+            for subset in map(frozenset, combinations(range(n), m)):
+                rest = set().union(*(loops[i] for i in everything - subset))
+                members = sorted(subset)
+                first, others = members[0], members[1:]
+                for r in range(len(others)):
+                    # The first member is always on the left, so each split is
+                    # only considered once.
+                    for chosen in combinations(others, r):
+                        lhs = frozenset([first, *chosen])
+                        rhs = subset - lhs
+                        lcost, lsteps, lidxs = best[lhs]
+                        rcost, rsteps, ridxs = best[rhs]
+                        flops = self.size(lidxs | ridxs)
+                        cost = lcost + rcost + flops
+                        if subset not in best or cost < best[subset][0]:
+                            idxs = self.keep(lidxs | ridxs, rest, output)
+                            step = ContractionStep(lhs, rhs, idxs, flops)
+                            best[subset] = (cost, [*lsteps, *rsteps, step], set(idxs))
+        return best[everything][1]
@@ -0,0 +1,75 @@
+import numpy as np
+import sparse
+
+from . import nodes as ein
+from .interpreter import EinsumInterpreter, nary_ops, unary_ops
+
+
+class SparseEinsumInterpreter(EinsumInterpreter):
+    """
+    SparseEinsumInterpreter
+
+    Executes einsums over pydata `sparse` arrays without densifying them.
+
+    Bindings may be `sparse` arrays, scipy sparse matrices (CSR, CSC, COO, ...)
+    or dense arrays, and are read as COO. Accesses become broadcast COO views,
+    and each `Call` co-iterates over the stored coordinates of its arguments:
+    operators which are zero whenever an argument is zero (`*`, `&`, `and`)
+    visit the intersection of the nonzeros, while additive operators visit
+    their union. Reductions only touch stored entries, so time and memory
+    scale with the number of nonzeros rather than the product of the
+    dimension sizes.
+
+    Attributes:
+        format: The `sparse` format results are stored in, e.g. "coo" or "gcxs".
+    """
+
+    def __init__(
+        self,
+        bindings=None,
+        loops=None,
+        format="coo",
+        dispatch=True,
+        memory_budget=None,
+        slices=None,
+    ):
+        super().__init__(sparse, bindings, loops, dispatch, memory_budget, slices)
+        self.format = format
+
+    def scope(self, loops, slices=None):
+        return SparseEinsumInterpreter(
+            self.bindings,
+            loops,
+            self.format,
+            self.dispatch,
+            self.memory_budget,
+            slices,
+        )
+
+    def __call__(self, node):
+        match node:
+            case ein.Alias(name):
+                tns = self.bindings[name]
+                if not isinstance(tns, sparse.SparseArray):
+                    tns = sparse.asarray(tns)
+                return tns
+            case ein.Call(func, args):
+                func = self(func)
+                if len(args) == 1:
+                    name = unary_ops[func]
+                else:
+                    name = nary_ops[func]
+                vals = [self(arg) for arg in args]
+                if hasattr(sparse, name):
+                    return getattr(sparse, name)(*vals)
+                # Not every ufunc is exported by `sparse`, but all of them
+                # co-iterate through `elemwise`.
+                return sparse.elemwise(getattr(np, name), *vals)
+            case ein.Einsum(_, ein.Alias(tns), _, _):
+                res = super().__call__(node)
+                val = self.bindings[tns]
+                if isinstance(val, sparse.SparseArray) and val.ndim > 0:
+                    self.bindings[tns] = val.asformat(self.format)
+                return res
+            case _:
+                return super().__call__(node)
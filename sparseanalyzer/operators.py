@@ -1,5 +1,3 @@
-import numpy as np
-
 def and_test(a, b):
     return a & b
 
@@ -16,6 +14,9 @@ def ifelse(a, b, c):
     return a if c else b
 
 def promote_type(a, b) -> type:
+    # numpy is imported here so that building trees does not load it.
+    import numpy as np
+
     a = type(a) if not isinstance(a, type) else a
     b = type(b) if not isinstance(b, type) else b
     if issubclass(a, np.generic) or issubclass(b, np.generic):
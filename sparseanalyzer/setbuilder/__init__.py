@@ -1,29 +1,81 @@
-from .nodes import (
-    SetBuilderNode,
-    SetBuilderExpr,
-    Literal,
-    Access,
-    Index,
-    Variable,
-    CoordSet,
-    LessThan,
-    GreaterThan,
-    And,
-    Or,
-    Not,
-    IsNonFill,
-    Union,
-    Intersect,
-    SetDiff,
-    Dimension,
-    In,
-    Cardinality,
-    Project,
-    Plus,
-    Exists,
-    ForAll,
-)
-from .simplify import simplify
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .nodes import (
+        SetBuilderNode,
+        SetBuilderExpr,
+        Literal,
+        Access,
+        Index,
+        Variable,
+        CoordSet,
+        LessThan,
+        GreaterThan,
+        And,
+        Or,
+        Not,
+        IsNonFill,
+        Union,
+        Intersect,
+        SetDiff,
+        Dimension,
+        In,
+        Cardinality,
+        Project,
+        Plus,
+        Exists,
+        ForAll,
+    )
+    from .interpreter import SetBuilderInterpreter
+    from .simplify import simplify
+    from .sketch import HyperLogLog, MinHash, SketchEstimator
+    from .triejoin import TrieJoin
+
+# Attributes are imported from their submodules on first access (PEP 562).
+_lazy_attrs = {
+    "SetBuilderNode": ".nodes",
+    "SetBuilderExpr": ".nodes",
+    "Literal": ".nodes",
+    "Access": ".nodes",
+    "Index": ".nodes",
+    "Variable": ".nodes",
+    "CoordSet": ".nodes",
+    "LessThan": ".nodes",
+    "GreaterThan": ".nodes",
+    "And": ".nodes",
+    "Or": ".nodes",
+    "Not": ".nodes",
+    "IsNonFill": ".nodes",
+    "Union": ".nodes",
+    "Intersect": ".nodes",
+    "SetDiff": ".nodes",
+    "Dimension": ".nodes",
+    "In": ".nodes",
+    "Cardinality": ".nodes",
+    "Project": ".nodes",
+    "Plus": ".nodes",
+    "Exists": ".nodes",
+    "ForAll": ".nodes",
+    "simplify": ".simplify",
+    "SetBuilderInterpreter": ".interpreter",
+    "HyperLogLog": ".sketch",
+    "MinHash": ".sketch",
+    "SketchEstimator": ".sketch",
+    "TrieJoin": ".triejoin",
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_attrs:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    val = getattr(importlib.import_module(_lazy_attrs[name], __name__), name)
+    globals()[name] = val
+    return val
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attrs})
 
 __all__ = [
     "Literal",
@@ -49,5 +101,10 @@ __all__ = [
     "Cardinality",
     "Exists",
     "ForAll",
-    "Dimension"
+    "Dimension",
+    "HyperLogLog",
+    "MinHash",
+    "SketchEstimator",
+    "SetBuilderInterpreter",
+    "TrieJoin",
 ]
@@ -0,0 +1,326 @@
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from ..coordinates import Relation, _pack, coordinates, join, relation, scalar, unique_rows
+from ..symbolic import PostOrderDFS
+from . import nodes as sbn
+from .triejoin import TrieJoin
+
+
+def structured(rel: Relation) -> np.ndarray:
+    """
+    Return the tuples of `rel` as a sorted structured array with an int64
+    field per column, named after its index.
+    """
+    coords = unique_rows(rel.coords)
+    res = np.zeros(len(coords), dtype=[(str(idx), np.int64) for idx in rel.idxs])
+    for n, idx in enumerate(rel.idxs):
+        res[str(idx)] = coords[:, n]
+    return res
+
+
+def member_mask(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Return whether each row of `a` is a row of `b`.
+    """
+    if a.shape[1] == 0:
+        return np.full(len(a), len(b) > 0)
+    keys, _ = _pack(np.concatenate([a, b]))
+    return np.isin(keys[: len(a)], keys[len(a) :])
+
+
+def free_idxs(node) -> set[sbn.Index]:
+    """
+    Return the indices of the predicate `node` which no quantifier binds.
+    """
+    match node:
+        case sbn.Index():
+            return {node}
+        case sbn.Exists(idx, body) | sbn.ForAll(idx, body):
+            return free_idxs(body) - {idx}
+        case sbn.In(idxs, _):
+            return set(idxs)
+        case sbn.IsNonFill(_, idxs):
+            return {idx for idx in idxs if isinstance(idx, sbn.Index)}
+        case sbn.SetBuilderTree():
+            return set().union(*map(free_idxs, node.children))
+        case _:
+            return set()
+
+
+class SetBuilderInterpreter:
+    """
+    SetBuilderInterpreter
+
+    Evaluates setbuilder expressions over concrete tensors. `Variable`s are
+    looked up in `bindings`: tensors (anything `coordinates` accepts),
+    partition arrays, and scalars such as processor ids.
+
+    A partition bound as an integer array maps each coordinate to its owner,
+    so `Π[p]` is the set of coordinates owned by `p`. A partition bound as a
+    sequence or mapping holds the coordinates of each part directly.
+
+    Sets evaluate to sorted structured arrays with an int64 field per index.
+    Predicates are evaluated to the relation of the index values satisfying
+    them, with conjunctions evaluated as vectorized sort/merge joins and
+    negations as anti-joins. Conjunctions of more than two relations run as
+    a worst-case optimal `TrieJoin`. An index which no positive atom bounds
+    ranges over its dimension, given in `dims` or inferred from the tensors
+    it indexes.
+
+    Attributes:
+        bindings: Mapping of variable names to their values.
+        dims: Mapping of indices to their size.
+    """
+
+    def __init__(self, bindings=None, dims=None):
+        self.bindings = bindings if bindings is not None else {}
+        self.dims = {}
+        for idx, n in (dims or {}).items():
+            self.dims[idx if isinstance(idx, sbn.Index) else sbn.Index(idx)] = n
+        self._coords = {}
+
+    def __call__(self, node):
+        self.infer_dims(node)
+        match node:
+            case sbn.Literal(val):
+                return val
+            case sbn.Variable(name):
+                return self.bindings[name]
+            case sbn.Cardinality(arg):
+                return self.cardinality(arg)
+            case sbn.CoordSet() | sbn.Union() | sbn.Intersect() | sbn.SetDiff():
+                return structured(self.members(node))
+            case sbn.Project() | sbn.Dimension() | sbn.Access():
+                return structured(self.members(node))
+            case _:
+                rel = self.satisfy(node)
+                order = sorted(range(len(rel.idxs)), key=lambda n: rel.idxs[n].name)
+                idxs = tuple(rel.idxs[n] for n in order)
+                return structured(Relation(idxs, rel.coords[:, order], rel.weights))
+
+    def infer_dims(self, node):
+        for term in PostOrderDFS(node):
+            if isinstance(term, sbn.IsNonFill) and isinstance(term.tns, sbn.Variable):
+                shape = getattr(self.bindings.get(term.tns.name), "shape", None)
+                if shape is not None:
+                    for idx, n in zip(term.idxs, shape, strict=True):
+                        if isinstance(idx, sbn.Index):
+                            self.dims.setdefault(idx, n)
+
+    def coordinates(self, name) -> np.ndarray:
+        if name not in self._coords:
+            self._coords[name] = coordinates(self.bindings[name])
+        return self._coords[name]
+
+    def value(self, node):
+        """
+        Return the scalar value of `node`.
+        """
+        match node:
+            case sbn.Literal(val):
+                return val
+            case sbn.Variable(name):
+                return self.bindings[name]
+            case sbn.Plus(left, right):
+                return self.value(left) + self.value(right)
+            case _:
+                raise ValueError(f"Expected a scalar, got {node}")
+
+    def domain(self, idx) -> Relation:
+        """
+        Return the relation of every value of `idx`.
+        """
+        if idx not in self.dims:
+            raise ValueError(f"The dimension of {idx} is unknown")
+        return relation(np.arange(self.dims[idx], dtype=np.int64), (idx,))
+
+    def extend(self, rel: Relation, idxs) -> Relation:
+        """
+        Extend `rel` over the full domain of each of `idxs` it lacks.
+        """
+        for idx in idxs:
+            if idx not in rel.idxs:
+                rel = join(rel, self.domain(idx))
+        return rel
+
+    # Sets
+
+    def members(self, node) -> Relation:
+        """
+        Return the distinct tuples of the set `node`, sorted, as a relation
+        whose columns are the indices of the set.
+        """
+        match node:
+            case sbn.CoordSet(idxs, pred):
+                rel = self.extend(self.satisfy(pred), idxs)
+                return self.project(rel, idxs)
+            case sbn.Union(left, right):
+                a, b = self.pair(left, right)
+                coords = unique_rows(np.concatenate([a.coords, b.coords]))
+                return Relation(a.idxs, coords, np.ones(len(coords), np.int64))
+            case sbn.Intersect(left, right):
+                a, b = self.pair(left, right)
+                return self.select(a, member_mask(a.coords, b.coords))
+            case sbn.SetDiff(left, right):
+                a, b = self.pair(left, right)
+                return self.select(a, ~member_mask(a.coords, b.coords))
+            case sbn.Project(idxs, arg):
+                rel = self.members(arg)
+                for idx in idxs:
+                    if idx not in rel.idxs:
+                        raise ValueError(f"Cannot project onto {idx}, which is not in {arg}")
+                return self.project(rel, idxs)
+            case sbn.Dimension(idx):
+                return self.domain(idx)
+            case sbn.Access(tns, idxs):
+                return self.part(self.value(tns), [self.value(idx) for idx in idxs])
+            case _:
+                raise ValueError(f"Expected a set, got {node}")
+
+    def pair(self, left, right) -> tuple[Relation, Relation]:
+        # Columns are matched by position, as in `simplify`.
+        a, b = self.members(left), self.members(right)
+        if len(a.idxs) != len(b.idxs):
+            raise ValueError(f"Cannot combine sets of different arity: {left}, {right}")
+        return a, b
+
+    def part(self, tns, keys) -> Relation:
+        """
+        Return the coordinates of the part `keys` of the partition `tns`.
+        """
+        if isinstance(tns, (Sequence, Mapping)):
+            for key in keys:
+                tns = tns[key]
+            coords = np.asarray(tns, dtype=np.int64)
+            coords = coords.reshape(len(coords), -1)
+        else:
+            (key,) = keys
+            coords = np.argwhere(np.asarray(tns) == key).astype(np.int64)
+        idxs = tuple(f"f{n}" for n in range(coords.shape[1]))
+        coords = unique_rows(coords)
+        return Relation(idxs, coords, np.ones(len(coords), np.int64))
+
+    def project(self, rel: Relation, idxs) -> Relation:
+        cols = [rel.idxs.index(idx) for idx in idxs]
+        coords = unique_rows(rel.coords[:, cols])
+        return Relation(tuple(idxs), coords, np.ones(len(coords), np.int64))
+
+    def select(self, rel: Relation, mask) -> Relation:
+        return Relation(rel.idxs, rel.coords[mask], rel.weights[mask])
+
+    # Predicates
+
+    def satisfy(self, pred) -> Relation:
+        """
+        Return the relation of the index values which satisfy `pred`.
+        """
+        match pred:
+            case sbn.Literal(val):
+                return scalar() if val else Relation((), np.zeros((0, 0), np.int64), np.zeros(0, np.int64))
+            case sbn.IsNonFill(sbn.Variable(name), idxs):
+                coords = self.coordinates(name)
+                keep = []
+                for n, idx in enumerate(idxs):
+                    if isinstance(idx, sbn.Index):
+                        keep.append(n)
+                    else:
+                        coords = coords[coords[:, n] == self.value(idx)]
+                return relation(coords[:, keep], tuple(idxs[n] for n in keep))
+            case sbn.In(idxs, arg):
+                return relation(self.members(arg).coords, idxs)
+            case sbn.And():
+                return self.conjunction(list(self.conjuncts(pred)))
+            case sbn.Or(x, y):
+                a, b = self.satisfy(x), self.satisfy(y)
+                a = self.extend(a, b.idxs)
+                b = self.extend(b, a.idxs)
+                cols = [b.idxs.index(idx) for idx in a.idxs]
+                coords = unique_rows(np.concatenate([a.coords, b.coords[:, cols]]))
+                return Relation(a.idxs, coords, np.ones(len(coords), np.int64))
+            case sbn.Exists(idx, body):
+                rel = self.satisfy(body)
+                return self.project(rel, [i for i in rel.idxs if i != idx])
+            case sbn.ForAll(idx, body):
+                return self.satisfy(sbn.Not(sbn.Exists(idx, sbn.Not(body))))
+            case _:
+                return self.conjunction([pred])
+
+    def conjuncts(self, pred):
+        if isinstance(pred, sbn.And):
+            yield from self.conjuncts(pred.x)
+            yield from self.conjuncts(pred.y)
+        else:
+            yield pred
+
+    def conjunction(self, preds) -> Relation:
+        """
+        Return the relation satisfying every predicate of `preds`. Positive
+        predicates are joined, then negations and comparisons filter the
+        join.
+        """
+        filters, rels = [], []
+        for pred in preds:
+            if isinstance(pred, (sbn.Not, sbn.LessThan, sbn.GreaterThan)):
+                filters.append(pred)
+            else:
+                rels.append(self.satisfy(pred))
+        rel = self.join(rels)
+        for pred in filters:
+            rel = self.extend(rel, sorted(free_idxs(pred), key=str))
+            match pred:
+                case sbn.Not(x):
+                    neg = self.satisfy(x)
+                    cols = [rel.idxs.index(idx) for idx in neg.idxs]
+                    rel = self.select(rel, ~member_mask(rel.coords[:, cols], neg.coords))
+                case sbn.LessThan(x, y):
+                    rel = self.select(rel, self.column(rel, x) < self.column(rel, y))
+                case sbn.GreaterThan(x, y):
+                    rel = self.select(rel, self.column(rel, x) > self.column(rel, y))
+        return rel
+
+    def join(self, rels) -> Relation:
+        """
+        Return the natural join of `rels`. Joins of more than two relations
+        run as a `TrieJoin`, so that no intermediate result outgrows the
+        worst case of the output; smaller ones as a sort/merge join.
+        """
+        if any(len(rel) == 0 for rel in rels):
+            idxs = tuple(dict.fromkeys(idx for rel in rels for idx in rel.idxs))
+            return Relation(idxs, np.zeros((0, len(idxs)), np.int64), np.zeros(0, np.int64))
+        rels = [rel for rel in rels if rel.idxs]
+        if len(rels) > 2:
+            return TrieJoin(rels).evaluate()
+        rel = scalar()
+        for other in rels:
+            rel = join(rel, other)
+        return rel
+
+    def cardinality(self, node) -> int:
+        """
+        Return the number of tuples in the set `node`. Conjunctions of atoms
+        over exactly the indices of a `CoordSet` are counted by a
+        `TrieJoin` without enumerating their last index.
+        """
+        match node:
+            case sbn.CoordSet(idxs, pred) if free_idxs(pred) == set(idxs):
+                preds = list(self.conjuncts(pred))
+                if len(preds) > 2 and all(isinstance(p, (sbn.IsNonFill, sbn.In)) for p in preds):
+                    rels = [self.satisfy(p) for p in preds]
+                    if all(rel.idxs for rel in rels):
+                        return TrieJoin(rels, keep=idxs).count()
+        return len(self.members(node))
+
+    def column(self, rel: Relation, node):
+        """
+        Return the value of the scalar expression `node` at each tuple of
+        `rel`.
+        """
+        match node:
+            case sbn.Index() if node in rel.idxs:
+                return rel.coords[:, rel.idxs.index(node)]
+            case sbn.Plus(left, right):
+                return self.column(rel, left) + self.column(rel, right)
+            case _:
+                return np.full(len(rel), self.value(node))
@@ -352,6 +352,7 @@ class SetDiff(SetBuilderExpr, SetBuilderTree):
     def children(self):
         return [self.left, self.right]
 
+@dataclass(eq=True, frozen=True)
 class ForAll(SetBuilderExpr, SetBuilderTree):
     """
     ForAll
@@ -368,6 +369,7 @@ class ForAll(SetBuilderExpr, SetBuilderTree):
     def children(self):
         return [self.idx, self.body]
 
+@dataclass(eq=True, frozen=True)
 class Plus(SetBuilderExpr, SetBuilderTree):
     """
     Plus
@@ -9,13 +9,13 @@ def simplify_node(expr: SetBuilderNode):
         def rename(ex):
             match ex:
                 case sbn.Index(_) as idx if idx in idxs1:
-                    return sbn.Index(rename_dict[idx])
+                    return rename_dict[idx]
                 case _:
                     return ex
         def rename_back(ex):
             match ex:
                 case sbn.Dimension(sbn.Index(_) as idx) if idx in idxs2:
-                    return sbn.Index(backward_dict[idx])
+                    return backward_dict[idx]
                 case _:
                     return ex
         pred2 = PostWalk(rename)(pred)
@@ -0,0 +1,464 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import combinations
+from math import ceil, log, log2
+
+import numpy as np
+
+from ..coordinates import coordinate_blocks
+from . import nodes as sbn
+
+_MASK = (1 << 64) - 1
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # The splitmix64 finalizer, on uint64 arrays.
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def hash_coords(coords: np.ndarray, seed: int = 0) -> np.ndarray:
+    """
+    Return a 64-bit hash of each row of the `(n, ndim)` integer array
+    `coords`. Equal rows hash equal, whatever array they come from.
+    """
+    coords = np.asarray(coords).reshape(len(coords), -1)
+    h = np.full(len(coords), _mix(np.uint64(seed & _MASK)), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for col in coords.T:
+            h = _mix(h ^ (col.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)))
+    return h
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    # Halves of 32 bits convert to float64 exactly, so `frexp` is exact.
+    hi = np.frexp((x >> np.uint64(32)).astype(np.float64))[1]
+    lo = np.frexp((x & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+    return np.where(hi > 0, hi + 32, lo)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog
+
+    A sketch of the number of distinct 64-bit hashes added to it, in
+    `2 ** precision` bytes, with a relative standard error of about
+    `1.04 / sqrt(2 ** precision)`. Sketches of the same precision and seed
+    merge into the sketch of the union of their inputs.
+
+    Attributes:
+        precision: The number of hash bits which select a register.
+        seed: The seed to hash coordinates with.
+        registers: The longest run of leading zeros seen by each register.
+    """
+
+    def __init__(self, precision=14, seed=0):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be in [4, 18], got {precision}")
+        self.precision = precision
+        self.seed = seed
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def from_error(cls, error, seed=0):
+        """
+        Return the smallest sketch whose relative standard error is at most
+        `error`.
+        """
+        precision = ceil(2 * log2(1.04 / error))
+        return cls(min(max(precision, 4), 18), seed)
+
+    @property
+    def error(self) -> float:
+        return 1.04 / len(self.registers) ** 0.5
+
+    def empty(self):
+        return type(self)(self.precision, self.seed)
+
+    def update(self, hashes: np.ndarray):
+        """
+        Add an array of hashes to the sketch.
+        """
+        p = self.precision
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        slot = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        rank = (64 - p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, slot, rank.astype(np.uint8))
+        return self
+
+    def add(self, coords: np.ndarray):
+        """
+        Add the rows of a coordinate array to the sketch.
+        """
+        return self.update(hash_coords(coords, self.seed))
+
+    def merge(self, other):
+        """
+        Return the sketch of the union of the inputs of both sketches.
+        """
+        if (other.precision, other.seed) != (self.precision, self.seed):
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision or seed")
+        res = self.empty()
+        np.maximum(self.registers, other.registers, out=res.registers)
+        return res
+
+    __or__ = merge
+
+    def cardinality(self) -> float:
+        """
+        Return the estimated number of distinct hashes added.
+        """
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        est = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            return m * log(m / zeros)
+        return float(est)
+
+
+class MinHash:
+    """
+    MinHash
+
+    A bottom-k sketch, which keeps the `k` smallest distinct hashes added to
+    it. Besides the number of distinct hashes, with a relative standard
+    error of about `1 / sqrt(k - 2)`, two sketches estimate the Jaccard
+    similarity of their inputs, and so their intersection.
+
+    Attributes:
+        k: The number of hashes kept.
+        seed: The seed to hash coordinates with.
+        hashes: The smallest hashes seen, sorted.
+    """
+
+    def __init__(self, k=1024, seed=0):
+        if k < 3:
+            raise ValueError(f"MinHash needs k >= 3, got {k}")
+        self.k = k
+        self.seed = seed
+        self.hashes = np.zeros(0, dtype=np.uint64)
+
+    @classmethod
+    def from_error(cls, error, seed=0):
+        """
+        Return the smallest sketch whose relative standard error is at most
+        `error`.
+        """
+        return cls(ceil(1 / error**2) + 2, seed)
+
+    @property
+    def error(self) -> float:
+        return 1 / (self.k - 2) ** 0.5
+
+    def empty(self):
+        return type(self)(self.k, self.seed)
+
+    def update(self, hashes: np.ndarray):
+        """
+        Add an array of hashes to the sketch.
+        """
+        hashes = np.concatenate([self.hashes, np.asarray(hashes, dtype=np.uint64)])
+        if len(hashes) > 2 * self.k:
+            # Only the k smallest distinct hashes can survive, so drop the
+            # rest before sorting (duplicates may push the cut further out).
+            cut = np.partition(hashes, self.k - 1)[self.k - 1]
+            small = hashes[hashes <= cut]
+            if len(np.unique(small)) >= self.k:
+                hashes = small
+        self.hashes = np.unique(hashes)[: self.k]
+        return self
+
+    def add(self, coords: np.ndarray):
+        """
+        Add the rows of a coordinate array to the sketch.
+        """
+        return self.update(hash_coords(coords, self.seed))
+
+    def merge(self, other):
+        """
+        Return the sketch of the union of the inputs of both sketches.
+        """
+        if (other.k, other.seed) != (self.k, self.seed):
+            raise ValueError("Cannot merge MinHash sketches of different k or seed")
+        return self.empty().update(np.concatenate([self.hashes, other.hashes]))
+
+    __or__ = merge
+
+    def cardinality(self) -> float:
+        """
+        Return the estimated number of distinct hashes added.
+        """
+        if len(self.hashes) < self.k:
+            return float(len(self.hashes))
+        return (self.k - 1) / ((float(self.hashes[-1]) + 1) / 2.0**64)
+
+    def jaccard(self, other) -> float:
+        """
+        Return the estimated Jaccard similarity of the inputs of both
+        sketches.
+        """
+        union = self.merge(other).hashes
+        if not len(union):
+            return 0.0
+        both = np.isin(union, self.hashes) & np.isin(union, other.hashes)
+        return float(np.count_nonzero(both)) / len(union)
+
+    def intersection(self, other) -> float:
+        """
+        Return the estimated number of hashes added to both sketches.
+        """
+        return self.jaccard(other) * self.merge(other).cardinality()
+
+
+@dataclass(frozen=True)
+class Stream:
+    """
+    Stream
+
+    The coordinates of a bound tensor, filtered and rearranged into the
+    columns of a set.
+
+    Attributes:
+        tns: The name of the tensor.
+        cols: The tensor mode giving each column of the set.
+        diagonal: Pairs of modes whose coordinates must be equal.
+    """
+
+    tns: str
+    cols: tuple[int, ...]
+    diagonal: tuple[tuple[int, int], ...] = ()
+
+
+@dataclass(frozen=True)
+class SketchedSet:
+    """
+    SketchedSet
+
+    A set of coordinates as a boolean combination of streams.
+
+    Attributes:
+        idxs: The index of each column.
+        streams: The streams which the set is built from.
+        member: Whether a coordinate lies in the set, given the streams it
+            occurs in.
+    """
+
+    idxs: tuple[sbn.Index, ...]
+    streams: frozenset[Stream]
+    member: Callable[[frozenset[Stream]], bool]
+
+    def is_union(self) -> bool:
+        """
+        Whether the set is the union of its streams.
+        """
+        return all(
+            self.member(frozenset(sub)) == bool(sub)
+            for n in range(len(self.streams) + 1)
+            for sub in combinations(self.streams, n)
+        )
+
+
+class SketchEstimator:
+    """
+    SketchEstimator
+
+    Estimates the size of setbuilder sets over bound sparse tensors without
+    materializing them. The coordinates of each tensor are streamed once per
+    distinct arrangement, in blocks, into a mergeable cardinality sketch;
+    unions merge sketches, and intersections and differences are recovered
+    by inclusion-exclusion over the unions of the streams involved.
+
+    Supported sets are `CoordSet`s whose predicate combines `IsNonFill`
+    with `And`, `Or`, `Not` and `Exists`, together with `Union`, `Intersect`,
+    `SetDiff` and `Project` of them. Indices of an `IsNonFill` outside the
+    set are projected out, so they may only occur in one `IsNonFill` and
+    not under a `Not`. `Project` only applies to unions of streams, since
+    intersections of sketches cannot be projected.
+
+    Errors are relative to the union of the streams a set is built from, so
+    small intersections of large sets are estimated poorly.
+
+    Attributes:
+        bindings: Mapping of variable names to tensors.
+        error: The relative standard error of each sketch.
+        sketch: The sketch class, `HyperLogLog` or `MinHash`.
+        block_size: The number of coordinates hashed at a time.
+        seed: The seed to hash coordinates with.
+    """
+
+    def __init__(self, bindings, error=0.01, sketch=HyperLogLog, block_size=1 << 20, seed=0):
+        self.bindings = bindings
+        self.error = error
+        self.sketch = sketch
+        self.block_size = block_size
+        self.seed = seed
+        self._sketches = {}
+
+    def __call__(self, node: sbn.SetBuilderExpr) -> float:
+        match node:
+            case sbn.Cardinality(arg):
+                return self.estimate(arg)
+            case _:
+                return self.estimate(node)
+
+    def estimate(self, node: sbn.SetBuilderExpr) -> float:
+        """
+        Return the estimated number of coordinates in the set `node`.
+        """
+        return self.cardinality(self.sketched(node))
+
+    def cardinality(self, s: SketchedSet) -> float:
+        streams = sorted(s.streams, key=repr)
+        if s.member(frozenset()):
+            raise ValueError("Cannot estimate the size of an unbounded set")
+        if len(streams) > 16:
+            raise ValueError(f"Too many streams to combine: {len(streams)}")
+        full = frozenset(streams)
+        unions = {}
+
+        def union(ss):
+            # The estimated size of the union of the streams in `ss`.
+            if ss not in unions:
+                sketch = self.sketch.from_error(self.error, self.seed)
+                for stream in ss:
+                    sketch = sketch.merge(self.stream_sketch(stream))
+                unions[ss] = sketch.cardinality()
+            return unions[ss]
+
+        def within(ss):
+            # The number of coordinates occurring only in streams of `ss`.
+            return union(full) - union(full - ss)
+
+        total = 0.0
+        for n in range(1, len(streams) + 1):
+            for region in map(frozenset, combinations(streams, n)):
+                if not s.member(region):
+                    continue
+                # Coordinates occurring in exactly the streams of `region`,
+                # by Möbius inversion over its subsets.
+                for m in range(1, n + 1):
+                    for sub in combinations(region, m):
+                        total += (-1) ** (n - m) * within(frozenset(sub))
+        return max(total, 0.0)
+
+    def stream_sketch(self, stream: Stream):
+        """
+        Return the sketch of the distinct coordinates of `stream`.
+        """
+        if stream not in self._sketches:
+            sketch = self.sketch.from_error(self.error, self.seed)
+            for block in coordinate_blocks(self.bindings[stream.tns], self.block_size):
+                for a, b in stream.diagonal:
+                    block = block[block[:, a] == block[:, b]]
+                sketch.add(block[:, list(stream.cols)])
+            self._sketches[stream] = sketch
+        return self._sketches[stream]
+
+    def sketched(self, node: sbn.SetBuilderExpr) -> SketchedSet:
+        """
+        Return `node` as a boolean combination of streams.
+        """
+        match node:
+            case sbn.CoordSet(idxs, pred):
+                self.projected(idxs, pred)
+                streams, member = self.predicate(idxs, pred, True)
+                return SketchedSet(tuple(idxs), streams, member)
+            case sbn.Union(left, right):
+                a, b = self.pair(left, right)
+                return self.combine(a, b, lambda x, y: x or y)
+            case sbn.Intersect(left, right):
+                a, b = self.pair(left, right)
+                return self.combine(a, b, lambda x, y: x and y)
+            case sbn.SetDiff(left, right):
+                a, b = self.pair(left, right)
+                return self.combine(a, b, lambda x, y: x and not y)
+            case sbn.Project(idxs, arg):
+                s = self.sketched(arg)
+                if not s.is_union():
+                    raise ValueError(f"Cannot project an intersection of sketches: {node}")
+                for idx in idxs:
+                    if idx not in s.idxs:
+                        raise ValueError(f"Cannot project onto {idx}, which is not in {arg}")
+                cols = [s.idxs.index(idx) for idx in idxs]
+                streams = frozenset(
+                    Stream(st.tns, tuple(st.cols[c] for c in cols), st.diagonal)
+                    for st in s.streams
+                )
+                return SketchedSet(tuple(idxs), streams, bool)
+            case _:
+                raise ValueError(f"Cannot sketch the set {node}")
+
+    def pair(self, left, right) -> tuple[SketchedSet, SketchedSet]:
+        a, b = self.sketched(left), self.sketched(right)
+        if len(a.idxs) != len(b.idxs):
+            raise ValueError(f"Cannot combine sets of different arity: {left}, {right}")
+        return a, b
+
+    def combine(self, a: SketchedSet, b: SketchedSet, op) -> SketchedSet:
+        # Columns are matched by position, as in `simplify`.
+        def member(present):
+            return op(a.member(present & a.streams), b.member(present & b.streams))
+
+        return SketchedSet(a.idxs, a.streams | b.streams, member)
+
+    def projected(self, idxs, pred) -> set[sbn.Index]:
+        """
+        Return the indices of `pred` outside `idxs`, which must not be
+        shared by both sides of a conjunction.
+        """
+        match pred:
+            case sbn.IsNonFill(_, tns_idxs):
+                return {idx for idx in tns_idxs if idx not in idxs}
+            case sbn.And(x, y):
+                xs, ys = self.projected(idxs, x), self.projected(idxs, y)
+                if xs & ys:
+                    raise ValueError(f"Cannot sketch a join over {min(xs & ys, key=str)}: {pred}")
+                return xs | ys
+            case sbn.SetBuilderTree():
+                return set().union(*(self.projected(idxs, arg) for arg in pred.children))
+            case _:
+                return set()
+
+    def predicate(self, idxs, pred, positive):
+        """
+        Return the streams of `pred` and its membership function, given the
+        indices of its set.
+        """
+        match pred:
+            case sbn.IsNonFill(sbn.Variable(tns), tns_idxs):
+                stream = self.stream(idxs, tns, tns_idxs, positive)
+                return frozenset({stream}), lambda present: stream in present
+            case sbn.And(x, y):
+                (xs, xf), (ys, yf) = self.predicate(idxs, x, positive), self.predicate(idxs, y, positive)
+                return xs | ys, lambda present: xf(present) and yf(present)
+            case sbn.Or(x, y):
+                (xs, xf), (ys, yf) = self.predicate(idxs, x, positive), self.predicate(idxs, y, positive)
+                return xs | ys, lambda present: xf(present) or yf(present)
+            case sbn.Not(x):
+                xs, xf = self.predicate(idxs, x, False)
+                return xs, lambda present: not xf(present)
+            case sbn.Exists(idx, body) if idx not in idxs:
+                if not positive:
+                    raise ValueError(f"Cannot sketch a negated quantifier: {pred}")
+                return self.predicate(idxs, body, positive)
+            case _:
+                raise ValueError(f"Cannot sketch the predicate {pred}")
+
+    def stream(self, idxs, tns, tns_idxs, positive) -> Stream:
+        first = {}
+        diagonal = []
+        for n, idx in enumerate(tns_idxs):
+            if idx in first:
+                diagonal.append((first[idx], n))
+            else:
+                first[idx] = n
+        for idx in idxs:
+            if idx not in first:
+                raise ValueError(f"Index {idx} of the set is unbounded by {tns}")
+        if not positive and any(idx not in idxs for idx in first):
+            raise ValueError(f"Cannot sketch the negation of a projection of {tns}")
+        return Stream(tns, tuple(first[idx] for idx in idxs), tuple(diagonal))
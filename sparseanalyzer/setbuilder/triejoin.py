@@ -0,0 +1,198 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..coordinates import Relation, unique_rows
+
+
+@dataclass(frozen=True)
+class Trie:
+    """
+    Trie
+
+    The distinct tuples of a relation, as a trie with one level per column.
+    Each level is stored like a compressed sparse fiber: the children of a
+    node are a contiguous, sorted run of the next level.
+
+    Attributes:
+        idxs: The variable of each level, in join order.
+        keys: For each level, `parent * width + value` of each node, sorted.
+        offsets: For each level, where the children of each node of the
+            previous level (or of the root) start, with a final end offset.
+        widths: For each level, one more than its largest value.
+    """
+
+    idxs: tuple
+    keys: tuple[np.ndarray, ...]
+    offsets: tuple[np.ndarray, ...]
+    widths: tuple[int, ...]
+
+    @classmethod
+    def build(cls, rel: Relation, order) -> "Trie":
+        """
+        Return the trie of `rel` with its columns in the order they appear in
+        `order`.
+        """
+        idxs = tuple(idx for idx in order if idx in rel.idxs)
+        coords = unique_rows(rel.coords[:, [rel.idxs.index(idx) for idx in idxs]])
+        parent = np.zeros(len(coords), dtype=np.int64)
+        parents = 1
+        keys, offsets, widths = [], [], []
+        for col in coords.T:
+            width = int(col.max()) + 1 if len(col) else 1
+            if parents * width >= 2**63:
+                raise ValueError(f"Trie level of {parents} nodes and width {width} overflows")
+            key = parent * width + col
+            level, parent = np.unique(key, return_inverse=True)
+            keys.append(level)
+            offsets.append(np.searchsorted(level, np.arange(parents + 1) * width))
+            widths.append(width)
+            parents = len(level)
+        return cls(idxs, tuple(keys), tuple(offsets), tuple(widths))
+
+    def children(self, depth, nodes) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the start and number of children of each of `nodes`.
+        """
+        offsets = self.offsets[depth]
+        return offsets[nodes], offsets[nodes + 1] - offsets[nodes]
+
+    def values(self, depth, positions) -> np.ndarray:
+        return self.keys[depth][positions] % self.widths[depth]
+
+    def find(self, depth, nodes, values) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return whether each of `nodes` has a child for the matching entry of
+        `values`, and the position of that child.
+        """
+        width = self.widths[depth]
+        level = self.keys[depth]
+        inside = (values >= 0) & (values < width)
+        key = nodes * width + np.where(inside, values, 0)
+        pos = np.minimum(np.searchsorted(level, key), len(level) - 1)
+        found = inside & (level[pos] == key) if len(level) else np.zeros(len(key), bool)
+        return found, pos
+
+
+def index_order(rels, keep=()) -> tuple:
+    """
+    Return an order of the variables of `rels` for a generic join.
+
+    Variables are chosen greedily. A variable sharing a relation with those
+    already chosen is preferred, so that each step intersects rather than
+    multiplies; then one in more relations, as each intersection can only
+    shrink the result; then one with fewer distinct values. Variables of
+    `keep` precede the others, so that the rest can be counted rather than
+    enumerated.
+    """
+    idxs = list(dict.fromkeys(idx for rel in rels for idx in rel.idxs))
+    distinct = {}
+    for idx in idxs:
+        distinct[idx] = min(
+            len(np.unique(rel.coords[:, rel.idxs.index(idx)])) for rel in rels if idx in rel.idxs
+        )
+    order = []
+    while idxs:
+        pending = [idx for idx in idxs if idx in keep] or idxs
+
+        def score(idx):
+            linked = any(idx in rel.idxs and set(order) & set(rel.idxs) for rel in rels)
+            degree = sum(idx in rel.idxs for rel in rels)
+            return (not linked, -degree, distinct[idx], str(idx))
+
+        idx = min(pending, key=score)
+        order.append(idx)
+        idxs.remove(idx)
+    return tuple(order)
+
+
+class TrieJoin:
+    """
+    TrieJoin
+
+    A generic join of relations with worst-case optimal complexity. Each
+    relation is built into a `Trie` in a common variable order, and
+    variables are bound one at a time: each partial binding proposes the
+    values of its smallest candidate trie and keeps those found in every
+    other trie of the variable, so no intermediate result is larger than
+    the largest the output could be.
+
+    Every partial binding is extended at once with vectorized searches, so
+    there are no Python loops over tuples.
+
+    Attributes:
+        rels: The relations to join.
+        order: The variable order of the join.
+        tries: The trie of each relation in `order`.
+    """
+
+    def __init__(self, rels, order=None, keep=()):
+        self.rels = list(rels)
+        self.order = tuple(order) if order is not None else index_order(self.rels, keep)
+        self.tries = [Trie.build(rel, self.order) for rel in self.rels]
+
+    def bind(self, idxs):
+        """
+        Return the bindings of the variables `idxs`, a prefix of `order`, and
+        the node each binding reaches in each trie.
+        """
+        nodes = [np.zeros(1, dtype=np.int64) for _ in self.tries]
+        depths = [0] * len(self.tries)
+        coords = np.zeros((1, 0), dtype=np.int64)
+        for idx in idxs:
+            coords, nodes = self.step(idx, coords, nodes, depths)
+            for n, trie in enumerate(self.tries):
+                if idx in trie.idxs:
+                    depths[n] += 1
+        return coords, nodes, depths
+
+    def step(self, idx, coords, nodes, depths):
+        # Extend every binding with the values of `idx` found in all tries.
+        tries = [n for n, trie in enumerate(self.tries) if idx in trie.idxs]
+        if not tries:
+            raise ValueError(f"{idx} is not bound by any relation")
+        spans = [self.tries[n].children(depths[n], nodes[n]) for n in tries]
+        best = np.argmin(np.stack([count for _, count in spans]), axis=0)
+        new_coords, new_nodes = [], [[] for _ in self.tries]
+        for b, n in enumerate(tries):
+            rows = np.flatnonzero(best == b)
+            start, count = spans[b][0][rows], spans[b][1][rows]
+            rows = np.repeat(rows, count)
+            pos = np.repeat(start - np.cumsum(count) + count, count) + np.arange(len(rows))
+            vals = self.tries[n].values(depths[n], pos)
+            keep = np.ones(len(rows), dtype=bool)
+            found = {n: pos}
+            for m in tries:
+                if m != n:
+                    hit, found[m] = self.tries[m].find(depths[m], nodes[m][rows], vals)
+                    keep &= hit
+            rows, vals = rows[keep], vals[keep]
+            new_coords.append(np.concatenate([coords[rows], vals[:, None]], axis=1))
+            for m in range(len(self.tries)):
+                new_nodes[m].append(found[m][keep] if m in found else nodes[m][rows])
+        coords = np.concatenate(new_coords)
+        nodes = [np.concatenate(parts) for parts in new_nodes]
+        return coords, nodes
+
+    def evaluate(self) -> Relation:
+        """
+        Return the join, with its columns in `order`.
+        """
+        coords, _, _ = self.bind(self.order)
+        return Relation(self.order, coords, np.ones(len(coords), dtype=np.int64))
+
+    def count(self) -> int:
+        """
+        Return the number of tuples in the join. The last variable is
+        counted rather than enumerated when a single relation binds it.
+        """
+        if not self.order:
+            return 1
+        *head, last = self.order
+        tries = [n for n, trie in enumerate(self.tries) if last in trie.idxs]
+        if len(tries) != 1:
+            return len(self.evaluate())
+        _, nodes, depths = self.bind(head)
+        (n,) = tries
+        _, count = self.tries[n].children(depths[n], nodes[n])
+        return int(count.sum())
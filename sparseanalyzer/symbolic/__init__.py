@@ -1,6 +1,7 @@
-from .dataflow import BasicBlock, ControlFlowGraph
+from .dataflow import BasicBlock, ControlFlowGraph, liveness
 from .environment import Context, NamedTerm, Namespace, Reflector, ScopedDict
 from .gensym import gensym
+from .polynomial import Polynomial
 from .rewriters import (
     Chain,
     Fixpoint,
@@ -26,6 +27,7 @@ __all__ = [
     "Fixpoint",
     "NamedTerm",
     "Namespace",
+    "Polynomial",
     "PostOrderDFS",
     "PostWalk",
     "PreOrderDFS",
@@ -39,4 +41,5 @@ __all__ = [
     "ftype",
     "gensym",
     "literal_repr",
+    "liveness",
 ]
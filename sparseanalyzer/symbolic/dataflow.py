@@ -68,3 +68,28 @@ class ControlFlowGraph:
         # Use list comprehension with join for better performance
         block_strings = [str(block) for block in blocks]
         return "\n\n".join(block_strings)
+
+
+def liveness(
+    cfg: ControlFlowGraph, uses, defs
+) -> tuple[dict[str, set], dict[str, set]]:
+    """
+    Compute the variables live on entry to and exit from each block of `cfg`,
+    where `uses(stmt)` and `defs(stmt)` return the variables a statement
+    reads and writes.
+    """
+    live_in: dict[str, set] = {bid: set() for bid in cfg.blocks}
+    live_out: dict[str, set] = {bid: set() for bid in cfg.blocks}
+    changed = True
+    while changed:
+        changed = False
+        for bid, block in reversed(cfg.blocks.items()):
+            out = set().union(*(live_in[succ.id] for succ in block.successors))
+            live = set(out)
+            for stmt in reversed(block.statements):
+                live -= set(defs(stmt))
+                live |= set(uses(stmt))
+            if out != live_out[bid] or live != live_in[bid]:
+                live_out[bid], live_in[bid] = out, live
+                changed = True
+    return live_in, live_out
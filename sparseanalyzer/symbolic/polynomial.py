@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from fractions import Fraction
+from functools import cached_property
+from numbers import Rational
+from typing import Any
+
+# A monomial is a tuple of (symbol, exponent) pairs with nonzero exponents,
+# sorted by `symbol_key`.
+Monomial = tuple[tuple[Any, int], ...]
+
+
+def symbol_key(sym: Any) -> tuple[str, str]:
+    return (type(sym).__name__, str(sym))
+
+
+def _coefficient(c: Rational) -> Rational:
+    c = Fraction(c)
+    return c.numerator if c.denominator == 1 else c
+
+
+def _mul_monomials(a: Monomial, b: Monomial) -> Monomial:
+    exps = dict(a)
+    for sym, e in b:
+        exps[sym] = exps.get(sym, 0) + e
+    mono = ((s, e) for s, e in exps.items() if e != 0)
+    return tuple(sorted(mono, key=lambda t: symbol_key(t[0])))
+
+
+@dataclass(frozen=True)
+class Polynomial:
+    """
+    Polynomial
+
+    A Laurent polynomial with rational coefficients in arbitrary hashable
+    symbols (e.g. einsum `Index`es, or "k" for a processor count). Negative
+    exponents allow exact division by monomials, so costs such as `n // k`
+    stay polynomial.
+
+    Polynomials are immutable and canonical, so equal polynomials compare
+    and hash equal.
+
+    Attributes:
+        terms: Pairs of monomials and their nonzero coefficients, sorted.
+    """
+
+    terms: tuple[tuple[Monomial, Rational], ...] = ()
+
+    @classmethod
+    def make(cls, terms: dict[Monomial, Rational]) -> Polynomial:
+        """
+        Build the canonical polynomial with the given coefficients.
+        """
+        return cls(
+            tuple(
+                sorted(
+                    ((mono, _coefficient(c)) for mono, c in terms.items() if c != 0),
+                    key=lambda t: [(symbol_key(s), e) for s, e in t[0]],
+                )
+            )
+        )
+
+    @classmethod
+    def symbol(cls, sym: Any) -> Polynomial:
+        return cls.make({((sym, 1),): 1})
+
+    @classmethod
+    def constant(cls, c: Rational) -> Polynomial:
+        return cls.make({(): c})
+
+    @classmethod
+    def coerce(cls, other) -> Polynomial | None:
+        if isinstance(other, Polynomial):
+            return other
+        if isinstance(other, Rational):
+            return cls.constant(other)
+        return None
+
+    @property
+    def symbols(self) -> tuple[Any, ...]:
+        syms = {sym for mono, _ in self.terms for sym, _ in mono}
+        return tuple(sorted(syms, key=symbol_key))
+
+    def degree(self, sym: Any) -> int:
+        """
+        Return the highest exponent of `sym` in any term.
+        """
+        return max((dict(mono).get(sym, 0) for mono, _ in self.terms), default=0)
+
+    def __add__(self, other):
+        other = self.coerce(other)
+        if other is None:
+            return NotImplemented
+        terms = dict(self.terms)
+        for mono, c in other.terms:
+            terms[mono] = terms.get(mono, 0) + c
+        return self.make(terms)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return self.make({mono: -c for mono, c in self.terms})
+
+    def __sub__(self, other):
+        other = self.coerce(other)
+        if other is None:
+            return NotImplemented
+        return self + -other
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        other = self.coerce(other)
+        if other is None:
+            return NotImplemented
+        terms: dict[Monomial, Rational] = {}
+        for a, c in self.terms:
+            for b, d in other.terms:
+                mono = _mul_monomials(a, b)
+                terms[mono] = terms.get(mono, 0) + c * d
+        return self.make(terms)
+
+    __rmul__ = __mul__
+
+    def __pow__(self, n: int):
+        if n < 0:
+            return self.reciprocal() ** -n
+        res = Polynomial.constant(1)
+        for _ in range(n):
+            res = res * self
+        return res
+
+    def reciprocal(self) -> Polynomial:
+        """
+        Return `1 / self`, which must be a single term.
+        """
+        if len(self.terms) != 1:
+            raise ValueError(f"Cannot invert {self}: not a monomial")
+        ((mono, c),) = self.terms
+        return self.make({tuple((s, -e) for s, e in mono): 1 / Fraction(c)})
+
+    def __truediv__(self, other):
+        other = self.coerce(other)
+        if other is None:
+            return NotImplemented
+        return self * other.reciprocal()
+
+    # Dimension sizes are assumed to divide evenly, so integer division is
+    # exact.
+    __floordiv__ = __truediv__
+
+    def __rtruediv__(self, other):
+        return self.reciprocal() * other
+
+    __rfloordiv__ = __rtruediv__
+
+    def diff(self, sym: Any) -> Polynomial:
+        """
+        Return the partial derivative with respect to `sym`.
+        """
+        terms: dict[Monomial, Rational] = {}
+        for mono, c in self.terms:
+            exps = dict(mono)
+            e = exps.get(sym, 0)
+            if e == 0:
+                continue
+            new = _mul_monomials(mono, ((sym, -1),))
+            terms[new] = terms.get(new, 0) + c * e
+        return self.make(terms)
+
+    @cached_property
+    def source(self) -> str:
+        """
+        Python source of a function evaluating this polynomial at `env`.
+        """
+        names = {sym: f"x{n}" for n, sym in enumerate(self.symbols)}
+        lines = ["def evaluate(env):"]
+        for n, name in enumerate(names.values()):
+            lines.append(f"    {name} = env[s{n}]")
+        exprs = []
+        for mono, c in self.terms:
+            c = Fraction(c)
+            num = [str(c.numerator)]
+            den = [str(c.denominator)] if c.denominator != 1 else []
+            for sym, e in mono:
+                factor = names[sym] if abs(e) == 1 else f"{names[sym]} ** {abs(e)}"
+                (num if e > 0 else den).append(factor)
+            if num[0] == "1" and len(num) > 1:
+                num.pop(0)
+            expr = " * ".join(num)
+            if den:
+                expr = f"{expr} / ({' * '.join(den)})"
+            exprs.append(expr)
+        lines.append(f"    return {' + '.join(exprs) or '0'}")
+        return "\n".join(lines) + "\n"
+
+    @cached_property
+    def evaluator(self):
+        """
+        A compiled function evaluating this polynomial at a mapping of
+        symbols to values. Values may be NumPy arrays, which broadcast.
+        """
+        scope = {f"s{n}": sym for n, sym in enumerate(self.symbols)}
+        exec(compile(self.source, "<polynomial>", "exec"), scope)
+        return scope["evaluate"]
+
+    def __call__(self, env):
+        return self.evaluator(env)
+
+    def __str__(self):
+        if not self.terms:
+            return "0"
+        strs = []
+        for mono, c in self.terms:
+            factors = [str(s) if e == 1 else f"{s}^{e}" for s, e in mono]
+            if c == -1 and factors:
+                factors[0] = f"-{factors[0]}"
+            elif c != 1 or not factors:
+                factors.insert(0, str(c))
+            strs.append("*".join(factors))
+        return " + ".join(strs).replace("+ -", "- ")
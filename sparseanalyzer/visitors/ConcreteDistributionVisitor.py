@@ -1,23 +1,35 @@
+from numbers import Integral
+
+import numpy as np
+
+from .. import einsum as ein
 from .EinsumVisitor import EinsumVisitor
 
 class RowDistributionVisitor(EinsumVisitor):
     """
     Track the no of data transfers in a distributed einsum application.
-    For now, we assume that num nodes = num dims in split.
+    Each tensor is split into contiguous blocks of its first dimension, one per processor.
+
+    :param splits Optional mapping of tensor aliases (or their names) to the boundaries of their blocks: an array of
+    k + 1 nondecreasing offsets from 0 to the size of the split dimension, so that processor p owns
+    [splits[p], splits[p + 1]). Blocks may be uneven or empty. Tensors without one are split as evenly as possible.
     """
-    def __init__(self, env, k):
+    def __init__(self, env, k, splits=None):
         self._env = env
         self._total_comms = 0
-        # Which values of which array are owned by each?
+        # Where does the block of each processor start, per array? (k + 1 offsets)
         self._ownership_dictionary = dict()
         # On which dimensions do we perform the split?
         self._split_dims = dict()
         # Which arrays have already been totally distributed in memory?
         self._cached_arrs = set()
         self._k = k
+        self._splits = {ein.Alias(tns) if isinstance(tns, str) else tns: bounds for tns, bounds in (splits or {}).items()}
+        # How many values does each processor receive? (None for symbolic sizes)
+        self._comms_per_processor = np.zeros(k, dtype=np.int64) if isinstance(k, Integral) else None
 
     def reset(self):
-        self.__init__(self._env, self._k)
+        self.__init__(self._env, self._k, self._splits)
 
     """
     Useful properties to reason about
@@ -31,6 +43,22 @@ class RowDistributionVisitor(EinsumVisitor):
     @property
     def split_dims(self):
         return self._split_dims
+    @property
+    def comms_per_processor(self):
+        return self._comms_per_processor
+
+    """
+    The processor owning each of `coords` along the split dimension of `tns`.
+    """
+    def owner(self, tns, coords):
+        return np.searchsorted(self._ownership_dictionary[tns], coords, side='right') - 1
+
+    """
+    The half-open range of the split dimension of `tns` owned by processor `p`.
+    """
+    def owned(self, tns, p):
+        bounds = self._ownership_dictionary[tns]
+        return range(int(bounds[p]), int(bounds[p + 1]))
 
     def apply_call(self, node):
         # For now, only apply to binary functions.
@@ -40,41 +68,69 @@ class RowDistributionVisitor(EinsumVisitor):
         # Binary operations will be performed by the portion of the lhs that this node already owns to the rhs.
         # hence, we only need to distribute the rhs
         access_to_distribute = node.args[1]
+        # Only accesses are modelled.
+        if type(access_to_distribute).__name__ != 'Access':
+            raise NotImplementedError(f'Cannot distribute {type(access_to_distribute).__name__} arguments')
+        # Scalars are replicated on every processor, so they are never sent.
+        if not access_to_distribute.idxs:
+            return
 
         # Only incur a data transfer cost if we haven't already shared this array between all processors.
         if access_to_distribute.tns not in self._cached_arrs:
             self._cached_arrs.add(access_to_distribute.tns)
             split_dim = self._split_dims[access_to_distribute.tns]
 
-            # Number of values allocated to each processor.
-            values_per_split = self._env[split_dim] // self._k
+            # Number of values in each row of the split.
+            values_per_row = 1
             for dim in access_to_distribute.idxs:
                 # Processors do not need to transfer the dimensions they already own.
                 if not dim == split_dim:
-                    values_per_split *= self._env[dim]
+                    values_per_row *= self._env[dim]
+
+            if self._comms_per_processor is None:
+                # Symbolic sizes: each of the k processors receives the (k - 1) / k of the rows it does not own.
+                self._total_comms += self._env[split_dim] * values_per_row * (self._k - 1)
+                return
 
-            # Each processor must receive each split that it doesn't already own.
-            # i.e. k-1 splits.
-            transfers_per_processor = values_per_split * (self._k - 1)
-            # This communication cost is incurred for each processor.
-            self._total_comms += transfers_per_processor * self._k
+            # Each processor must receive every row that it doesn't already own.
+            owned = np.diff(self._ownership_dictionary[access_to_distribute.tns])
+            received = (self._env[split_dim] - owned) * values_per_row
+            self._comms_per_processor += received
+            self._total_comms += int(received.sum())
 
     def apply_access(self, node):
         # Once ownership has been distributed, we assume needed results are cached.
-        if node.tns not in self._ownership_dictionary:
-            self._ownership_dictionary[node.tns] = dict()
+        if node.tns not in self._ownership_dictionary and node.idxs:
             # Split each on the first dimension.
             split_dim = node.idxs[0]
             self._split_dims[node.tns] = split_dim
 
-            # Split a single dimension between the processors.
-            if not self._env[split_dim] % self._k == 0:
-                raise Exception("Not supported!")
+            # Symbolic sizes (see `comms_polynomial`) have no concrete blocks.
+            if not isinstance(self._env[split_dim], Integral) or not isinstance(self._k, Integral):
+                self._ownership_dictionary[node.tns] = None
+                return
+
+            size = self._env[split_dim]
+            if node.tns in self._splits:
+                bounds = np.asarray(self._splits[node.tns], dtype=np.int64)
+                if bounds.shape != (self._k + 1,) or bounds[0] != 0 or bounds[-1] != size or np.any(np.diff(bounds) < 0):
+                    raise ValueError(f"Invalid split of {node.tns} along {split_dim} of size {size}: {bounds}")
+            else:
+                bounds = np.arange(self._k + 1, dtype=np.int64) * size // self._k
+            self._ownership_dictionary[node.tns] = bounds
+
+    """
+    Report the total comms of `node` as a polynomial in the sizes of its dimensions and in the processor count 'nprocs'.
+    """
+    @staticmethod
+    def comms_polynomial(node):
+        from ..symbolic import PostOrderDFS
+        from ..symbolic.polynomial import Polynomial
 
-            dims_per_node = self._env[split_dim] // self._k
-            for i in range(0, self._k):
-                # Inclusive lower and upper bounds.
-                self._ownership_dictionary[node.tns][i] = range(i * dims_per_node, i * dims_per_node + dims_per_node - 1)
+        dims = {idx for acc in PostOrderDFS(node) if type(acc).__name__ == 'Access' for idx in acc.idxs}
+        visitor = RowDistributionVisitor({dim: Polynomial.symbol(dim) for dim in dims}, Polynomial.symbol('nprocs'))
+        visitor.visit(node)
+        return Polynomial.constant(0) + visitor.total_comms
 
     def apply_literal(self, node):
         pass
@@ -89,6 +145,6 @@ class RowDistributionVisitor(EinsumVisitor):
         print("Data distribution report:")
         print("Dimensions: ", self._env)
         print("Total comms: ", self._total_comms)
-        print("Rows owned by processors:")
+        print("Block boundaries of processors:")
         for data in self._ownership_dictionary:
             print(f"{data}: {self._ownership_dictionary[data]}")
\ No newline at end of file
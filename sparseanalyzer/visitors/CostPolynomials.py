@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from ..symbolic.polynomial import Polynomial
+from .ConcreteDistributionVisitor import RowDistributionVisitor
+from .CountOpsVisitor import CountOpsVisitor
+
+
+@dataclass(frozen=True)
+class CostPolynomials:
+    """
+    CostPolynomials
+
+    The costs of an einsum as polynomials in the sizes of its dimensions
+    (keyed by `Index`) and the processor count 'nprocs'. Each polynomial
+    compiles to a fast evaluator on first use, e.g.
+    `costs.reads({i: 4, j: 8})`, which also accepts NumPy arrays of sizes to
+    rank many scenarios at once.
+
+    Attributes:
+        reads: The total reads, as counted by `CountOpsVisitor`.
+        writes: The total writes, as counted by `CountOpsVisitor`.
+        comms: The total comms of a row split, as counted by
+            `RowDistributionVisitor`, or None if it cannot model the tree.
+    """
+
+    reads: Polynomial
+    writes: Polynomial
+    comms: Polynomial | None
+
+
+@lru_cache(maxsize=256)
+def cost_polynomials(tree) -> CostPolynomials:
+    """
+    Return the symbolic costs of `tree`, cached per tree.
+    """
+    visitor = CountOpsVisitor({})
+    visitor.visit(tree)
+    try:
+        comms = RowDistributionVisitor.comms_polynomial(tree)
+    except NotImplementedError:
+        comms = None
+    return CostPolynomials(visitor.reads_polynomial(), visitor.writes_polynomial(), comms)
@@ -54,19 +54,28 @@ class CountOpsVisitor(EinsumVisitor):
             print(dim)
 
     """
-    Report the total reads a matrix operation will require in a given env.
-    
-    This is more complex than simply multiplying the size of the dimensions, because some dimensions are iterated over multiple times.
+    How many of the read tensors are indexed by each dimension.
     """
-    def total_reads(self):
+    def read_factors(self):
         factors = {dim: 0 for dim in self._read_dims}
         for tns in self._read_tensor_index_map:
             for idx in self._read_tensor_index_map[tns]:
                 factors[idx] += 1
+        return factors
+
+    """
+    Report the total reads a matrix operation will require in a given env.
+    
+    This is more complex than simply multiplying the size of the dimensions, because some dimensions are iterated over multiple times.
+    """
+    def total_reads(self, env=None):
+        if env is None:
+            env = self._env
+        factors = self.read_factors()
 
         cost = 1
         for dim in self._read_dims:
-            cost = cost * factors[dim] * self._env[dim]
+            cost = cost * factors[dim] * env[dim]
 
         return cost
 
@@ -75,9 +84,67 @@ class CountOpsVisitor(EinsumVisitor):
     
     Since einsum requires only a single matrix be written to, we can report this by multiplying width * height of dim.
     """
-    def total_writes(self):
+    def total_writes(self, env=None):
+        if env is None:
+            env = self._env
         cost = 1
         for dim in self._write_dims:
-            cost = cost * self._env[dim]
+            cost = cost * env[dim]
+
+        return cost
+
+    # Symbolic costs
+
+    """
+    Report the total reads as a polynomial in the sizes of the dimensions, whatever the env.
+    """
+    def reads_polynomial(self):
+        from ..symbolic.polynomial import Polynomial
 
-        return cost
\ No newline at end of file
+        env = {dim: Polynomial.symbol(dim) for dim in self._read_dims}
+        return Polynomial.constant(1) * self.total_reads(env)
+
+    """
+    Report the total writes as a polynomial in the sizes of the dimensions, whatever the env.
+    """
+    def writes_polynomial(self):
+        from ..symbolic.polynomial import Polynomial
+
+        env = {dim: Polynomial.symbol(dim) for dim in self._write_dims}
+        return Polynomial.constant(1) * self.total_writes(env)
+
+    # Parameter sweeps
+
+    """
+    Report the total reads for a batch of environments at once.
+
+    :param envs Mapping of dimension titles to arrays of their sizes, one entry per environment.
+    The arrays are broadcast against each other, so a grid of sizes can be given with open meshes.
+    Returns an int64 array of costs with the broadcast shape, and raises an OverflowError
+    rather than wrapping when a cost does not fit.
+    """
+    def sweep_reads(self, envs):
+        factors = self.read_factors()
+        return self._sweep_product(envs, {dim: factors[dim] for dim in self._read_dims})
+
+    """
+    Report the total writes for a batch of environments at once. See `sweep_reads`.
+    """
+    def sweep_writes(self, envs):
+        return self._sweep_product(envs, {dim: 1 for dim in self._write_dims})
+
+    def _sweep_product(self, envs, factors):
+        import numpy as np
+
+        shape = np.broadcast_shapes(*(np.shape(size) for size in envs.values()))
+        cost = np.ones(shape, dtype=np.int64)
+        # The same product in floating point, which is within rounding of the exact cost.
+        bound = np.ones(shape, dtype=np.float64)
+        for dim, factor in factors.items():
+            size = np.asarray(envs[dim], dtype=np.int64)
+            cost = cost * factor * size
+            bound = bound * factor * size
+        if np.any(bound >= 2.0 ** 63):
+            raise OverflowError(f"Swept costs up to {bound.max():.3g} do not fit in int64")
+
+        return cost
@@ -0,0 +1,209 @@
+import operator
+from itertools import combinations, product
+from math import exp, prod
+
+import numpy as np
+
+from .. import einsum as ein
+from ..coordinates import contract, coordinates, relation, unique_rows
+from ..operators import overwrite, promote_max, promote_min
+from .EinsumVisitor import EinsumVisitor
+
+# Pointwise functions which are zero wherever any argument is zero.
+intersect_ops = {operator.mul, operator.and_, np.logical_and}
+# Pointwise functions which are zero where all arguments are zero.
+union_ops = {operator.add, operator.sub, operator.or_, operator.xor, np.logical_or, promote_min, promote_max}
+# Pointwise functions which are zero wherever their first argument is zero.
+first_ops = {operator.truediv, operator.floordiv, operator.mod, operator.lshift, operator.rshift}
+# Unary functions which map zero to zero.
+unary_ops = {operator.pos, operator.neg, operator.abs, np.sqrt, np.sin, np.tan, np.sinh, np.tanh,
+             np.arcsin, np.arctan, np.arcsinh, np.log1p}
+
+class SparseCountOpsVisitor(EinsumVisitor):
+    """
+    :param env Mapping of dimension titles to their size, and of tensor aliases to their values or densities.
+    A tensor may be bound to a scipy sparse matrix, a pydata sparse array or a dense array, in which case costs are
+    counted exactly from its stored coordinates, or to a float density, in which case its nonzeros are assumed to
+    be spread uniformly at random. Unbound tensors are dense.
+
+    Each einsum is only evaluated where its pointwise expression may be nonzero: products iterate over the
+    intersection of the nonzeros of their arguments, sums over their union. Counts come from vectorized joins of the
+    coordinates (see `coordinates.contract`), so they stay fast and exact for very large operands.
+    """
+    def __init__(self, env):
+        self._env = env
+
+        self._reads = 0
+        self._writes = 0
+        self._flops = 0
+        self._relations = dict()
+        self._counts = dict()
+
+    def reset(self):
+        self.__init__(self._env)
+
+    # Visitor methods
+
+    def apply_literal(self, node):
+        pass
+    def apply_index(self, node):
+        pass
+    def apply_alias(self, node):
+        pass
+    def apply_call(self, node):
+        pass
+    def apply_access(self, node):
+        pass
+
+    def apply_einsum(self, node):
+        loops = tuple(sorted(node.arg.get_idxs(), key=lambda idx: idx.name))
+        support = self.support(node.arg)
+        iterations = self.count(support, loops)
+
+        for access in self.accesses(node.arg):
+            self._reads += self.count([term + [access] for term in support], loops)
+
+        for call in self.calls(node.arg):
+            self._flops += self.count(self.support(call), loops)
+
+        writes = self.count_outputs(support, loops, node.idxs, iterations)
+        self._writes += writes
+        if node.op.val != overwrite:
+            # Each further iteration combines into an existing output.
+            self._flops += iterations - writes
+
+    # Supports
+
+    """
+    The coordinates where `node` may be nonzero, as a union of intersections (lists of accesses).
+    An empty intersection is the whole iteration space.
+    """
+    def support(self, node):
+        match node:
+            case ein.Access() if self.is_sparse(node):
+                return [[node]]
+            case ein.Call(ein.Literal(func), args) if func in intersect_ops:
+                return [sum(terms, []) for terms in product(*(self.support(arg) for arg in args))]
+            case ein.Call(ein.Literal(func), args) if func in union_ops and len(args) > 1:
+                return [term for arg in args for term in self.support(arg)]
+            case ein.Call(ein.Literal(func), args) if func in first_ops and len(args) > 1:
+                return self.support(args[0])
+            case ein.Call(ein.Literal(func), (arg,)) if func in unary_ops:
+                return self.support(arg)
+            case _:
+                return [[]]
+
+    def is_sparse(self, access):
+        val = self._env.get(access.tns)
+        if val is None:
+            return False
+        density = self.density(access)
+        return density is None or density < 1.0
+
+    def accesses(self, node):
+        if isinstance(node, ein.Access):
+            yield node
+        elif isinstance(node, ein.Call):
+            for arg in node.args:
+                yield from self.accesses(arg)
+
+    def calls(self, node):
+        if isinstance(node, ein.Call):
+            for arg in node.args:
+                yield from self.calls(arg)
+            yield node
+
+    # Counting
+
+    def relation(self, access):
+        key = (access.tns, access.idxs)
+        if key not in self._relations:
+            tns = self._env[access.tns]
+            coords = coordinates(tns)
+            if not getattr(tns, 'has_canonical_format', True):
+                # Duplicate entries of a COO matrix are a single nonzero.
+                coords = unique_rows(coords)
+            self._relations[key] = relation(coords, access.idxs)
+        return self._relations[key]
+
+    def density(self, access):
+        val = self._env.get(access.tns, 1.0)
+        return float(val) if isinstance(val, (int, float)) else None
+
+    """
+    The number of points of `loops` in the intersection of the accesses in `term`.
+    Exact accesses are joined, and accesses bound to densities scale the result.
+    """
+    def count_term(self, term, loops):
+        key = (frozenset((acc.tns, acc.idxs) for acc in term), loops)
+        if key not in self._counts:
+            self._counts[key] = self._count_term(term, loops)
+        return self._counts[key]
+
+    def _count_term(self, term, loops):
+        exact = {}
+        scale = 1.0
+        for access in term:
+            density = self.density(access)
+            if density is None:
+                exact[(access.tns, access.idxs)] = self.relation(access)
+            else:
+                scale *= density
+        covered = {idx for rel in exact.values() for idx in rel.idxs}
+        free = prod(self._env[idx] for idx in loops if idx not in covered)
+        count = contract(list(exact.values())).count() * free
+        return count if scale == 1.0 else count * scale
+
+    """
+    The number of points of `loops` in a union of intersections, by inclusion-exclusion.
+    """
+    def count(self, support, loops):
+        total = 0
+        for n in range(1, len(support) + 1):
+            for terms in combinations(support, n):
+                term = list({(acc.tns, acc.idxs): acc for t in terms for acc in t}.values())
+                total += (-1) ** (n + 1) * self.count_term(term, loops)
+        return total
+
+    """
+    The number of distinct output coordinates written by `iterations` points of `support`.
+    Terms covering every output index are unioned by their distinct rows; only terms missing some are expanded.
+    """
+    def count_outputs(self, support, loops, idxs, iterations):
+        space = prod(self._env[idx] for idx in idxs)
+        exact = all(self.density(acc) is None for term in support for acc in term)
+        if not exact:
+            # Assume the iterations land on uniformly random outputs.
+            return space * (1 - exp(-iterations / space)) if space else 0
+        outputs = []
+        for term in support:
+            rels = list({(acc.tns, acc.idxs): self.relation(acc) for acc in term}.values())
+            rel = contract(rels, idxs)
+            missing = [idx for idx in idxs if idx not in rel.idxs]
+            if len(support) == 1:
+                return len(rel) * prod(self._env[idx] for idx in missing)
+            if len(rel) and len(missing) == len(idxs):
+                # The term reaches every output.
+                return space
+            coords = rel.coords
+            if missing:
+                shape = [self._env[idx] for idx in missing]
+                grid = np.indices(shape, dtype=np.int64).reshape(len(missing), prod(shape)).T
+                coords = np.concatenate([
+                    np.repeat(coords, len(grid), axis=0),
+                    np.tile(grid, (len(coords), 1)),
+                ], axis=1)
+            order = [(*rel.idxs, *missing).index(idx) for idx in idxs]
+            outputs.append(coords[:, order])
+        return len(unique_rows(np.concatenate(outputs)))
+
+    # Post-traversal analysis
+
+    def total_reads(self):
+        return self._reads
+
+    def total_writes(self):
+        return self._writes
+
+    def total_flops(self):
+        return self._flops
@@ -69,6 +69,29 @@ def test_report_writes():
 
 # test_report_writes()
 
+def test_sweep():
+    import numpy as np
+
+    count_visitor.reset()
+    tree = parse_einop("E[i] min= A[i,k] + D[k,j] << 1")
+    count_visitor.visit(tree)
+    # Every combination of sizes on a 5 x 6 x 7 grid.
+    i, k, j = np.ogrid[1:6, 1:7, 1:8]
+    envs = {einsum.Index("i"): i, einsum.Index("k"): k, einsum.Index("j"): j}
+    reads = count_visitor.sweep_reads(envs)
+    writes = count_visitor.sweep_writes(envs)
+    assert reads.shape == writes.shape == (5, 6, 7)
+    for n, m, l in np.ndindex(reads.shape):
+        visitor = CountOpsVisitor({dim: int(size[n, m, l]) for dim, size in
+                                   zip(envs, np.broadcast_arrays(i, k, j))})
+        visitor.visit(tree)
+        assert reads[n, m, l] == visitor.total_reads()
+        assert writes[n, m, l] == visitor.total_writes()
+
+    huge = {dim: np.array([1, 2 ** 40]) for dim in envs}
+    with pytest.raises(OverflowError):
+        count_visitor.sweep_reads(huge)
+
 def test_ownership_dict():
     env = {einsum.Index("i"): 8, einsum.Index("j"): 8, einsum.Index("k"): 8}
     visitor = RowDistributionVisitor(env, 8)
@@ -81,6 +104,141 @@ def test_ownership_dict():
 
 # test_ownership_dict()
 
+
+def test_cost_polynomials():
+    import numpy as np
+    from sparseanalyzer import cost_polynomials
+
+    i, j, k = einsum.Index("i"), einsum.Index("j"), einsum.Index("k")
+    for expr in ["E[i] min= A[i,k] + D[k,j] << 1", "D[i,j] += A[i,k] * B[k,j]"]:
+        tree = parse_einop(expr)
+        costs = cost_polynomials(tree)
+        assert cost_polynomials(parse_einop(expr)) is costs
+        for sizes, procs in [((2, 3, 4), 1), ((8, 4, 12), 4), ((6, 6, 6), 2)]:
+            env = dict(zip((i, j, k), sizes))
+            visitor = CountOpsVisitor(env)
+            visitor.visit(tree)
+            assert costs.reads(env) == visitor.total_reads()
+            assert costs.writes(env) == visitor.total_writes()
+            if costs.comms is None:
+                continue
+            dist = RowDistributionVisitor(env, procs)
+            dist.visit(tree)
+            assert costs.comms({**env, "nprocs": procs}) == dist.total_comms
+
+    # The shifted min-plus product is not modelled by RowDistributionVisitor.
+    assert cost_polynomials(parse_einop("E[i] min= A[i,k] + D[k,j] << 1")).comms is None
+
+    # D[i,j] += A[i,k] * B[k,j] ships (nprocs - 1) / nprocs of B to each processor.
+    comms = cost_polynomials(parse_einop("D[i,j] += A[i,k] * B[k,j]")).comms
+    assert str(comms) == "-j*k + j*k*nprocs"
+    assert comms.diff("nprocs") == comms.symbol(j) * comms.symbol(k)
+    procs = np.array([1, 2, 4, 8])
+    assert np.array_equal(comms({i: 8, j: 8, k: 8, "nprocs": procs}), 64 * (procs - 1))
+
+
+def pattern(M):
+    import numpy as np
+
+    return (M != 0).astype(np.int64)
+
+
+def test_sparse_count_ops():
+    import numpy as np
+    import scipy.sparse as sp
+    from sparseanalyzer import SparseCountOpsVisitor
+
+    A = sp.random(50, 40, density=0.05, format="csr", random_state=0)
+    B = sp.random(40, 30, density=0.05, format="coo", random_state=1)
+    i, j, k = einsum.Index("i"), einsum.Index("j"), einsum.Index("k")
+    env = {i: 50, k: 40, j: 30, einsum.Alias("A"): A, einsum.Alias("B"): B}
+
+    # Sparse matrix multiplication: one multiply per matching pair of nonzeros.
+    visitor = SparseCountOpsVisitor(env)
+    visitor.visit(parse_einop("C[i,j] += A[i,k] * B[k,j]"))
+    mults = (pattern(A) @ pattern(B)).sum()
+    nnz = (pattern(A) @ pattern(B)).nnz
+    assert visitor.total_reads() == 2 * mults
+    assert visitor.total_writes() == nnz
+    assert visitor.total_flops() == mults + (mults - nnz)
+
+    # Addition with a transpose iterates over the union of the nonzeros.
+    At = sp.random(40, 50, density=0.05, format="csc", random_state=2)
+    visitor = SparseCountOpsVisitor({**env, einsum.Alias("At"): At})
+    visitor.visit(parse_einop("S[i,k] = A[i,k] + At[k,i]"))
+    union = (pattern(A) + pattern(At.T)).nnz
+    assert visitor.total_writes() == union
+    assert visitor.total_flops() == union
+    assert visitor.total_reads() == A.nnz + At.nnz
+
+    # A dense vector is only read where the matrix is nonzero.
+    visitor = SparseCountOpsVisitor(env)
+    visitor.visit(parse_einop("y[i] += A[i,k] * x[k]"))
+    assert visitor.total_reads() == 2 * A.nnz
+    assert visitor.total_writes() == (pattern(A).sum(axis=1) > 0).sum()
+
+    # Densities estimate the same counts without the matrices.
+    visitor = SparseCountOpsVisitor({**env, einsum.Alias("A"): 0.05, einsum.Alias("B"): 0.05})
+    visitor.visit(parse_einop("C[i,j] += A[i,k] * B[k,j]"))
+    assert visitor.total_reads() == pytest.approx(2 * 50 * 40 * 30 * 0.05 ** 2)
+
+
+def test_sparse_count_outputs():
+    import numpy as np
+    import scipy.sparse as sp
+    from sparseanalyzer import SparseCountOpsVisitor
+
+    i, k = einsum.Index("i"), einsum.Index("k")
+    A = sp.random(50, 40, density=0.05, format="coo", random_state=0)
+    # The same matrix with every entry stored twice.
+    twice = sp.coo_matrix((np.tile(A.data, 2), (np.tile(A.row, 2), np.tile(A.col, 2))), shape=A.shape)
+    v = np.zeros(50)
+    v[::7] = 1.0
+    env = {i: 50, k: 40, einsum.Alias("v"): v}
+    for tree in ["y[i] += A[i,k] * x[k]", "S[i,k] = A[i,k] + v[i]"]:
+        counts = []
+        for M in [A, twice]:
+            visitor = SparseCountOpsVisitor({**env, einsum.Alias("A"): M})
+            visitor.visit(parse_einop(tree))
+            counts.append((visitor.total_reads(), visitor.total_writes(), visitor.total_flops()))
+        assert counts[0] == counts[1]
+
+    # Rows where v is nonzero write every column, the others only A's nonzeros.
+    union = ((A.toarray() != 0) | (v[:, None] != 0)).sum()
+    assert counts[0][1] == union
+
+
+def test_uneven_distribution():
+    import numpy as np
+
+    i, j, k = einsum.Index("i"), einsum.Index("j"), einsum.Index("k")
+    env = {i: 10, k: 7, j: 3}
+    tree = parse_einop("C[i,j] += A[i,k] * B[k,j]")
+
+    # 7 rows of B do not divide between 3 processors.
+    visitor = RowDistributionVisitor(env, 3)
+    visitor.visit(tree)
+    assert np.array_equal(visitor.ownership_dictionary[einsum.Alias("B")], [0, 2, 4, 7])
+    assert visitor.owned(einsum.Alias("B"), 2) == range(4, 7)
+    assert np.array_equal(visitor.owner(einsum.Alias("B"), np.arange(7)), [0, 0, 1, 1, 2, 2, 2])
+    assert np.array_equal(visitor.comms_per_processor, [15, 15, 12])
+    assert visitor.total_comms == 2 * 7 * 3
+
+    # Arbitrary contiguous splits, including empty blocks.
+    visitor = RowDistributionVisitor(env, 4, splits={"A": [0, 0, 5, 9, 10], "B": [0, 1, 1, 1, 7]})
+    visitor.visit(tree)
+    assert np.array_equal(visitor.owner(einsum.Alias("A"), np.array([0, 4, 5, 9])), [1, 1, 2, 3])
+    assert np.array_equal(visitor.comms_per_processor, [18, 21, 21, 3])
+
+    with pytest.raises(ValueError):
+        RowDistributionVisitor(env, 2, splits={"B": [0, 5, 4]}).visit(tree)
+
+    # Many processors stay cheap.
+    visitor = RowDistributionVisitor({i: 10**6, k: 10**6, j: 8}, 20000)
+    visitor.visit(tree)
+    assert visitor.total_comms == 19999 * 10**6 * 8
+
+
 def generate_report():
     # Einsum program to multiply 4x4 matrices
     program = "C[i, j] += A[i, k] * B[k, j]"
@@ -96,4 +254,4 @@ def generate_report():
     visitor.report()
 
 # -- Execution -- #
-generate_report()
\ No newline at end of file
+generate_report()
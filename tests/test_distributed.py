@@ -0,0 +1,327 @@
+import numpy as np
+import pytest
+
+from sparseanalyzer.distributed import DistributedExecutor
+from sparseanalyzer.einsum import parse_einop
+
+
+def pattern(M):
+    return (M.toarray() != 0).astype(np.int64)
+
+
+def power_law(nnz, shape):
+    """
+    A matrix whose first rows hold most of the nonzeros.
+    """
+    import scipy.sparse as sp
+
+    rng = np.random.default_rng(0)
+    rows = np.minimum(rng.zipf(1.5, nnz) - 1, shape[0] - 1)
+    cols = rng.integers(0, shape[1], nnz)
+    return sp.coo_matrix((np.ones(nnz), (rows, cols)), shape=shape).tocsr()
+
+
+def test_distributed_matmul():
+    rng = np.random.default_rng(0)
+    A = rng.random((8, 6))
+    B = rng.random((6, 4))
+    tree = parse_einop("C[i,j] += A[i,k] * B[k,j]")
+    report = DistributedExecutor(2)(tree, {"A": A, "B": B})
+    np.testing.assert_allclose(report.result, A @ B)
+    # Each processor reads the half of B it does not own.
+    assert report.fetched == [12, 12]
+    assert report.measured_comms == report.predicted_comms
+    assert len(report.wall_times) == 2
+
+
+def test_distributed_reduced_split():
+    # Splitting on a reduced index combines the partial sums of each processor.
+    rng = np.random.default_rng(1)
+    A = rng.random((6, 4))
+    B = rng.random((6, 3))
+    tree = parse_einop("C[j,k] += A[i,j] * B[i,k]")
+    report = DistributedExecutor(3)(tree, {"A": A, "B": B})
+    np.testing.assert_allclose(report.result, A.T @ B)
+    # B is aligned with A, so nothing moves, though the visitor assumes the
+    # rows of B are broadcast to every processor.
+    assert report.fetched == [0, 0, 0]
+    assert report.predicted_comms == 36
+
+
+def test_distributed_empty_workers():
+    # With more processors than rows, idle processors take no part in the
+    # reduction rather than reducing over nothing.
+    rng = np.random.default_rng(2)
+    A = rng.random((3, 5))
+    tree = parse_einop("C[j] max= A[i,j] + B[i,j]")
+    report = DistributedExecutor(5)(tree, {"A": A, "B": A})
+    np.testing.assert_allclose(report.result, (2 * A).max(axis=0))
+    assert report.fetched == [0, 0, 0, 0, 0]
+    # The visitor cannot model nested calls, so nothing is predicted.
+    tree = parse_einop("C[i] += A[i,j] * (B[i,j] + A[i,j])")
+    report = DistributedExecutor(2)(tree, {"A": A, "B": A})
+    np.testing.assert_allclose(report.result, (A * 2 * A).sum(axis=1))
+    assert report.predicted_comms is None
+
+
+def test_distributed_scalar():
+    # A scalar operand is replicated rather than split by rows.
+    rng = np.random.default_rng(3)
+    A = rng.random((6, 4))
+    tree = parse_einop("C[i,j] = A[i,j] * s[]")
+    report = DistributedExecutor(3)(tree, {"A": A, "s": np.array(2.5)})
+    np.testing.assert_allclose(report.result, 2.5 * A)
+    assert report.fetched == [0, 0, 0]
+    assert report.predicted_comms == 0
+
+
+def test_communication_sets():
+    import scipy.sparse as sp
+
+    from sparseanalyzer import setbuilder as sbn
+    from sparseanalyzer.distributed import communication_sets
+
+    A = sp.random(40, 30, density=0.2, format="csr", random_state=0)
+    data = np.arange(40) * 4 // 40
+    work = np.random.default_rng(0).integers(0, 4, 40)
+    comm = communication_sets(A, data, work)
+
+    # The symbolic communication of `test_setbuilder.test_partition`.
+    i, j, k = sbn.Index("i"), sbn.Index("j"), sbn.Index("k")
+    has_coords = sbn.CoordSet((i, j), sbn.And(
+        sbn.IsNonFill(sbn.Variable("A"), (i, j)),
+        sbn.In((i,), sbn.Access(sbn.Variable("Π"), (sbn.Variable("p"),))),
+    ))
+    work_coords = sbn.CoordSet((i, j, k), sbn.In((i,), sbn.Access(sbn.Variable("Φ"), (sbn.Variable("p"),))))
+    need_coords = sbn.Intersect(
+        sbn.Project((i, j), work_coords), sbn.CoordSet((i, j), sbn.IsNonFill(sbn.Variable("A"), (i, j)))
+    )
+    comm_coords = sbn.SetDiff(need_coords, has_coords)
+    for p in range(4):
+        interp = sbn.SetBuilderInterpreter({"A": A, "Π": data, "Φ": work, "p": p}, dims={"k": 1})
+        expected = interp(comm_coords)
+        assert list(map(tuple, comm.coords[p])) == expected.tolist()
+        assert comm.received[p] == len(expected)
+
+    a = A.toarray() != 0
+    assert comm.total == sum(a[i].sum() for i in range(40) if data[i] != work[i])
+    assert comm.volume[0, 0] == 0
+    assert comm.volume[data[5], work[5]] >= (a[5].sum() if data[5] != work[5] else 0)
+
+
+def test_partition_search():
+    from sparseanalyzer import RowDistributionVisitor
+    from sparseanalyzer.distributed import PartitionSearch
+    from sparseanalyzer.distributed.search import score
+    from sparseanalyzer.einsum import Index
+
+    tree = parse_einop("C[i,j] += A[i,k] * B[k,j]")
+    i, j, k = Index("i"), Index("j"), Index("k")
+    env = {i: 40, k: 32, j: 24}
+    search = PartitionSearch(4, workers=2, chunk_size=64)
+    strategies = search.strategies(tree, env)
+    scores = [score(search.accesses(tree), env, 4, s) for s in strategies]
+
+    # The strategy of RowDistributionVisitor: rows of everything, work on i.
+    row = next(
+        s for s in scores
+        if s.strategy.work == ((i, 4),) and all(layout.kind == "row" for _, layout in s.strategy.layouts)
+    )
+    visitor = RowDistributionVisitor(env, 4)
+    visitor.visit(tree)
+    assert row.comms == visitor.total_comms
+
+    frontier = search(tree, env)
+    assert frontier[0].comms == min(s.comms for s in scores)
+    assert frontier[-1].memory == min(s.memory for s in scores)
+    for a, b in zip(frontier, frontier[1:]):
+        assert a.comms < b.comms and a.memory > b.memory
+    for s in scores:
+        assert any(f.comms <= s.comms and f.memory <= s.memory for f in frontier)
+    # The output is never replicated, and only B is smaller than A.
+    assert {layout.kind for s in strategies for name, layout in s.layouts if name != "B"} == {"row", "column", "block"}
+
+
+def test_balanced_partition():
+    import scipy.sparse as sp
+
+    from sparseanalyzer import RowDistributionVisitor
+    from sparseanalyzer.distributed import balanced_partition, communication_sets, flop_balanced_partition
+    from sparseanalyzer.distributed.balance import even_split, flop_weights, nnz_weights
+    from sparseanalyzer.einsum import Alias, Index
+
+    A = power_law(20000, (1000, 800))
+    nnz = np.diff(A.indptr)
+
+    part = balanced_partition(A, 8)
+    assert part.bounds[0] == 0 and part.bounds[-1] == 1000
+    assert np.all(np.diff(part.bounds) >= 0)
+    assert np.array_equal(part.loads, [nnz[lo:hi].sum() for lo, hi in zip(part.bounds, part.bounds[1:])])
+    assert part.imbalance < even_split(nnz_weights(A), 8).imbalance
+    assert np.array_equal(part.owner(np.arange(1000)), part.owners)
+
+    # Balancing by flops weights each row of A by the rows of B it meets.
+    B = sp.random(800, 300, density=0.02, format="csr", random_state=1)
+    tree = parse_einop("C[i,j] += A[i,k] * B[k,j]")
+    flops = flop_balanced_partition(tree, {"A": A, "B": B}, 8)
+    per_row = (pattern(A) @ pattern(B)).sum(axis=1)
+    assert np.array_equal(flops.loads, [per_row[lo:hi].sum() for lo, hi in zip(flops.bounds, flops.bounds[1:])])
+
+    # A dense operand multiplies each nonzero by the loops it alone spans,
+    # sized by the bound output or by `dims`.
+    dense = parse_einop("C[i,j] += A[i,k] * X[k,j]")
+    weights = flop_weights(dense, {"A": A, "C": np.zeros((1000, 7))}, Index("i"))
+    assert np.array_equal(weights, 7 * nnz)
+    assert np.array_equal(flop_weights(dense, {"A": A}, Index("i"), dims={Index("j"): 7}), 7 * nnz)
+    with pytest.raises(ValueError):
+        flop_weights(dense, {"A": A}, Index("i"))
+
+    # Partitions serve as ownership models for the distribution analysis.
+    i, j, k = Index("i"), Index("j"), Index("k")
+    visitor = RowDistributionVisitor({i: 1000, k: 800, j: 300}, 8, splits={"A": part.bounds})
+    visitor.visit(tree)
+    assert np.array_equal(visitor.ownership_dictionary[Alias("A")], part.bounds)
+    assert communication_sets(A, part.owners, part.owners).total == 0
+
+
+def test_hypergraph_partition():
+    import scipy.sparse as sp
+
+    from sparseanalyzer.distributed import (
+        HypergraphPartitioner,
+        balanced_partition,
+        column_net,
+        communication_sets,
+        spmv_volume,
+    )
+    from sparseanalyzer.distributed.hypergraph import einsum_hypergraph
+
+    # A block diagonal matrix with scrambled rows and a few stray nonzeros.
+    rng = np.random.default_rng(0)
+    n, k = 2000, 4
+    block = rng.permutation(np.arange(n) % k)
+    rows, cols = rng.integers(0, n, (2, 30000))
+    keep = (block[rows] == block[cols]) | (rng.random(30000) < 0.01)
+    A = (sp.coo_matrix((np.ones(keep.sum()), (rows[keep], cols[keep])), shape=(n, n)) + sp.eye(n)).tocsr()
+
+    hg = column_net(A)
+    assert hg.cut(block) == spmv_volume(A, block)
+    part = HypergraphPartitioner(k).partition(hg)
+    assert part.imbalance <= 1.03
+    assert np.array_equal(part.loads, np.bincount(part.owners, np.diff(A.indptr), minlength=k))
+    assert part.cut == spmv_volume(A, part.owners)
+    # The partition recovers most of the blocks, unlike contiguous splits.
+    assert part.cut <= 1.2 * spmv_volume(A, block)
+    assert 5 * part.cut < spmv_volume(A, balanced_partition(A, k).owners)
+    # Storing x conformally with the rows can only cost more.
+    assert spmv_volume(A, part.owners, part.owners) >= part.cut
+
+    # Einsums are partitioned by the hypergraph of their bound operands, and
+    # the owners serve as partitions for the distribution analysis.
+    tree = parse_einop("y[i] += A[i,j] * x[j]")
+    assert np.array_equal(einsum_hypergraph(tree, {"A": A}).pins.toarray(), hg.pins.toarray())
+    part = HypergraphPartitioner(k)(tree, {"A": A})
+    assert part.cut == spmv_volume(A, part.owners)
+    assert communication_sets(A, part.owners, part.owners).total == 0
+
+
+def test_reorder():
+    import scipy.sparse as sp
+    import sparse
+
+    from sparseanalyzer.distributed import balanced_partition, reorder, spmv_volume, split_volume
+    from sparseanalyzer.distributed.reorder import gray_permutation, permute
+    from sparseanalyzer.einsum import Index
+
+    # A 2D stencil whose rows and columns were numbered at random.
+    rng = np.random.default_rng(0)
+    line = sp.diags([-1.0, 2.0, -1.0], [-1, 0, 1], shape=(30, 30))
+    grid = (sp.kron(line, sp.eye(30)) + sp.kron(sp.eye(30), line)).tocsr()
+    scramble = rng.permutation(900)
+    A = grid[scramble][:, scramble]
+    x = rng.random(900)
+    tree = parse_einop("y[i] += A[i,j] * x[j]")
+    i, j = Index("i"), Index("j")
+
+    rcm = reorder(tree, {"A": A, "x": x}, 8)
+    assert rcm.before == split_volume(tree, {"A": A, "x": x}, 8)
+    assert rcm.pays_off and 5 * rcm.after < rcm.before
+    # The reordered einsum computes the reordered result.
+    bindings = rcm.permute(tree, {"A": A, "x": x})
+    assert np.array_equal(rcm.perms[i], rcm.perms[j])
+    assert np.allclose(bindings["A"] @ bindings["x"], (A @ x)[rcm.perms[i]])
+    # Assignments follow the rows to their new positions.
+    owners = balanced_partition(A, 8).owners
+    new = rcm.rewrite(owners, i)
+    assert spmv_volume(bindings["A"], new, rcm.rewrite(owners, j)) == spmv_volume(A, owners, owners)
+    assert np.array_equal(rcm.restore(new, i), owners)
+
+    # A Gray code order of the rows gathers those touching the same columns.
+    blocks = rng.integers(0, 8, 2000)
+    cols = blocks * 100 + rng.integers(0, 100, (5, 2000))
+    B = sp.coo_matrix((np.ones(10000), (np.tile(np.arange(2000), 5), cols.reshape(-1))), shape=(2000, 800))
+    gray = reorder(tree, {"A": B}, 8, method="gray")
+    assert j not in gray.perms
+    assert 2 * gray.after < gray.before
+    # Each row's touched blocks must fit in a 64-bit mask.
+    coords = np.stack([B.row, B.col], axis=1).astype(np.int64)
+    for bad in [0, 65]:
+        with pytest.raises(ValueError):
+            gray_permutation(coords, B.shape, blocks=bad)
+
+    # Every kind of binding keeps its type and values.
+    perms = [rng.permutation(4), rng.permutation(3)]
+    dense = rng.random((4, 3))
+    expected = dense[np.ix_(*perms)]
+    assert np.array_equal(permute(dense, perms), expected)
+    assert np.array_equal(permute(sp.csc_matrix(dense), perms).toarray(), expected)
+    assert permute(sp.csc_matrix(dense), perms).format == "csc"
+    assert np.array_equal(permute(sparse.COO.from_numpy(dense), perms).todense(), expected)
+
+
+def test_load_profile():
+    import scipy.sparse as sp
+
+    from sparseanalyzer.distributed import balanced_partition, load_profile
+    from sparseanalyzer.einsum import Index
+
+    A = power_law(5000, (300, 200))
+    A.sum_duplicates()
+    B = sp.random(200, 50, density=0.05, format="csr", random_state=1)
+    part = balanced_partition(A, 4)
+    owners = part.owners
+
+    # A sparse matrix times a dense vector touches, multiplies and writes
+    # along the rows of each block.
+    spmv = load_profile(parse_einop("y[i] += A[i,j] * x[j]"), {"A": A}, part)
+    nnz = np.diff(A.indptr)
+    assert np.array_equal(spmv.nnz, np.bincount(owners, nnz, minlength=4))
+    assert np.array_equal(spmv.flops, spmv.nnz)
+    assert np.array_equal(spmv.writes, np.bincount(owners, nnz > 0, minlength=4))
+    assert spmv.imbalance("nnz") == part.imbalance
+    # Splitting the reduction instead writes partial results on every
+    # processor reaching a row.
+    tree = parse_einop("y[i] += A[i,j] * x[j]")
+    cols = load_profile(tree, {"A": A.tocsc()}, owners[:200], idx=Index("j"), k=4)
+    coo = A.tocoo()
+    assert np.array_equal(cols.nnz, np.bincount(owners[coo.col], minlength=4))
+    assert np.array_equal(cols.writes, [len(np.unique(coo.row[owners[coo.col] == p])) for p in range(4)])
+
+    # A sparse product reaches the rows of B matched by the columns of A.
+    spgemm = load_profile(parse_einop("C[i,j] += A[i,k] * B[k,j]"), {"A": A, "B": B}, owners)
+    a, b = pattern(A), pattern(B)
+    for p in range(4):
+        mine = owners == p
+        reached = a[mine].any(axis=0)
+        assert spgemm.nnz[p] == a[mine].sum() + b[reached].sum()
+        assert spgemm.flops[p] == (a[mine] @ b).sum()
+        assert spgemm.writes[p] == ((a[mine] @ b) > 0).sum()
+    assert spgemm.histogram().count("\n") == 3
+    assert spgemm.histogram().splitlines()[int(np.argmax(spgemm.flops))].count("#") == 40
+
+    # A dense operand multiplies and writes every column of the output.
+    dense = load_profile(parse_einop("C[i,j] += A[i,k] * X[k,j]"), {"A": A, "C": np.zeros((300, 7))}, part)
+    assert np.array_equal(dense.flops, 7 * spmv.flops)
+    assert np.array_equal(dense.writes, 7 * spmv.writes)
+    sized = load_profile(parse_einop("C[i,j] += A[i,k] * X[k,j]"), {"A": A}, part, dims={Index("j"): 7})
+    assert np.array_equal(sized.flops, dense.flops)
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+def run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split()
+
+def test_lazy_imports():
+    # Visiting a prebuilt tree must not pay for lark or numpy.
+    loaded = run(
+        "import sys, operator\n"
+        "from sparseanalyzer import CountOpsVisitor\n"
+        "from sparseanalyzer import einsum as ein\n"
+        "from sparseanalyzer import setbuilder as sbn\n"
+        "i, j, k = ein.Index('i'), ein.Index('j'), ein.Index('k')\n"
+        "tree = ein.Einsum(ein.Literal(operator.add), ein.Alias('C'), (i, j),\n"
+        "    ein.Call(ein.Literal(operator.mul), (ein.Access(ein.Alias('A'), (i, k)),\n"
+        "                                         ein.Access(ein.Alias('B'), (k, j)))))\n"
+        "visitor = CountOpsVisitor({i: 2, j: 3, k: 4})\n"
+        "visitor.visit(tree)\n"
+        "assert visitor.total_reads() == 48\n"
+        "sbn.simplify(sbn.CoordSet((sbn.Index('i'),), sbn.IsNonFill(sbn.Variable('A'), (sbn.Index('i'),))))\n"
+        "print(*sys.modules)"
+    )
+    assert "lark" not in loaded
+    assert "numpy" not in loaded
+
+def test_lazy_attribute_loading():
+    loaded = run(
+        "import sys\n"
+        "from sparseanalyzer import parse_einop\n"
+        "parse_einop('C[i] += A[i]')\n"
+        "print(*sys.modules)"
+    )
+    assert "lark" in loaded
+    assert "sparseanalyzer.einsum.parser" in loaded
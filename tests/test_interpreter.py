@@ -0,0 +1,286 @@
+from sparseanalyzer import einsum, parse_einop
+import numpy as np
+import scipy.sparse as sp
+import sparse
+import pytest
+import tracemalloc
+from sparseanalyzer.einsum.lowering import lower_contraction
+from sparseanalyzer.einsum.memory import MemoryPlanner
+
+A = sp.random(30, 40, density=0.1, format="csr", random_state=0)
+B = sp.random(40, 20, density=0.1, format="csc", random_state=1)
+
+def test_sparse_matmul():
+    ctx = einsum.SparseEinsumInterpreter({"A": A, "B": B})
+    ctx(parse_einop("C[i, j] += A[i, k] * B[k, j]"))
+    C = ctx.bindings["C"]
+    assert isinstance(C, sparse.COO)
+    assert np.allclose(C.todense(), (A @ B).toarray())
+    assert C.nnz == (A @ B).nnz
+
+def test_sparse_coiteration():
+    ctx = einsum.SparseEinsumInterpreter({"A": A, "At": A.T.tocsr()}, format="gcxs")
+    # Multiplication visits the intersection of the nonzeros, addition the union.
+    ctx(parse_einop("P[i, k] = A[i, k] * At[k, i]"))
+    ctx(parse_einop("S[i, k] = A[i, k] + At[k, i]"))
+    assert isinstance(ctx.bindings["S"], sparse.GCXS)
+    assert ctx.bindings["P"].nnz == A.nnz
+    assert ctx.bindings["S"].nnz == A.nnz
+    ctx(parse_einop("y[i] max= A[i, k] * 2"))
+    assert np.allclose(ctx.bindings["y"].todense(), 2 * A.toarray().max(axis=1))
+
+@pytest.mark.parametrize(
+    "expr, kind",
+    [
+        ("C[i, j] += A[i, k] * B[k, j]", "matmul"),
+        ("C[j, i] += A[i, k] * B[k, j]", "matmul"),
+        ("C[b, i, j] += X[b, i, k] * Y[b, k, j]", "batched_matmul"),
+        ("y[i] += A[i, k] * x[k]", "matvec"),
+        ("C[i, j] = x[i] * y[j]", "outer"),
+        ("C[i, l] += T[i, k, m] * U[m, k, l]", "tensordot"),
+        ("s[] += x[i] * y[i]", "tensordot"),
+        ("y[i] += A[i, k] * T[i, k, m]", "batched_matmul"),
+    ],
+)
+def test_contraction_dispatch(expr, kind):
+    rng = np.random.default_rng(0)
+    shapes = {"A": (4, 5), "B": (5, 6), "X": (3, 4, 5), "Y": (3, 5, 6), "x": (4,),
+              "y": (6,), "T": (4, 5, 2), "U": (2, 5, 3)}
+    if expr.startswith("y[i] += A"):
+        shapes["x"] = (5,)
+    if expr.startswith("s[]"):
+        shapes["y"] = (4,)
+    bindings = {name: rng.random(shape) for name, shape in shapes.items()}
+    tree = parse_einop(expr)
+    assert lower_contraction(tree).kind == kind
+    fast = einsum.EinsumInterpreter(bindings=dict(bindings))
+    slow = einsum.EinsumInterpreter(bindings=dict(bindings), dispatch=False)
+    fast(tree)
+    slow(tree)
+    out = tree.tns.name
+    assert np.allclose(fast.bindings[out], slow.bindings[out])
+
+def test_no_dispatch():
+    assert lower_contraction(parse_einop("C[i, j] = A[i, j] * B[i, j]")) is None
+    assert lower_contraction(parse_einop("C[i, j] += A[i, k] + B[k, j]")) is None
+    assert lower_contraction(parse_einop("C[i, j] max= A[i, k] * B[k, j]")) is None
+
+@pytest.mark.parametrize("dtype", [np.bool_, np.int8, np.uint8])
+def test_contraction_dispatch_dtype(dtype):
+    # Dispatched contractions accumulate like `sum`, not in the operand dtype.
+    A = np.full((3, 200), 1, dtype=dtype)
+    B = np.full((200, 4), 1, dtype=dtype)
+    tree = parse_einop("C[i, j] += A[i, k] * B[k, j]")
+    slow = einsum.EinsumInterpreter(bindings={"A": A, "B": B}, dispatch=False)
+    slow(tree)
+    for ctx in (
+        einsum.EinsumInterpreter(bindings={"A": A, "B": B}),
+        einsum.SparseEinsumInterpreter(bindings={"A": A, "B": B}),
+    ):
+        ctx(tree)
+        C = ctx.bindings["C"]
+        C = C.todense() if hasattr(C, "todense") else C
+        assert C.dtype == slow.bindings["C"].dtype
+        assert np.array_equal(C, np.full((3, 4), 200))
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "y[i] += A[i, k] * B[k, j]",
+        "y[i] max= A[i, k] + B[k, j]",
+        "y[i] min= A[i, k] - B[k, j]",
+        "y[i] or= A[i, k] < B[k, j]",
+        "y[i] and= A[i, k] < B[k, j] + 0.5",
+    ],
+)
+def test_memory_budget(expr):
+    rng = np.random.default_rng(0)
+    bindings = {"A": rng.random((20, 100)), "B": rng.random((100, 150))}
+    tree = parse_einop(expr)
+    full = einsum.EinsumInterpreter(bindings=dict(bindings), dispatch=False)
+    full(tree)
+    budget = 1 << 16
+    ctx = einsum.EinsumInterpreter(
+        bindings=dict(bindings), dispatch=False, memory_budget=budget
+    )
+    tracemalloc.start()
+    ctx(tree)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert np.allclose(ctx.bindings["y"], full.bindings["y"])
+    assert peak < 4 * budget
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"num_workers": 3},
+        {"num_workers": 2, "tile_shape": (7, 5)},
+        {"num_workers": 2, "tile_shape": {einsum.Index("j"): 9}},
+        {"num_workers": 2, "tile_shape": (7, None), "memory_budget": 1 << 12},
+    ],
+)
+def test_threaded(kwargs):
+    rng = np.random.default_rng(0)
+    bindings = {"A": rng.random((20, 30)), "B": rng.random((30, 25))}
+    tree = parse_einop("C[i, j] min= A[i, k] + B[k, j]")
+    ref = einsum.EinsumInterpreter(bindings=dict(bindings))
+    ref(tree)
+    ctx = einsum.ThreadedEinsumInterpreter(dict(bindings), **kwargs)
+    ctx(tree)
+    assert np.array_equal(ctx.bindings["C"], ref.bindings["C"])
+
+def test_threaded_empty():
+    # An empty first output index makes no tiles rather than empty ones.
+    bindings = {"A": np.zeros((0, 3)), "B": np.ones((3, 5))}
+    tree = parse_einop("C[i, j] min= A[i, k] + B[k, j]")
+    ref = einsum.EinsumInterpreter(bindings=dict(bindings))
+    ref(tree)
+    ctx = einsum.ThreadedEinsumInterpreter(dict(bindings), num_workers=4)
+    ctx(tree)
+    assert ctx.bindings["C"].shape == ref.bindings["C"].shape == (0, 5)
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "C[i, j] += A[i, k] * B[k, j]",
+        "C[j, i] += A[i, k] * B[k, j]",
+        "C[i, j] max= A[i, k] + B[k, j]",
+        "D[j, i] = A[i, j] * 2 + -A[i, j]",
+        "s[] += A[i, k] * A[i, k]",
+    ],
+)
+def test_compiler(expr):
+    rng = np.random.default_rng(0)
+    bindings = {"A": rng.random((4, 5)), "B": rng.random((5, 6))}
+    tree = parse_einop(expr)
+    for dispatch in (True, False):
+        ref = einsum.EinsumInterpreter(bindings=dict(bindings), dispatch=dispatch)
+        ctx = einsum.EinsumCompiler(bindings=dict(bindings), dispatch=dispatch)
+        assert ctx(tree) == ref(tree)
+        out = tree.tns.name
+        assert np.allclose(ctx.bindings[out], ref.bindings[out])
+    # Kernels are compiled once per tree.
+    assert ctx.compile(tree) is ctx.compile(parse_einop(expr))
+
+def test_compiler_literal_types():
+    # Equal literals of different types compile to different kernels.
+    A = np.arange(4)
+    for expr, dtype in [("C[i] = A[i] + 1", np.int64), ("C[i] = A[i] + 1.0", np.float64)]:
+        tree = parse_einop(expr)
+        ref = einsum.EinsumInterpreter(bindings={"A": A})
+        ctx = einsum.EinsumCompiler(bindings={"A": A})
+        ref(tree)
+        ctx(tree)
+        assert ctx.bindings["C"].dtype == ref.bindings["C"].dtype == dtype
+
+def test_compiler_plan():
+    rng = np.random.default_rng(0)
+    bindings = {"A": rng.random((4, 5)), "B": rng.random((5, 6)), "C": rng.random((6, 3))}
+    tree = parse_einop("D[i, l] += A[i, j] * B[j, k] * C[k, l]")
+    plan = einsum.EinsumScheduler({idx: 4 for idx in tree.arg.get_idxs()})(tree)
+    plan = einsum.Plan((*plan.bodies, einsum.Produces((einsum.Alias("D"),))))
+    ref = einsum.EinsumInterpreter(bindings=dict(bindings))
+    ctx = einsum.EinsumCompiler(bindings=dict(bindings))
+    (res,) = ctx(plan)
+    assert np.allclose(res, ref(plan)[0])
+    assert np.allclose(res, bindings["A"] @ bindings["B"] @ bindings["C"])
+
+def test_memory_planner():
+    rng = np.random.default_rng(0)
+    bindings = {"A": rng.random((20, 20)), "B": rng.random((20, 20))}
+    plan = einsum.Plan(tuple(map(parse_einop, [
+        "T1[i, j] max= A[i, k] + B[k, j]",
+        "T2[i, j] max= T1[i, k] + B[k, j]",
+        "T3[i, j] max= T2[i, k] + B[k, j]",
+        "T4[j, i] max= T3[i, k] + B[k, j]",
+    ])))
+    ref = einsum.EinsumInterpreter(bindings=dict(bindings))
+    ref(plan)
+    ctx = einsum.PlannedEinsumInterpreter(dict(bindings))
+    assert ctx(plan) == ("T4",)
+    assert np.array_equal(ctx.bindings["T4"], ref.bindings["T4"])
+    assert sorted(ctx.bindings) == ["A", "B", "T4"]
+    env = {einsum.Index(idx): 20 for idx in "ijk"}
+    memory_plan = MemoryPlanner(env)(plan)
+    assert memory_plan.frees == ((), ("T1",), ("T2",), ("T3",))
+    assert memory_plan.reuses == (None, None, "T1", "T2")
+    # Two temporaries are resident at a time instead of four.
+    assert ctx.usage.peak_bytes == 2 * 20 * 20 * 8
+    assert ctx.usage.unplanned_bytes == 4 * 20 * 20 * 8
+
+def test_memory_planner_aliasing():
+    # Overwrites may return views, so their sources never donate buffers.
+    plan = einsum.Plan(tuple(map(parse_einop, [
+        "T1[i] += A[i, k]",
+        "T2[i] = T1[i]",
+        "T3[i] += A[k, i]",
+    ])))
+    env = {einsum.Index(idx): 4 for idx in "ik"}
+    memory_plan = MemoryPlanner(env, keep=("T2",))(plan)
+    assert memory_plan.frees == ((), ("T1",), ())
+    assert memory_plan.reuses == (None, None, None)
+
+@pytest.mark.parametrize(
+    "expr, block_size",
+    [
+        ("C[i, j] += A[i, k] * B[k, j]", 7),
+        ("C[j, i] max= A[i, k] + B[k, j]", None),
+        ("s[k] += A[i, k] * A[i, k]", 4),
+        ("s[] += A[i, k] * A[i, k]", 4),
+    ],
+)
+def test_out_of_core(tmp_path, expr, block_size):
+    rng = np.random.default_rng(0)
+    A = rng.random((30, 20))
+    B = rng.random((20, 25))
+    np.save(tmp_path / "A.npy", A)
+    B_map = np.lib.format.open_memmap(tmp_path / "B.npy", "w+", B.dtype, B.shape)
+    B_map[...] = B
+    tree = parse_einop(expr)
+    ref = einsum.EinsumInterpreter(bindings={"A": A, "B": B})
+    ref(tree)
+    out = tmp_path / "out"
+    out.mkdir()
+    ctx = einsum.OutOfCoreEinsumInterpreter(
+        {"A": str(tmp_path / "A.npy"), "B": B_map},
+        out_dir=out,
+        block_size=block_size,
+        memory_budget=1 << 12,
+    )
+    ctx(tree)
+    name = tree.tns.name
+    assert isinstance(ctx.bindings[name], np.memmap)
+    assert np.allclose(ctx.bindings[name], ref.bindings[name])
+    assert np.allclose(np.load(out / f"{name}.npy"), ref.bindings[name])
+
+def test_out_of_core_redefine(tmp_path):
+    import os
+
+    A = np.arange(10.0)
+    B = np.ones(10)
+    np.save(tmp_path / "A.npy", A)
+    # The output replaces the operand it is streamed from only once complete.
+    ctx = einsum.OutOfCoreEinsumInterpreter(
+        {"A": str(tmp_path / "A.npy"), "B": B}, out_dir=tmp_path, block_size=3
+    )
+    ctx(parse_einop("A[i] = A[i] + B[i]"))
+    assert np.array_equal(ctx.bindings["A"], A + B)
+    assert np.array_equal(np.load(tmp_path / "A.npy"), A + B)
+    assert os.listdir(tmp_path) == ["A.npy"]
+
+def test_out_of_core_temporaries():
+    import os
+
+    A = np.arange(12.0).reshape(3, 4)
+    tree = parse_einop("C[i] += A[i, k] * A[i, k]")
+    with einsum.OutOfCoreEinsumInterpreter({"A": A}, block_size=2) as ctx:
+        ctx(tree)
+        assert np.allclose(ctx.bindings["C"], (A * A).sum(axis=1))
+        tmp_dir = ctx.tmp_dir.name
+        assert len(os.listdir(tmp_dir)) == 1
+    assert not os.path.exists(tmp_dir)
+
+    # A zero-length streamed dimension has no blocks.
+    with einsum.OutOfCoreEinsumInterpreter({"A": np.zeros((0, 4))}) as ctx:
+        ctx(tree)
+        assert ctx.bindings["C"].shape == (0,)
@@ -0,0 +1,55 @@
+from sparseanalyzer import einsum
+from sparseanalyzer.einsum.parser import ParseCache, einop_cache, einsum_cache
+import numpy as np
+
+def test_einop_cache():
+    einop_cache.clear()
+    tree = einsum.parse_einop("D[i,j] += A[i,k] * B[k,j]")
+    assert einsum.parse_einop("D[i,j]  +=  A[i,k] * B[k,j]") is tree
+    info = einop_cache.info()
+    assert info["hits"] == 1
+    assert info["misses"] == 1
+    assert info["size"] == 1
+
+def test_einsum_cache():
+    einsum_cache.clear()
+    A = np.ones((2, 3))
+    B = np.ones((3, 4))
+    tree, bindings = einsum.parse_einsum("ij,jk->ik", A, B)
+    tree2, bindings2 = einsum.parse_einsum("ij,jk->ik", 2 * A, 2 * B)
+    assert tree is tree2
+    assert bindings2["A"] is not A
+    assert np.all(bindings2["A"] == 2)
+    # Ellipses depend on the number of dimensions, so those are part of the key.
+    einsum.parse_einsum("...ij,...jk", A, B)
+    einsum.parse_einsum("...ij,...jk", np.ones((5, 2, 3)), B)
+    assert einsum_cache.info()["misses"] == 3
+
+def test_cache_eviction():
+    cache = ParseCache(maxsize=2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: 3)
+    cache.get("c", lambda: 4)
+    assert cache.get("a", lambda: 5) == 1
+    assert cache.get("b", lambda: 6) == 6
+    cache.resize(1)
+    assert len(cache) == 1
+
+def test_lalr_grammar():
+    assert einsum.parse_einop("x[i] = True == a[i]") == einsum.Einsum(
+        einsum.Literal(einsum.parser.overwrite),
+        einsum.Alias("x"),
+        (einsum.Index("i"),),
+        einsum.Call(
+            einsum.Literal(einsum.parser.operator.eq),
+            (einsum.Literal(True), einsum.Access(einsum.Alias("a"), (einsum.Index("i"),))),
+        ),
+    )
+    # A leading sign is a unary operator, as with the Earley parser.
+    tree = einsum.parse_einop("x[i] = -1 + y[i]")
+    assert tree.arg.args[0] == einsum.Call(
+        einsum.Literal(einsum.parser.operator.neg), (einsum.Literal(1),)
+    )
+    tree = einsum.parse_einop("E[i] min= A[i,k] + D[k,j] << 1")
+    assert tree.op == einsum.Literal(einsum.parser.promote_min)
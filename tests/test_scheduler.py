@@ -0,0 +1,43 @@
+from sparseanalyzer import einsum, parse_einop
+from sparseanalyzer.einsum.scheduler import get_dims
+import numpy as np
+import pytest
+
+rng = np.random.default_rng(0)
+bindings = {
+    "A": rng.random((10, 30)),
+    "B": rng.random((30, 5)),
+    "C": rng.random((5, 40)),
+    "D": rng.random((40, 8)),
+}
+
+@pytest.mark.parametrize("strategy", ["greedy", "optimal"])
+def test_chain(strategy):
+    tree = parse_einop("E[i, m] += A[i, j] * B[j, k] * C[k, l] * D[l, m]")
+    scheduler = einsum.EinsumScheduler(get_dims(tree, bindings), strategy)
+    path = scheduler.path(tree)
+    assert path.flops == 10 * 30 * 5 + 5 * 40 * 8 + 10 * 5 * 8
+    assert path.peak_size == 50
+    assert path.flops < path.naive_flops
+
+    plan = scheduler(tree)
+    assert isinstance(plan, einsum.Plan)
+    assert len(plan.bodies) == 3
+    ctx = einsum.EinsumInterpreter(bindings=dict(bindings))
+    ctx(plan)
+    ref = bindings["A"] @ bindings["B"] @ bindings["C"] @ bindings["D"]
+    assert np.allclose(ctx.bindings["E"], ref)
+
+def test_min_plus():
+    tree = parse_einop("E[i] min= A[i, j] + B[j, k] + C[k, l]")
+    plan = einsum.EinsumScheduler(get_dims(tree, bindings), "optimal")(tree)
+    ctx = einsum.EinsumInterpreter(bindings=dict(bindings))
+    ctx(plan)
+    A, B, C = bindings["A"], bindings["B"], bindings["C"]
+    ref = (A[:, :, None, None] + B[None, :, :, None] + C[None, None]).min(axis=(1, 2, 3))
+    assert np.allclose(ctx.bindings["E"], ref)
+
+def test_unschedulable():
+    tree = parse_einop("C[i, j] = A[i, j] + B[j, i]")
+    env = {einsum.Index("i"): 2, einsum.Index("j"): 2}
+    assert einsum.EinsumScheduler(env)(tree) == tree
@@ -26,6 +26,21 @@ def test_setbuilder():
 
 test_setbuilder()
 
+
+def test_simplify_rename():
+    A = sbn.Variable("A")
+    B = sbn.Variable("B")
+    i = sbn.Index("i")
+    j = sbn.Index("j")
+
+    # The indices of B are renamed to the original indices, not wrapped in new ones.
+    expr = sbn.Intersect(
+        sbn.CoordSet((i, j), sbn.IsNonFill(A, (i, j))),
+        sbn.CoordSet((j, i), sbn.IsNonFill(B, (j, i))),
+    )
+    assert sbn.simplify(expr) == sbn.CoordSet((i, j), sbn.And(sbn.IsNonFill(A, (i, j)), sbn.IsNonFill(B, (i, j))))
+
+
 def test_partition():
     data_partition = sbn.Variable("Π")
     work_partition = sbn.Variable("Φ")
@@ -70,4 +85,145 @@ def test_partition():
     # print("Simplified expression:")
     # print(simplified)
 
-test_partition()
\ No newline at end of file
+test_partition()
+
+
+@pytest.mark.parametrize("sketch", [sbn.HyperLogLog, sbn.MinHash])
+def test_sketch_estimator(sketch):
+    import numpy as np
+    import scipy.sparse as sp
+
+    A = sp.random(400, 300, density=0.05, format="coo", random_state=0)
+    B = sp.random(300, 400, density=0.05, format="coo", random_state=1)
+    a, b = A.toarray() != 0, B.toarray().T != 0
+
+    i = sbn.Index("i")
+    j = sbn.Index("j")
+    VA = sbn.Variable("A")
+    VB = sbn.Variable("B")
+    A_coords = sbn.CoordSet((i, j), sbn.IsNonFill(VA, (i, j)))
+    B_coords = sbn.CoordSet((i, j), sbn.IsNonFill(VB, (j, i)))
+
+    est = sbn.SketchEstimator({"A": A, "B": B}, error=0.02, sketch=sketch)
+    cases = [
+        (A_coords, a.sum()),
+        (sbn.Union(A_coords, B_coords), (a | b).sum()),
+        (sbn.Intersect(A_coords, B_coords), (a & b).sum()),
+        (sbn.SetDiff(A_coords, B_coords), (a & ~b).sum()),
+        (sbn.Project((j,), A_coords), a.any(axis=0).sum()),
+        (sbn.simplify(sbn.Project((i,), sbn.Union(A_coords, B_coords))), (a | b).any(axis=1).sum()),
+    ]
+    # Inclusion-exclusion errors scale with the union of the sets involved.
+    tol = 0.05 * (a | b).sum()
+    for expr, exact in cases:
+        assert est(sbn.Cardinality(expr)) == pytest.approx(exact, abs=tol)
+
+    # Merging the sketches of two halves gives the sketch of the whole.
+    coords = np.stack([A.row, A.col], axis=1)
+    half = len(coords) // 2
+    whole = sketch.from_error(0.02).add(coords)
+    merged = sketch.from_error(0.02).add(coords[:half]) | sketch.from_error(0.02).add(coords[half:])
+    assert merged.cardinality() == pytest.approx(whole.cardinality())
+
+    with pytest.raises(ValueError):
+        est(sbn.Project((i,), sbn.Intersect(A_coords, B_coords)))
+
+def test_interpreter():
+    import numpy as np
+    import scipy.sparse as sp
+
+    A = sp.random(12, 10, density=0.3, format="coo", random_state=0)
+    B = sp.random(10, 12, density=0.3, format="coo", random_state=1)
+    a, b = A.toarray() != 0, B.toarray() != 0
+    owner = np.arange(12) * 3 // 12
+
+    i = sbn.Index("i")
+    j = sbn.Index("j")
+    k = sbn.Index("k")
+    VA = sbn.Variable("A")
+    VB = sbn.Variable("B")
+    data_partition = sbn.Variable("Π")
+    work_partition = sbn.Variable("Φ")
+    processor = sbn.Variable("p")
+
+    has_coords = sbn.CoordSet((i, j), sbn.And(
+        sbn.IsNonFill(VA, (i, j)),
+        sbn.In((i,), sbn.Access(data_partition, (processor,))),
+    ))
+    work_coords = sbn.CoordSet((i, j, k), sbn.In((i,), sbn.Access(work_partition, (processor,))))
+    need_coords = sbn.Intersect(sbn.Project((i, j), work_coords), sbn.CoordSet((i, j), sbn.IsNonFill(VA, (i, j))))
+    comm_coords = sbn.SetDiff(need_coords, has_coords)
+
+    for p in range(3):
+        bindings = {"A": A, "Π": owner, "Φ": [np.flatnonzero((owner + 1) % 3 == q) for q in range(3)], "p": p}
+        interp = sbn.SetBuilderInterpreter(bindings, dims={"k": 5})
+        expected = [(x, y) for x, y in np.argwhere(a) if (owner[x] + 1) % 3 == p and owner[x] != p]
+        res = interp(comm_coords)
+        assert res.dtype.names == ("i", "j")
+        assert res.tolist() == expected
+        assert interp(sbn.simplify(comm_coords)).tolist() == expected
+        assert interp(sbn.Cardinality(comm_coords)) == len(expected)
+
+    interp = sbn.SetBuilderInterpreter({"A": A, "B": B})
+    product = sbn.CoordSet((i, j), sbn.Exists(k, sbn.And(sbn.IsNonFill(VA, (i, k)), sbn.IsNonFill(VB, (k, j)))))
+    assert interp(product).tolist() == [tuple(c) for c in np.argwhere(a.astype(int) @ b.astype(int))]
+    upper = sbn.CoordSet((i, k), sbn.And(sbn.IsNonFill(VA, (i, k)), sbn.Not(sbn.LessThan(k, i))))
+    assert interp(upper).tolist() == [tuple(c) for c in np.argwhere(np.triu(a))]
+    either = sbn.Union(sbn.CoordSet((i, k), sbn.IsNonFill(VA, (i, k))), sbn.CoordSet((i, k), sbn.IsNonFill(VB, (k, i))))
+    assert interp(sbn.Cardinality(either)) == (a | b.T).sum()
+
+def test_triejoin():
+    import numpy as np
+    import scipy.sparse as sp
+    from sparseanalyzer.coordinates import coordinates, join, relation
+
+    A = sp.random(60, 60, density=0.15, format="coo", random_state=0)
+    a = (A.toarray() != 0).astype(np.int64)
+    i = sbn.Index("i")
+    j = sbn.Index("j")
+    k = sbn.Index("k")
+    coords = coordinates(A)
+    rels = [relation(coords, (i, j)), relation(coords, (j, k)), relation(coords, (i, k))]
+    triangles = int(((a @ a) * a).sum())
+
+    tj = sbn.TrieJoin(rels)
+    assert set(tj.order) == {i, j, k}
+    res = tj.evaluate()
+    assert len(res) == tj.count() == triangles
+    cols = [res.idxs.index(idx) for idx in (i, j, k)]
+    expected = join(join(rels[0], rels[1]), rels[2])
+    assert sorted(map(tuple, res.coords[:, cols])) == sorted(map(tuple, expected.coords))
+    for order in [(k, j, i), (j, i, k)]:
+        assert sbn.TrieJoin(rels, order).count() == triangles
+
+    V = sbn.Variable("A")
+    tri = sbn.CoordSet((i, j, k), sbn.And(sbn.IsNonFill(V, (i, j)), sbn.And(sbn.IsNonFill(V, (j, k)), sbn.IsNonFill(V, (i, k)))))
+    interp = sbn.SetBuilderInterpreter({"A": A})
+    assert interp(sbn.Cardinality(tri)) == triangles
+    assert len(interp(tri)) == triangles
+
+
+def test_sketch_blocks():
+    import tracemalloc
+
+    import numpy as np
+    import scipy.sparse as sp
+    from sparseanalyzer.coordinates import coordinate_blocks, coordinates
+
+    A = sp.random(2000, 1000, density=0.1, format="csr", random_state=0)
+    for M in [A, A.tocsc(), A.tocoo(), A[:50].toarray()]:
+        blocks = list(coordinate_blocks(M, 1000))
+        assert max(len(block) for block in blocks) <= 1000
+        assert set(map(tuple, np.concatenate(blocks))) == set(map(tuple, coordinates(M)))
+
+    # The working set is a block of coordinates, not all of them.
+    i = sbn.Index("i")
+    j = sbn.Index("j")
+    expr = sbn.Cardinality(sbn.CoordSet((i, j), sbn.IsNonFill(sbn.Variable("A"), (i, j))))
+    whole = sbn.SketchEstimator({"A": A}, block_size=A.nnz)(expr)
+    tracemalloc.start()
+    blocked = sbn.SketchEstimator({"A": A}, block_size=4096)(expr)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert blocked == whole
+    assert peak < coordinates(A).nbytes / 4